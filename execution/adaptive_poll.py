@@ -0,0 +1,71 @@
+"""
+Adaptive poll interval for the agentic healer.
+
+The interval follows the recent execution volume and failure rate (EWMAs of new executions and new
+failures per second): an instance is polled often enough to see about TARGET_FAILURES_PER_POLL new
+failures or TARGET_EXECUTIONS_PER_POLL new executions per poll, whichever asks for the shorter interval,
+so a busy instance is watched closely even while it runs clean; a quiet one drifts towards `max_interval`.
+It shrinks at once when traffic picks up but grows at most 2x per poll, so a lull right after a burst
+doesn't jump straight to the slowest rate. Failed polls (n8n errors, timeouts, 429s) switch to
+exponential backoff from the current interval, never shorter than a Retry-After hint.
+"""
+
+import os
+import random
+from typing import Optional
+
+MIN_POLL_INTERVAL = float(os.getenv("HEALER_MIN_INTERVAL", "5"))
+MAX_POLL_INTERVAL = float(os.getenv("HEALER_MAX_INTERVAL", "120"))
+MAX_BACKOFF = float(os.getenv("HEALER_MAX_BACKOFF", "600"))
+TARGET_FAILURES_PER_POLL = 1.0
+TARGET_EXECUTIONS_PER_POLL = 25.0  # Well within one page of the executions list
+SMOOTHING = 0.3  # EWMA weight of the newest sample
+MAX_GROWTH = 2.0  # Largest interval increase per poll
+
+
+class AdaptiveInterval:
+    """Tracks one instance's execution and failure rates and returns the delay before its next poll."""
+
+    def __init__(self, initial: float, min_interval: float = MIN_POLL_INTERVAL,
+                 max_interval: float = MAX_POLL_INTERVAL, max_backoff: float = MAX_BACKOFF):
+        self.min_interval = min(min_interval, max_interval)
+        self.max_interval = max_interval
+        self.max_backoff = max(max_backoff, max_interval)
+        self.interval = self._clamp(initial)
+        self.rate: Optional[float] = None  # Failures per second
+        self.execution_rate: Optional[float] = None  # Executions (any status) per second
+        self.errors = 0  # Consecutive failed polls
+
+    def _clamp(self, value: float) -> float:
+        return min(self.max_interval, max(self.min_interval, value))
+
+    @staticmethod
+    def _smooth(rate: Optional[float], sample: float) -> float:
+        return sample if rate is None else SMOOTHING * sample + (1 - SMOOTHING) * rate
+
+    def record_poll(self, new_failures: int, window: Optional[float], new_executions: int = 0) -> float:
+        """Feed a successful poll that found `new_failures` and `new_executions` (any status) over the last
+        `window` seconds; returns the next delay.
+
+        Pass window=None for the first poll, whose backlog says nothing about the current rate.
+        """
+        self.errors = 0
+        if window and window > 0:
+            self.rate = self._smooth(self.rate, new_failures / window)
+            self.execution_rate = self._smooth(self.execution_rate, max(new_executions, new_failures) / window)
+            target = self.max_interval
+            if self.rate > 0:
+                target = min(target, TARGET_FAILURES_PER_POLL / self.rate)
+            if self.execution_rate > 0:
+                target = min(target, TARGET_EXECUTIONS_PER_POLL / self.execution_rate)
+            self.interval = self._clamp(min(target, self.interval * MAX_GROWTH))
+        return self.interval
+
+    def record_error(self, retry_after: Optional[float] = None) -> float:
+        """Feed a failed poll; returns the backoff delay (with jitter) before trying again."""
+        self.errors += 1
+        backoff = min(self.max_backoff, self.interval * 2 ** self.errors)
+        backoff *= random.uniform(0.8, 1.0)  # Replicas and fleet instances shouldn't retry in lockstep
+        if retry_after:
+            backoff = max(backoff, min(retry_after, self.max_backoff))
+        return backoff
@@ -5,10 +5,13 @@ This is Layer 2 (Orchestration) - makes intelligent decisions about when/how to
 """
 
 import os
+import sys
 import json
 import time
-import requests
-from datetime import datetime
+import signal
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
 from dotenv import load_dotenv
 from typing import Dict, List, Optional, Tuple
 
@@ -17,8 +20,31 @@ load_dotenv()
 N8N_URL = os.getenv("N8N_API_URL")
 N8N_KEY = os.getenv("N8N_API_KEY")
 HEAL_LOG_FILE = ".tmp/heal_log.json"
-MONITOR_INTERVAL = 30  # Check every 30 seconds
+MONITOR_INTERVAL = 30  # Starting poll interval; adapts between HEALER_MIN_INTERVAL and HEALER_MAX_INTERVAL
+POLL_LIMIT = 50  # Max failures collected per poll
+ERROR_FETCH_CONCURRENCY = int(os.getenv("ERROR_FETCH_CONCURRENCY", "5"))  # Parallel execution-detail fetches
+METRICS_PORT = os.getenv("HEALER_METRICS_PORT")  # Serve Prometheus metrics on this port when set
+PROFILE_SECONDS = os.getenv("HEALER_PROFILE_SECONDS")  # Profile the first N seconds of the loop when set
+SIGNAL_PROFILE_SECONDS = 30  # Length of a capture triggered by SIGUSR1
 PROCESSED_EXECUTIONS = set()  # Track which executions we've already processed
+FLEET_CONFIG = os.getenv("HEALER_FLEET_CONFIG")  # Monitor every instance in this file instead of N8N_API_URL
+LEASE_DB = os.getenv("HEALER_LEASE_DB")  # Shared SQLite file; set it on every replica to split work between them
+REPLICA_ID = os.getenv("HEALER_REPLICA_ID")  # Defaults to <hostname>-<pid>
+LEASE_TTL = float(os.getenv("HEALER_LEASE_TTL", "60"))  # Seconds before a silent replica loses its workflows
+HEAL_VISIBILITY_TIMEOUT = float(os.getenv("HEAL_VISIBILITY_TIMEOUT", "600"))  # Claimed heals reappear after this
+HEAL_MAX_ATTEMPTS = int(os.getenv("HEAL_MAX_ATTEMPTS", "5"))  # Then the job is dead-lettered
+HEAL_RETRY_DELAY = 60  # Seconds per attempt before a failed heal is retried
+DRAIN_INTERVAL = float(os.getenv("HEALER_DRAIN_INTERVAL", "2"))  # How often failures pushed to /api/ingest/failure are healed
+RECONCILE_INTERVAL = os.getenv("HEALER_RECONCILE_INTERVAL")  # With push ingestion: poll n8n only this often, as a fallback
+
+_heal_log_lock = threading.Lock()  # Fleet mode heals from several threads
+_leases = None
+_leases_lock = threading.Lock()
+_queue = None
+_queue_lock = threading.Lock()
+_breaker = None
+_retry_schedulers: Dict[str, "RetryScheduler"] = {}
+_newest_execution_ids: Dict[str, int] = {}  # Per instance: newest execution id seen by count_new_executions
 
 # Ensure .tmp directory exists
 os.makedirs(".tmp", exist_ok=True)
@@ -41,49 +67,523 @@ def load_heal_log() -> List[Dict]:
 
 def save_heal_log(entry: Dict):
     """Save a healing attempt to the log for future learning."""
-    log = load_heal_log()
-    log.append({
-        **entry,
-        "timestamp": datetime.now().isoformat()
-    })
-    with open(HEAL_LOG_FILE, 'w') as f:
-        json.dump(log, f, indent=2)
+    with _heal_log_lock:
+        log = load_heal_log()
+        log.append({
+            **entry,
+            "timestamp": datetime.now().isoformat()
+        })
+        with open(HEAL_LOG_FILE, 'w') as f:
+            json.dump(log, f, indent=2)
+
+
+def update_heal_log(execution_id: str, instance: Optional[str] = None, **fields):
+    """Add fields (e.g. the verification outcome) to the logged heal of an execution."""
+    with _heal_log_lock:
+        log = load_heal_log()
+        for entry in reversed(log):
+            if entry.get("execution_id") == execution_id and entry.get("instance") == instance:
+                entry.update(fields)
+                break
+        else:
+            return
+        with open(HEAL_LOG_FILE, 'w') as f:
+            json.dump(log, f, indent=2)
 
 
 # Import shared logic
-from execution.core_healer import heal_workflow, get_workflow
+from execution.core_healer import (heal_workflow, get_workflow, error_classes, list_failed_executions,
+                                   matches_snapshot, rollback_workflow)
+from execution.execution_fetch import describe_missing_error, fetch_execution_failure
+from execution.fix_memory import record_replay_outcome
+from execution.metrics import (DETECTION_LAG_SECONDS, HEAL_VERIFICATIONS, POLL_ERRORS, POLL_INTERVAL_SECONDS,
+                               POLL_LAG_SECONDS, QUEUE_DEPTH, start_metrics_server)
+from execution.adaptive_poll import MAX_POLL_INTERVAL, MIN_POLL_INTERVAL, AdaptiveInterval
+from execution.n8n_client import N8nApiError, n8n_request
+from execution.profiler import capture_in_background
+from execution.leases import LeaseManager, default_replica_id
+from execution.heal_queue import HEAL_QUEUE_DB, HealQueue
+from execution.retry_scheduler import RetryScheduler
+from execution.snapshots import get_store
+from execution.verification import (AUTO_ROLLBACK, BREAKER_WINDOW, VERIFY_EXECUTIONS, VERIFY_TIMEOUT, CircuitBreaker,
+                                    is_related_failure, is_transient, verdict)
+
+WORKER_ID = REPLICA_ID or default_replica_id()
+
+
+def get_leases() -> Optional[LeaseManager]:
+    """The replica's lease manager (heartbeating from first use), or None when HEALER_LEASE_DB is unset."""
+    global _leases
+    if not LEASE_DB:
+        return None
+    with _leases_lock:
+        if _leases is None:
+            _leases = LeaseManager(LEASE_DB, REPLICA_ID, LEASE_TTL)
+            _leases.start_heartbeat()
+        return _leases
+
+
+def get_queue() -> HealQueue:
+    """The durable heal queue. Without replicas, claims left by a previous run are resumed right away."""
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = HealQueue(HEAL_QUEUE_DB, HEAL_VISIBILITY_TIMEOUT, HEAL_MAX_ATTEMPTS)
+            _queue.purge_done()
+            if not LEASE_DB:
+                resumed = _queue.release_claims()
+                if resumed:
+                    print(f"♻️  Resuming {resumed} heals interrupted in the last run")
+        return _queue
+
+
+def get_breaker() -> CircuitBreaker:
+    """Per-workflow regression breaker, kept next to the heal queue so replicas share it."""
+    global _breaker
+    with _queue_lock:
+        if _breaker is None:
+            _breaker = CircuitBreaker(HEAL_QUEUE_DB)
+        return _breaker
+
+
+def get_retry_scheduler(instance: Optional[str] = None) -> RetryScheduler:
+    """Retry scheduler for an instance's transient failures (jobs live in the heal queue)."""
+    queue = get_queue()
+    scope = instance or "default"
+    with _queue_lock:
+        if scope not in _retry_schedulers or _retry_schedulers[scope].queue is not queue:
+            _retry_schedulers[scope] = RetryScheduler(queue, scope)
+        return _retry_schedulers[scope]
 
-def get_workflow_name(workflow_id: str) -> str:
+
+def get_workflow_name(workflow_id: str, n8n_url: str = None, n8n_key: str = None) -> str:
     """Fetch workflow name from n8n API."""
-    workflow = get_workflow(workflow_id)
+    workflow = get_workflow(workflow_id, n8n_url, n8n_key)
     if workflow:
         return workflow.get('name', f"Workflow {workflow_id}")
     return f"Workflow {workflow_id}"
 
-def get_execution_error(execution_id: str) -> Optional[str]:
-    """Fetch the actual error message from an execution."""
-    # This is slightly different from api.py's version but uses the same recursive logic
-    # To avoid cross-dependency issues, we'll keep the recursive search here or move to core_healer.
-    # For now, let's just use the api.py logic which is better.
-    # Actually, let's just import find_error_recursive from a helper or keep it here.
-    url = f"{N8N_URL}/api/v1/executions/{execution_id}?includeData=true"
-    headers = {"X-N8N-API-KEY": N8N_KEY}
+def get_execution_failure(execution_id: str, n8n_url: str = None, n8n_key: str = None) -> Tuple[Optional[str], Optional[str]]:
+    """Fetch the actual error message of an execution and the node it failed in (size-capped, see execution_fetch)."""
     try:
-        resp = requests.get(url, headers=headers, timeout=10)
-        if resp.status_code == 200:
-            full_data = resp.json()
-            # Reuse logic to find error
-            from execution.api import find_error_recursive
-            return find_error_recursive(full_data)
+        result = fetch_execution_failure(n8n_url or N8N_URL, n8n_key or N8N_KEY, execution_id)
+        if result["status"] == "complete":
+            return result["error"], result["failing_node"]
+        if result["status"] == "truncated":
+            return result["error"] or describe_missing_error(result), result["failing_node"]
     except:
         pass
-    return "Unknown Error"
+    return "Unknown Error", None
+
+
+def heal_failure(execution: Dict, error_msg: Optional[str], n8n_url: str = None, n8n_key: str = None,
+                 processed: Optional[set] = None, instance: Optional[str] = None) -> Dict:
+    """Heal one detected failure, log the attempt and mark the execution as processed.
+
+    Fleet mode passes the instance's credentials, its own processed set and its name (logged and printed).
+    """
+    execution_id = execution.get('id')
+    workflow_id = execution.get('workflowId')
+    processed = PROCESSED_EXECUTIONS if processed is None else processed
+    prefix = f"[{instance}] " if instance else ""
+
+    workflow_name = get_workflow_name(workflow_id, n8n_url, n8n_key)
+    print(f"\n🔍 {prefix}Detected failure: {workflow_name} (Execution: {execution_id})")
+
+    if not error_msg:
+        error_msg = "Unknown error (could not fetch details)"
+
+    print(f"   Error: {error_msg[:100]}...")
+
+    # Agentic decision: attempt to heal, unless this workflow's fixes keep regressing
+    breaker = get_breaker()
+    workflow_key = f"{instance or 'default'}:{workflow_id}"
+    if breaker.is_open(workflow_key):
+        result = {"status": "explained",
+                  "message": f"🚫 Circuit breaker open: heals of this workflow regressed {breaker.regressions(workflow_key)} "
+                             f"times in the last {BREAKER_WINDOW / 3600:g}h. Manual review required "
+                             f"(then: python -m execution.verification reset {workflow_key})."}
+    elif (execution.get('retryOf') and is_transient(error_msg)
+          and get_retry_scheduler(instance).is_scheduled(execution['retryOf'])):
+        # Our scheduled retry failed transiently again; its original is still queued with a growing backoff
+        result = {"status": "retrying",
+                  "message": f"⏳ Retry of execution {execution['retryOf']} failed; the retry scheduler backs off and tries again."}
+    elif is_transient(error_msg):
+        queued, delay = get_retry_scheduler(instance).schedule(execution, error_msg)
+        message = f"⏳ Transient failure: retry scheduled in {delay:.0f}s (exponential backoff)."
+        if "rate_limit" in error_classes(error_msg):
+            message += " RECOMMENDED: Add a 'Wait' node before API calls."
+        result = {"status": "retrying", "message": message if queued else "⏳ Retry already scheduled."}
+    else:
+        print("   🤖 Agentic healing in progress...")
+        result = heal_workflow(workflow_id, execution_id, error_msg, n8n_url, n8n_key,
+                               failing_node=execution.get('lastNodeExecuted'))
+    success = result["status"] == "resolved"
+    status = result["status"]
+    message = result["message"]
+
+    # Log the healing attempt
+    heal_entry = {
+        **({"instance": instance} if instance else {}),
+        "execution_id": execution_id,
+        "workflow_id": workflow_id,
+        "workflow_name": workflow_name,
+        "error": error_msg,
+        "heal_status": status,
+        "heal_message": message,
+        "success": success,
+        "trace_id": result.get("trace_id"),
+        "timings": result.get("timings", {}),
+        **{field: result[field] for field in ("failing_node", "node_type", "snapshot_id") if result.get(field)}
+    }
+    save_heal_log(heal_entry)
+
+    # Mark as processed
+    processed.add(execution_id)
+
+    # Report result
+    if success:
+        print(f"   ✅ {prefix}{message}")
+    else:
+        print(f"   ⚠️  {prefix}{message}")
+    return result
+
+
+def detect_failures(n8n_url: str = None, n8n_key: str = None, processed: Optional[set] = None,
+                    instance: Optional[str] = None) -> int:
+    """Poll n8n for new failed executions and enqueue them durably. Returns the number enqueued."""
+    processed = PROCESSED_EXECUTIONS if processed is None else processed
+    n8n_url, n8n_key = n8n_url or N8N_URL, n8n_key or N8N_KEY
+    queue = get_queue()
+    leases = get_leases()
+    scope = instance or "default"
+
+    # Fetch recent failures (server-side status filter, paginated)
+    failures = list_failed_executions(POLL_LIMIT, n8n_url, n8n_key, known_ids=processed)
+    new_failures = [exc for exc in failures if exc.get('id') not in processed]
+    if leases:
+        # Replicas split workflows by consistent hashing; only handle the ones that hash to us
+        new_failures = [exc for exc in new_failures if leases.owns(f"{scope}:{exc.get('workflowId')}")]
+
+    # Skip executions the queue already has (e.g. after a restart, when `processed` starts empty)
+    known = queue.existing_keys([f"{scope}:{exc.get('id')}" for exc in new_failures])
+    processed.update(exc.get('id') for exc in new_failures if f"{scope}:{exc.get('id')}" in known)
+    new_failures = [exc for exc in new_failures if f"{scope}:{exc.get('id')}" not in known]
+
+    # Fetch the actual error messages (and failing nodes) with bounded concurrency
+    with ThreadPoolExecutor(max_workers=ERROR_FETCH_CONCURRENCY) as pool:
+        failures = list(pool.map(lambda exc: get_execution_failure(exc.get('id'), n8n_url, n8n_key), new_failures))
+
+    detected_at = datetime.now(timezone.utc)
+    for exc, (error_msg, failing_node) in zip(new_failures, failures):
+        execution = {**exc, "lastNodeExecuted": failing_node} if failing_node else exc
+        queue.enqueue(f"{scope}:{exc.get('id')}", {"execution": execution, "error": error_msg}, queue=scope)
+        processed.add(exc.get('id'))
+        stopped_at = _parse_timestamp(exc.get('stoppedAt') or exc.get('startedAt'))
+        if stopped_at:
+            DETECTION_LAG_SECONDS.observe(max(0.0, (detected_at - stopped_at).total_seconds()), instance=scope)
+    return len(new_failures)
+
+
+def count_new_executions(n8n_url: str = None, n8n_key: str = None, instance: Optional[str] = None) -> int:
+    """Executions of any status started since the previous poll: the volume signal for the adaptive interval.
+
+    Reads one page of the executions list (no data); a page with nothing older than the last poll counts
+    as its size, a lower bound. The first poll of an instance only records where it is and returns 0.
+    """
+    n8n_url, n8n_key = n8n_url or N8N_URL, n8n_key or N8N_KEY
+    resp = n8n_request("GET", n8n_url, n8n_key, "/executions", params={"limit": POLL_LIMIT, "includeData": "false"})
+    if resp.status_code != 200:
+        raise N8nApiError.from_response("Failed to fetch executions", resp)
+    ids = [int(e["id"]) for e in resp.json().get("data", []) if str(e.get("id", "")).isdigit()]
+    scope = instance or "default"
+    newest = _newest_execution_ids.get(scope)
+    if ids:
+        _newest_execution_ids[scope] = max(ids + ([newest] if newest is not None else []))
+    return 0 if newest is None else sum(1 for execution_id in ids if execution_id > newest)
+
+
+def _parse_timestamp(value: Optional[str]) -> Optional[datetime]:
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except (AttributeError, ValueError):
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def drain_queue(n8n_url: str = None, n8n_key: str = None, processed: Optional[set] = None,
+                instance: Optional[str] = None, heal_concurrency: int = 1) -> int:
+    """Heal queued failures until none are ready. Returns the number of heals completed.
+
+    With `heal_concurrency` > 1, failures of different workflows heal in parallel; failures of the
+    same workflow always heal one after another so their updates don't race. A heal that raises is
+    retried later and dead-lettered after HEAL_MAX_ATTEMPTS. Scheduled retries of transient failures
+    that have come due run afterwards.
+    """
+    processed = PROCESSED_EXECUTIONS if processed is None else processed
+    n8n_url, n8n_key = n8n_url or N8N_URL, n8n_key or N8N_KEY
+    queue = get_queue()
+    leases = get_leases()
+    scope = instance or "default"
+    prefix = f"[{instance}] " if instance else ""
+
+    def heal_group(workflow_id, jobs) -> int:
+        lease_key = f"{scope}:{workflow_id}"
+        # The lease keeps a replica that still sees the old ring from updating this workflow concurrently
+        if leases and not leases.acquire(lease_key):
+            for job in jobs:
+                queue.release(job["id"], job["claim_token"], delay=LEASE_TTL)
+            return 0
+        completed = 0
+        try:
+            for job in jobs:
+                execution = job["payload"]["execution"]
+                try:
+                    if leases and leases.is_healed(job["job_key"]):
+                        processed.add(execution.get('id'))  # Healed by the replica that owned it before
+                    else:
+                        # Pushed failures may arrive without a message; fetch it like the poller does
+                        error_msg = job["payload"].get("error")
+                        if not error_msg:
+                            error_msg, failing_node = get_execution_failure(execution.get('id'), n8n_url, n8n_key)
+                            execution = {**execution, "lastNodeExecuted": execution.get('lastNodeExecuted') or failing_node}
+                        result = heal_failure(execution, error_msg, n8n_url, n8n_key, processed, instance)
+                        if leases:
+                            leases.mark_healed(job["job_key"])
+                        if result["status"] == "resolved" and result.get("snapshot_id"):
+                            # The workflow changed: watch its next executions before trusting the fix
+                            queue.enqueue(f"verify:{job['job_key']}", {
+                                "workflow_id": workflow_id, "execution_id": execution.get('id'),
+                                "snapshot_id": result["snapshot_id"], "replay_refs": result.get("replay_refs", []),
+                                "memory_refs": result.get("memory_refs", []),
+                                "error": error_msg, "failing_node": result.get("failing_node"),
+                                "healed_at": datetime.now(timezone.utc).isoformat()}, queue=f"verify:{scope}")
+                        completed += 1
+                    if not queue.ack(job["id"], job["claim_token"]):
+                        print(f"   ⚠️  {prefix}Claim on execution {execution.get('id')} expired and was taken by another worker")
+                except Exception as e:
+                    status = queue.nack(job["id"], job["claim_token"], f"{type(e).__name__}: {e}",
+                                        delay=HEAL_RETRY_DELAY * job["attempts"])
+                    print(f"   ❌ {prefix}Heal of execution {execution.get('id')} failed ({status}): {e}")
+        finally:
+            if leases:
+                leases.release(lease_key)
+        return completed
+
+    completed = 0
+    while True:
+        jobs = queue.claim(WORKER_ID, POLL_LIMIT, queue=scope)
+        if not jobs:
+            break
+        # Group by workflow, keeping queue order within each group
+        by_workflow: Dict[str, List[Dict]] = {}
+        for job in jobs:
+            by_workflow.setdefault(job["payload"]["execution"].get('workflowId'), []).append(job)
 
+        if heal_concurrency <= 1 or len(by_workflow) <= 1:
+            completed += sum(heal_group(workflow_id, group) for workflow_id, group in by_workflow.items())
+        else:
+            with ThreadPoolExecutor(max_workers=heal_concurrency) as pool:
+                completed += sum(pool.map(heal_group, by_workflow.keys(), by_workflow.values()))
+        update_queue_metrics()
 
-def monitor_and_heal():
+    # Scheduled retries of transient failures that are now due
+    for payload, outcome in get_retry_scheduler(instance).run_due(WORKER_ID, n8n_url, n8n_key, POLL_LIMIT):
+        update_heal_log(payload["execution_id"], instance, retry=outcome)
+        if outcome == "succeeded":
+            print(f"   ✅ {prefix}Retry of execution {payload['execution_id']} succeeded")
+        else:
+            print(f"   ⚠️  {prefix}Gave up retrying execution {payload['execution_id']} ({payload['destination']})")
+    return completed
+
+
+def rollback_if_unchanged(workflow_id: str, snapshot_id: int, later: List[Dict], n8n_url: str,
+                          n8n_key: str) -> Tuple[Optional[bool], str]:
+    """Roll back to `snapshot_id` only if the deployed workflow is still the heal's post_heal snapshot.
+
+    Returns (True, message) when restored, (False, message) when the rollback failed, and (None, message)
+    when it was skipped because the workflow was edited after the heal (or that can't be confirmed).
+    """
+    post_heal = next((meta for meta in later if meta["label"] == "post_heal"), None)
+    current = get_workflow(workflow_id, n8n_url, n8n_key)
+    if post_heal is None or current is None:
+        return None, f"Skipped rollback of workflow {workflow_id}: could not confirm it is unchanged since the heal."
+    if not matches_snapshot(current, get_store().get(post_heal["id"])["workflow"]):
+        return None, f"Skipped rollback of workflow {workflow_id}: it was edited after the heal."
+    return rollback_workflow(snapshot_id, n8n_url, n8n_key)
+
+
+def verify_heals(n8n_url: str = None, n8n_key: str = None, instance: Optional[str] = None) -> int:
+    """Check healed workflows' executions since their heal; roll back regressions. Returns heals decided.
+
+    Each workflow's executions are listed once per call, however many of its heals are pending, and
+    each failed execution's details are fetched at most once. Undecided heals go back to the queue and
+    are checked again on the next poll.
+    """
+    n8n_url, n8n_key = n8n_url or N8N_URL, n8n_key or N8N_KEY
+    queue = get_queue()
+    leases = get_leases()
+    scope = instance or "default"
+    prefix = f"[{instance}] " if instance else ""
+    decided = 0
+    listings: Dict[str, List[Dict]] = {}
+    failures: Dict[str, Dict] = {}
+
+    def executions_of(workflow_id: str) -> List[Dict]:
+        if workflow_id not in listings:
+            resp = n8n_request("GET", n8n_url, n8n_key, "/executions",
+                               params={"workflowId": workflow_id, "limit": POLL_LIMIT})
+            if resp.status_code != 200:
+                raise RuntimeError(f"n8n returned status {resp.status_code} listing executions")
+            listings[workflow_id] = resp.json().get("data", [])
+        return listings[workflow_id]
+
+    def failure_of(execution_id: str) -> Dict:
+        if execution_id not in failures:
+            failure = fetch_execution_failure(n8n_url, n8n_key, execution_id)
+            if failure["status"] == "failed":
+                raise RuntimeError(f"n8n returned status {failure['status_code']} fetching execution {execution_id}")
+            failures[execution_id] = failure
+        return failures[execution_id]
+
+    jobs = queue.claim(WORKER_ID, POLL_LIMIT, queue=f"verify:{scope}")
+    jobs.sort(key=lambda job: str(job["payload"]["workflow_id"]))  # Stable: a workflow's heals stay in order
+    for job in jobs:
+        payload = job["payload"]
+        workflow_id, execution_id = payload["workflow_id"], payload["execution_id"]
+        workflow_key = f"{scope}:{workflow_id}"
+        if leases and not leases.acquire(workflow_key):
+            queue.release(job["id"], job["claim_token"], delay=LEASE_TTL)
+            continue
+        try:
+            healed_at = _parse_timestamp(payload["healed_at"])
+
+            def is_related(execution: Dict) -> bool:
+                failure = failure_of(execution.get("id"))
+                return is_related_failure(failure["error"], failure["failing_node"],
+                                          payload.get("error"), payload.get("failing_node"))
+
+            outcome, failed = verdict(executions_of(workflow_id), healed_at, VERIFY_EXECUTIONS, is_related)
+
+            if outcome is None:
+                if (datetime.now(timezone.utc) - healed_at).total_seconds() < VERIFY_TIMEOUT:
+                    queue.release(job["id"], job["claim_token"])
+                    continue
+                outcome = "unverified"  # The workflow didn't run enough to tell
+            fields = {"verification": outcome}
+            if outcome in ("verified", "regressed"):
+                # Fix memory patches (replayed, or newly learned from Gemini) earn or lose trust only from the verdict
+                refs = (payload.get("replay_refs") or []) + (payload.get("memory_refs") or [])
+                record_replay_outcome(n8n_url, refs, outcome == "verified")
+            if outcome == "regressed":
+                regressions = get_breaker().record_regression(workflow_key)
+                fields["regressed_execution_id"] = failed.get("id")
+                print(f"   ❌ {prefix}Heal of execution {execution_id} regressed (execution {failed.get('id')} failed; "
+                      f"{regressions} regressions)")
+                # A later heal (or rollback) of the workflow supersedes this one; restoring would undo it
+                later = sorted((meta for meta in get_store().list(n8n_url, workflow_id, limit=20)
+                                if meta["id"] > payload["snapshot_id"]), key=lambda meta: meta["id"])
+                superseded = any(meta["label"] in ("pre_heal", "rollback") for meta in later)
+                if AUTO_ROLLBACK and not superseded:
+                    rolled_back, message = rollback_if_unchanged(workflow_id, payload["snapshot_id"], later,
+                                                                 n8n_url, n8n_key)
+                    fields["rolled_back"] = bool(rolled_back)
+                    if rolled_back is None:
+                        fields["rollback_skipped"] = message
+                    HEAL_VERIFICATIONS.inc(result="rollback_skipped" if rolled_back is None
+                                           else "rolled_back" if rolled_back else "rollback_failed")
+                    print(f"   ↩️  {prefix}{message}" if rolled_back else f"   ⚠️  {prefix}{message}")
+            elif outcome == "verified":
+                print(f"   ✅ {prefix}Heal of execution {execution_id} verified by {VERIFY_EXECUTIONS} passing executions")
+            HEAL_VERIFICATIONS.inc(result=outcome)
+            update_heal_log(execution_id, instance, **fields)
+            if not queue.ack(job["id"], job["claim_token"]):
+                print(f"   ⚠️  {prefix}Claim on verification of execution {execution_id} expired and was taken by another worker")
+            decided += 1
+        except Exception as e:
+            queue.nack(job["id"], job["claim_token"], f"{type(e).__name__}: {e}", delay=HEAL_RETRY_DELAY)
+            print(f"   ⚠️  {prefix}Could not verify heal of execution {execution_id}: {e}")
+        finally:
+            if leases:
+                leases.release(workflow_key)
+    return decided
+
+
+def update_queue_metrics():
+    stats = get_queue().stats()
+    QUEUE_DEPTH.set(stats["pending"] + stats["in_flight"], queue="heal")
+    QUEUE_DEPTH.set(stats["dead"], queue="dead_letter")
+
+
+def poll_once(n8n_url: str = None, n8n_key: str = None, processed: Optional[set] = None,
+              instance: Optional[str] = None, heal_concurrency: int = 1) -> Tuple[int, int]:
+    """Run one detection + healing cycle. Returns (new failures detected, new executions of any status)."""
+    try:
+        executions = count_new_executions(n8n_url, n8n_key, instance)
+        return detect_failures(n8n_url, n8n_key, processed, instance), executions
+    finally:
+        # Verify earlier heals first, so a regression is rolled back before its failure is healed again
+        verify_heals(n8n_url, n8n_key, instance)
+        # Queued work (including retries and heals resumed after a restart) drains even if polling failed
+        update_queue_metrics()
+        drain_queue(n8n_url, n8n_key, processed, instance, heal_concurrency)
+
+
+def make_schedule(initial: float, min_interval: float = MIN_POLL_INTERVAL,
+                  max_interval: float = MAX_POLL_INTERVAL) -> AdaptiveInterval:
+    """Poll schedule for one instance. With HEALER_RECONCILE_INTERVAL set, polling is a fixed, slow fallback."""
+    if RECONCILE_INTERVAL:
+        interval = float(RECONCILE_INTERVAL)
+        return AdaptiveInterval(interval, interval, interval)
+    return AdaptiveInterval(initial, min_interval, max_interval)
+
+
+def drain_until(deadline: float, n8n_url: str = None, n8n_key: str = None, processed: Optional[set] = None,
+                instance: Optional[str] = None, heal_concurrency: int = 1):
+    """Wait until `deadline` (monotonic), healing pushed failures every DRAIN_INTERVAL in the meantime."""
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return
+        time.sleep(min(DRAIN_INTERVAL, remaining))
+        try:
+            drain_queue(n8n_url, n8n_key, processed, instance, heal_concurrency)
+        except Exception as e:
+            print(f"⚠️  Failed to drain the heal queue: {e}")
+
+
+def poll_with_schedule(schedule: AdaptiveInterval, window: Optional[float], n8n_url: str = None, n8n_key: str = None,
+                       processed: Optional[set] = None, instance: Optional[str] = None, heal_concurrency: int = 1) -> float:
+    """Run poll_once and return the delay before the next poll: the adaptive interval, or a backoff after errors.
+
+    `window` is the time since the previous poll started (None for the first poll).
+    """
+    name = instance or "default"
+    try:
+        detected, executions = poll_once(n8n_url, n8n_key, processed, instance, heal_concurrency)
+    except Exception as e:
+        POLL_ERRORS.inc(instance=name)
+        delay = schedule.record_error(getattr(e, "retry_after", None))
+        prefix = f"[{instance}] " if instance else ""
+        print(f"⚠️  {prefix}{e} (next poll in {delay:.0f}s)")
+    else:
+        delay = schedule.record_poll(detected, window, executions)
+    POLL_INTERVAL_SECONDS.set(delay, instance=name)
+    return delay
+
+
+def enable_profiling(startup_seconds: Optional[float] = None):
+    """Profile the first `startup_seconds` of the loop, and `kill -USR1 <pid>` captures on demand later."""
+    if startup_seconds:
+        capture_in_background(startup_seconds, "healer")
+    if hasattr(signal, "SIGUSR1"):
+        signal.signal(signal.SIGUSR1, lambda *_: capture_in_background(SIGNAL_PROFILE_SECONDS, "healer"))
+
+
+def monitor_and_heal(max_cycles: Optional[int] = None):
     """
     Main agentic loop: continuously monitors n8n for failures and automatically heals them.
-    This is the core of the agentic workflow.
+    This is the core of the agentic workflow. `max_cycles` bounds the loop (used by benchmarks).
     """
     if not N8N_URL or not N8N_KEY:
         print("❌ Error: N8N_API_URL or N8N_API_KEY not set in .env")
@@ -92,87 +592,51 @@ def monitor_and_heal():
     print("=" * 60)
     print("   🤖 Agentic Self-Annealing System for n8n")
     print("   Monitoring for workflow failures...")
-    print(f"   Check interval: {MONITOR_INTERVAL} seconds")
+    if RECONCILE_INTERVAL:
+        print(f"   Check interval: {RECONCILE_INTERVAL} seconds (reconcile; pushed failures every {DRAIN_INTERVAL:g}s)")
+    else:
+        print(f"   Check interval: {MONITOR_INTERVAL} seconds (adaptive, {MIN_POLL_INTERVAL:g}-{MAX_POLL_INTERVAL:g}s)")
+    if METRICS_PORT:
+        start_metrics_server(int(METRICS_PORT))
+        print(f"   Metrics: http://localhost:{METRICS_PORT}/metrics")
+    if get_leases():
+        print(f"   Replica: {_leases.replica_id} (leases in {LEASE_DB}, {len(_leases.ring.replicas)} live)")
+    if PROFILE_SECONDS:
+        print(f"   Profiling: first {PROFILE_SECONDS}s -> .tmp/profiles/ (SIGUSR1 for more)")
     print("=" * 60)
     
-    while True:
+    schedule = make_schedule(MONITOR_INTERVAL)
+    cycles = 0
+    last_start = None
+    next_due = time.monotonic()
+    while max_cycles is None or cycles < max_cycles:
+        cycles += 1
+        # Poll loop lag: how far behind schedule this cycle starts (slow heals push it back)
+        started = time.monotonic()
+        POLL_LAG_SECONDS.observe(max(0.0, started - next_due), instance="default")
         try:
-            # Fetch recent executions
-            url = f"{N8N_URL}/api/v1/executions?limit=50&includeData=false"
-            headers = {"X-N8N-API-KEY": N8N_KEY}
-            
-            resp = requests.get(url, headers=headers, timeout=10)
-            if resp.status_code != 200:
-                print(f"⚠️  Failed to fetch executions. Status: {resp.status_code}")
-                time.sleep(MONITOR_INTERVAL)
-                continue
-            
-            executions = resp.json().get('data', [])
-            
-            # Process each execution
-            for exc in executions:
-                execution_id = exc.get('id')
-                workflow_id = exc.get('workflowId')
-                is_success = exc.get('finished', False)
-                
-                # Skip if we've already processed this execution
-                if execution_id in PROCESSED_EXECUTIONS:
-                    continue
-                
-                # Only process failed executions
-                if not is_success:
-                    workflow_name = get_workflow_name(workflow_id)
-                    print(f"\n🔍 Detected failure: {workflow_name} (Execution: {execution_id})")
-                    
-                    # Fetch the actual error message
-                    error_msg = get_execution_error(execution_id)
-                    if not error_msg:
-                        error_msg = "Unknown error (could not fetch details)"
-                    
-                    print(f"   Error: {error_msg[:100]}...")
-                    
-                    # Agentic decision: attempt to heal
-                    print("   🤖 Agentic healing in progress...")
-                    result = heal_workflow(workflow_id, execution_id, error_msg)
-                    success = result["status"] == "resolved"
-                    status = result["status"]
-                    message = result["message"]
-                    
-                    # Log the healing attempt
-                    heal_entry = {
-                        "execution_id": execution_id,
-                        "workflow_id": workflow_id,
-                        "workflow_name": workflow_name,
-                        "error": error_msg,
-                        "heal_status": status,
-                        "heal_message": message,
-                        "success": success
-                    }
-                    save_heal_log(heal_entry)
-                    
-                    # Mark as processed
-                    PROCESSED_EXECUTIONS.add(execution_id)
-                    
-                    # Report result
-                    if success:
-                        print(f"   ✅ {message}")
-                    else:
-                        print(f"   ⚠️  {message}")
-                else:
-                    # Mark successful executions as processed to avoid re-checking
-                    PROCESSED_EXECUTIONS.add(execution_id)
-            
-            # Sleep before next check
-            time.sleep(MONITOR_INTERVAL)
-            
+            delay = poll_with_schedule(schedule, started - last_start if last_start else None)
+            last_start = started
+            next_due = started + delay
+
+            # Sleep before next check, healing pushed failures in the meantime
+            if max_cycles is None or cycles < max_cycles:
+                drain_until(next_due)
+
         except KeyboardInterrupt:
             print("\n\n🛑 Agentic healer stopped by user")
+            if _leases:
+                _leases.leave()
             break
-        except Exception as e:
-            print(f"❌ Error in monitoring loop: {str(e)}")
-            time.sleep(MONITOR_INTERVAL)
 
 
 if __name__ == "__main__":
+    # --profile SECONDS (or HEALER_PROFILE_SECONDS) samples the process into a flamegraph-ready file
+    if "--profile" in sys.argv:
+        PROFILE_SECONDS = sys.argv[sys.argv.index("--profile") + 1]
+    # --fleet FILE (or HEALER_FLEET_CONFIG) hands over to `python -m execution.fleet`: importing the fleet from
+    # here would load a second copy of this module (this one runs as __main__) with its own state
+    if "--fleet" in sys.argv or FLEET_CONFIG:
+        os.execv(sys.executable, [sys.executable, "-m", "execution.fleet"] + sys.argv[1:])
+    enable_profiling(float(PROFILE_SECONDS) if PROFILE_SECONDS else None)
     monitor_and_heal()
-
@@ -1,17 +1,47 @@
-import google.generativeai as genai
 import os
 import json
+import threading
 from dotenv import load_dotenv
 
+try:
+    from execution.metrics import GEMINI_REQUEST_ERRORS, GEMINI_REQUEST_SECONDS
+    from execution.tracing import span
+    from execution.workflow_graph import WorkflowGraph, graph_for
+except ImportError:
+    from metrics import GEMINI_REQUEST_ERRORS, GEMINI_REQUEST_SECONDS
+    from tracing import span
+    from workflow_graph import WorkflowGraph, graph_for
+
 load_dotenv()
 
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+MAX_CHAIN_NODES = 10  # Upstream nodes named in the prompt (nearest ones)
+
+# The Gemini SDK is slow to import, so it is only loaded on the first AI escalation
+_genai = None
+_genai_lock = threading.Lock()
+
+def get_genai():
+    """Import (and configure) google.generativeai on first use."""
+    global _genai
+    if _genai is None:
+        with _genai_lock:
+            if _genai is None:
+                import google.generativeai as genai
+                if GEMINI_API_KEY:
+                    genai.configure(api_key=GEMINI_API_KEY)
+                _genai = genai
+    return _genai
 
-if GEMINI_API_KEY:
-    genai.configure(api_key=GEMINI_API_KEY)
+def warmup_in_background() -> threading.Thread:
+    """Preload the Gemini SDK on a daemon thread so the first escalation doesn't pay the import."""
+    thread = threading.Thread(target=get_genai, name="gemini-warmup", daemon=True)
+    thread.start()
+    return thread
 
 def get_working_model():
     """Try to find a working model from the available list."""
+    genai = get_genai()
     candidates = [
         'gemini-1.5-flash',
         'gemini-1.5-pro',
@@ -34,9 +64,34 @@ def get_working_model():
     print("❌ No working Gemini models found.")
     return None
 
-def consult_gemini_for_fix(workflow_json: dict, error_msg: str, api_key: str = None) -> tuple[bool, str, dict]:
+def parse_gemini_response(text: str) -> dict:
+    """Parse Gemini's reply into {"explanation", "fixed_workflow"}, tolerating a ```json fence."""
+    text = text.strip()
+
+    # Clean up markdown if present
+    if text.startswith("```json"):
+        text = text[7:]
+    if text.endswith("```"):
+        text = text[:-3]
+
+    return json.loads(text)
+
+def describe_failing_node(workflow_json: dict, failing_node: str, graph: WorkflowGraph = None) -> str:
+    """Prompt lines naming the failing node and the chain of nodes that fed it, or '' if it isn't in the workflow."""
+    graph = graph or graph_for(workflow_json)
+    if failing_node not in graph:
+        return ""
+    chain = graph.upstream_chain(failing_node)
+    shown = chain[-MAX_CHAIN_NODES:]
+    path = " → ".join(([f"... ({len(chain) - len(shown)} more)"] if len(chain) > len(shown) else []) + shown + [failing_node])
+    return (f'FAILING NODE: "{failing_node}" ({graph.types[failing_node]})\n'
+            f"    DATA FLOWS INTO IT FROM: {path}\n")
+
+def consult_gemini_for_fix(workflow_json: dict, error_msg: str, api_key: str = None, failing_node: str = None,
+                           graph: WorkflowGraph = None) -> tuple[bool, str, dict]:
     """
     Sends the broken workflow and error to Gemini to generate a fix.
+    With the failing node known, the prompt names it and its upstream chain so the fix starts there.
     Returns: (success, explanation, fixed_workflow_json)
     """
     current_key = api_key or GEMINI_API_KEY
@@ -44,6 +99,7 @@ def consult_gemini_for_fix(workflow_json: dict, error_msg: str, api_key: str = N
         return False, "No Gemini API Key found", {}
 
     # Configure the key for this request
+    genai = get_genai()
     genai.configure(api_key=current_key)
 
     # Improve: Cache the working model? For now, re-instantiating is fine.
@@ -58,18 +114,19 @@ def consult_gemini_for_fix(workflow_json: dict, error_msg: str, api_key: str = N
         'gemini-3-flash-preview'
     ]
     
+    location = describe_failing_node(workflow_json, failing_node, graph) if failing_node else ""
     prompt = f"""
     You are an expert n8n Workflow Doctor.
     
     Here is a BROKEN n8n workflow (JSON) and the error message it produced.
     
     ERROR: "{error_msg}"
-    
+    {location}
     WORKFLOW JSON:
     {json.dumps(workflow_json)}
     
     TASK:
-    1. Identify which node is causing the error.
+    1. Identify which node is causing the error (if a failing node is given, start there and with the nodes feeding it).
     2. Fix the configuration of that node (or add a node if needed).
     3. Return the FULLY CORRECTED workflow JSON.
     4. Provide a very brief explanation of what you fixed.
@@ -89,19 +146,13 @@ def consult_gemini_for_fix(workflow_json: dict, error_msg: str, api_key: str = N
     for model_name in candidates:
         try:
             model = genai.GenerativeModel(model_name)
-            response = model.generate_content(prompt)
-            text = response.text.strip()
-            
-            # Clean up markdown if present
-            if text.startswith("```json"):
-                text = text[7:]
-            if text.endswith("```"):
-                text = text[:-3]
-                
-            result = json.loads(text)
+            with span("gemini.generate_content", model=model_name), GEMINI_REQUEST_SECONDS.time(model=model_name):
+                response = model.generate_content(prompt)
+            result = parse_gemini_response(response.text)
             return True, result["explanation"], result["fixed_workflow"]
             
         except Exception as e:
+            GEMINI_REQUEST_ERRORS.inc(model=model_name)
             last_error = str(e)
             continue
             
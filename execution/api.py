@@ -1,17 +1,30 @@
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from pydantic import BaseModel
-from typing import Optional
+from typing import Dict, Optional
 import os
+import re
+import hmac
+import math
 import requests
 import json
+from contextlib import asynccontextmanager
 from dotenv import load_dotenv
 
 load_dotenv()
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Optionally preload the Gemini SDK once the server is up, so the first AI heal is fast
+    if os.getenv("GEMINI_WARMUP", "0") == "1":
+        from execution.ai_healer import warmup_in_background
+        warmup_in_background()
+    yield
+
+
+app = FastAPI(lifespan=lifespan)
 
 # Enable CORS for development and Render deployment
 app.add_middleware(
@@ -23,7 +36,14 @@ app.add_middleware(
 )
 
 # --- Shared Logic from core_healer ---
-from execution.core_healer import heal_workflow, get_workflow
+from execution.core_healer import heal_workflow, get_workflow, rollback_workflow
+from execution.execution_fetch import describe_missing_error, fetch_execution_failure
+from execution.metrics import INGESTED_FAILURES, record_cache, render_metrics
+from execution.heal_queue import HEAL_QUEUE_DB, HealQueue
+from execution.n8n_client import TenantRateLimited, n8n_request, tenant_wait
+from execution.tracing import load_trace
+from execution.profiler import profile_for, write_profile
+from execution.snapshots import get_store
 
 
 # --- Request Models ---
@@ -39,12 +59,23 @@ class HealRequest(BaseModel):
     n8nUrl: str
     n8nApiKey: str
     geminiApiKey: Optional[str] = None
+    failingNode: Optional[str] = None  # The execution's lastNodeExecuted, if known
 
 class EventsRequest(BaseModel):
     n8nUrl: str
     n8nApiKey: str
 
+class RollbackRequest(BaseModel):
+    snapshotId: int
+    n8nUrl: str
+    n8nApiKey: str
+
 HEAL_LOG_FILE = ".tmp/heal_log.json"
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")  # Required for /api/admin/* endpoints; unset disables them
+API_MAX_PROFILE_SECONDS = float(os.getenv("API_MAX_PROFILE_SECONDS", "30"))  # Longest capture a request may hold a worker thread for
+INGEST_TOKEN = os.getenv("INGEST_TOKEN")  # Required for /api/ingest/failure; unset disables it
+API_TENANT_MAX_WAIT = float(os.getenv("N8N_TENANT_API_MAX_WAIT", "0.5"))  # Queue time before an over-budget call gets 429
+INSTANCE_NAME_RE = re.compile(r"^[A-Za-z0-9_.-]{1,64}$")
 
 def load_heal_log():
     if os.path.exists(HEAL_LOG_FILE):
@@ -57,8 +88,10 @@ workflow_cache = {}
 def get_workflow_name(workflow_id, n8n_url, n8n_key):
     cache_key = f"{n8n_url}:{workflow_id}"
     if cache_key in workflow_cache:
+        record_cache("workflow_name", hit=True)
         return workflow_cache[cache_key]
     
+    record_cache("workflow_name", hit=False)
     workflow = get_workflow(workflow_id, n8n_url, n8n_key)
     if workflow:
         name = workflow.get('name', f"Workflow {workflow_id}")
@@ -66,54 +99,86 @@ def get_workflow_name(workflow_id, n8n_url, n8n_key):
         return name
     return f"Workflow {workflow_id}"
 
-def find_error_recursive(data):
-    if isinstance(data, dict):
-        if 'error' in data:
-            err = data['error']
-            if isinstance(err, dict):
-                 if 'message' in err: return err['message']
-                 if 'stack' in err: return str(err['stack'])[:100]
-            if isinstance(err, str): return err
-        for key, value in data.items():
-            found = find_error_recursive(value)
-            if found: return found
-    elif isinstance(data, list):
-        for item in data:
-            found = find_error_recursive(item)
-            if found: return found
-    return None
-
 def get_real_error_message(execution_id, n8n_url, n8n_key):
-    url = f"{n8n_url}/api/v1/executions/{execution_id}?includeData=true"
-    headers = {"X-N8N-API-KEY": n8n_key}
     try:
-        resp = requests.get(url, headers=headers)
-        if resp.status_code == 200:
-            full_data = resp.json()
-            error = find_error_recursive(full_data)
-            if error: return error
-            if full_data.get('data', {}).get('resultData', {}).get('error'):
-                return str(full_data['data']['resultData']['error'])
-            return "Unknown Error (No message found in logs)"
-        return f"Failed to fetch logs (Status: {resp.status_code})"
+        # Streamed with a size cap: large executions are spilled to disk instead of held in memory
+        result = fetch_execution_failure(n8n_url, n8n_key, execution_id)
+        return result["error"] or describe_missing_error(result)
+    except TenantRateLimited:
+        raise
     except Exception as e:
         return f"Error: {str(e)}"
 
 
+_heal_queue = None
+
+def get_heal_queue():
+    """The agentic healer's durable queue (same HEAL_QUEUE_DB), opened on first ingestion."""
+    global _heal_queue
+    if _heal_queue is None:
+        _heal_queue = HealQueue(HEAL_QUEUE_DB)
+    return _heal_queue
+
+def parse_error_trigger(item: Dict) -> Optional[Dict]:
+    """Turn an n8n Error Trigger item into a heal queue payload.
+
+    Returns None for trigger failures (no execution to heal); raises ValueError for malformed items.
+    """
+    if not isinstance(item, dict):
+        raise ValueError("Each failure must be a JSON object.")
+    execution = item.get("execution")
+    if not execution:
+        if item.get("trigger"):
+            return None
+        raise ValueError("Missing 'execution' (expected the Error Trigger node's output).")
+    workflow = item.get("workflow") or {}
+    execution_id, workflow_id = execution.get("id"), workflow.get("id")
+    if not execution_id or not workflow_id:
+        raise ValueError("Missing execution.id or workflow.id.")
+    error = execution.get("error") or {}
+    return {
+        "execution": {
+            "id": str(execution_id),
+            "workflowId": str(workflow_id),
+            "mode": execution.get("mode"),
+            "lastNodeExecuted": execution.get("lastNodeExecuted"),
+        },
+        "error": error.get("message") if isinstance(error, dict) else str(error),
+        "source": "ingest",
+    }
+
+
 # --- API Endpoints ---
 
+@app.exception_handler(TenantRateLimited)
+async def tenant_rate_limited(request: Request, exc: TenantRateLimited):
+    """A visitor's n8n instance is over its outbound budget: tell the client to back off."""
+    return JSONResponse(status_code=429, content={"detail": str(exc)},
+                        headers={"Retry-After": str(math.ceil(exc.retry_after))})
+
+@app.middleware("http")
+async def short_tenant_wait(request: Request, call_next):
+    """Endpoints share one worker thread pool: refuse an over-budget tenant quickly instead of blocking a thread."""
+    with tenant_wait(API_TENANT_MAX_WAIT):
+        return await call_next(request)
+
 @app.get("/api/health")
 def health_check():
     """Health check for Render and uptime monitors."""
     return {"status": "ok", "service": "HEAS - N8N Self-Annealing System"}
 
 
+@app.get("/api/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Prometheus metrics: heal stage timings, n8n/Gemini call latency and errors, cache hit ratios."""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+
 @app.post("/api/connect")
 def test_connection(req: ConnectRequest):
     """Test if the provided n8n credentials are valid."""
-    headers = {"X-N8N-API-KEY": req.n8nApiKey}
     try:
-        resp = requests.get(f"{req.n8nUrl}/api/v1/workflows?limit=1", headers=headers, timeout=10)
+        resp = n8n_request("GET", req.n8nUrl, req.n8nApiKey, "/workflows", params={"limit": 1})
         if resp.status_code == 200:
             workflows = resp.json().get('data', [])
             return {"status": "connected", "message": f"Connected! Found {len(workflows)}+ workflows."}
@@ -125,7 +190,7 @@ def test_connection(req: ConnectRequest):
         raise HTTPException(status_code=502, detail=f"Could not reach n8n at {req.n8nUrl}. Is the URL correct?")
     except requests.exceptions.Timeout:
         raise HTTPException(status_code=504, detail="Connection to n8n timed out.")
-    except HTTPException:
+    except (HTTPException, TenantRateLimited):
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -134,11 +199,9 @@ def test_connection(req: ConnectRequest):
 @app.post("/api/events")
 def get_events(req: EventsRequest):
     """Fetch workflow executions from the visitor's n8n instance."""
-    headers = {"X-N8N-API-KEY": req.n8nApiKey}
-    url = f"{req.n8nUrl}/api/v1/executions?limit=25&includeData=false"
-
     try:
-        response = requests.get(url, headers=headers, timeout=10)
+        response = n8n_request("GET", req.n8nUrl, req.n8nApiKey, "/executions",
+                               params={"limit": 25, "includeData": "false"})
         if response.status_code != 200:
              raise HTTPException(status_code=500, detail=f"n8n API Error: {response.status_code}")
         
@@ -175,6 +238,8 @@ def get_events(req: EventsRequest):
                 status = "Detected"
                 try:
                     error_msg = get_real_error_message(exec_id, req.n8nUrl, req.n8nApiKey)
+                except TenantRateLimited:
+                    raise
                 except:
                     error_msg = "Execution Stopped/Crashed (Could not fetch details)"
 
@@ -188,7 +253,7 @@ def get_events(req: EventsRequest):
                 "fixAttempted": fix_attempted
             })
         return events
-    except HTTPException:
+    except (HTTPException, TenantRateLimited):
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -201,6 +266,97 @@ def get_heals():
     except Exception as e:
         return []
 
+@app.get("/api/traces/{trace_id}")
+def get_trace(trace_id: str):
+    """Return the spans of one heal (see `trace_id` in /api/heals and /api/heal responses)."""
+    spans = load_trace(trace_id)
+    if not spans:
+        raise HTTPException(status_code=404, detail="Trace not found.")
+    return spans
+
+@app.post("/api/admin/profile", response_class=PlainTextResponse)
+def capture_profile(request: Request, seconds: float = 10, interval_ms: float = 5):
+    """Sample the running server for `seconds` (at most API_MAX_PROFILE_SECONDS) and return a folded-stack profile."""
+    token = request.headers.get("X-Admin-Token") or ""
+    if not ADMIN_TOKEN or not hmac.compare_digest(token.encode(), ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="Admin token required.")
+    try:
+        folded = profile_for(min(seconds, API_MAX_PROFILE_SECONDS), interval_ms / 1000.0)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    path = write_profile(folded, "api")
+    return PlainTextResponse(folded, headers={"X-Profile-Path": path})
+
+@app.post("/api/snapshots/{workflow_id}")
+def list_snapshots(workflow_id: str, req: EventsRequest):
+    """Stored versions of a workflow on the caller's n8n instance (metadata only), newest first.
+
+    The caller's key must be able to read the workflow on that instance.
+    """
+    try:
+        resp = n8n_request("GET", req.n8nUrl, req.n8nApiKey, f"/workflows/{workflow_id}")
+    except requests.exceptions.RequestException:
+        raise HTTPException(status_code=502, detail=f"Could not reach n8n at {req.n8nUrl}.")
+    if resp.status_code in (401, 403):
+        raise HTTPException(status_code=401, detail="Invalid API key.")
+    if resp.status_code == 404:
+        raise HTTPException(status_code=404, detail="Workflow not found.")
+    if resp.status_code != 200:
+        raise HTTPException(status_code=502, detail=f"n8n returned status {resp.status_code}")
+    return get_store().list(n8n_url=req.n8nUrl, workflow_id=workflow_id)
+
+@app.post("/api/rollback")
+def rollback(req: RollbackRequest):
+    """Restore a workflow to a stored snapshot with a single PUT to the caller's n8n instance."""
+    try:
+        success, message = rollback_workflow(req.snapshotId, req.n8nUrl, req.n8nApiKey)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not success:
+        status_code = 404 if message.startswith("No snapshot") or "different n8n instance" in message else 502
+        raise HTTPException(status_code=status_code, detail=message)
+    return {"status": "rolled_back", "message": message}
+
+@app.post("/api/ingest/failure", status_code=202)
+async def ingest_failure(request: Request, instance: str = "default"):
+    """Queue failures posted by an n8n Error Trigger workflow for the agentic healer.
+
+    Authenticate with `Authorization: Bearer <INGEST_TOKEN>` (or `X-Ingest-Token`). The body is the Error
+    Trigger output (one object or a list). `instance` selects the fleet instance the failure came from.
+    """
+    if not INGEST_TOKEN:
+        raise HTTPException(status_code=403, detail="Ingestion is disabled (set INGEST_TOKEN).")
+    token = request.headers.get("X-Ingest-Token") or request.headers.get("Authorization", "").removeprefix("Bearer ").strip()
+    if not hmac.compare_digest(token.encode(), INGEST_TOKEN.encode()):
+        INGESTED_FAILURES.inc(result="unauthorized")
+        raise HTTPException(status_code=401, detail="Invalid ingest token.")
+    if not INSTANCE_NAME_RE.match(instance):
+        raise HTTPException(status_code=400, detail="Invalid instance name.")
+    try:
+        body = await request.json()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Body must be JSON.")
+
+    # Validate the whole batch before queueing any of it
+    try:
+        payloads = [parse_error_trigger(item) for item in (body if isinstance(body, list) else [body])]
+    except ValueError as e:
+        INGESTED_FAILURES.inc(result="invalid")
+        raise HTTPException(status_code=422, detail=str(e))
+
+    results = []
+    for payload in payloads:
+        if payload is None:
+            result = {"status": "ignored", "reason": "trigger failure (no execution to heal)"}
+        else:
+            execution_id = payload["execution"]["id"]
+            # Same key as the poller uses, so a pushed failure is never queued twice
+            queued = get_heal_queue().enqueue(f"{instance}:{execution_id}", payload, queue=instance)
+            result = {"status": "queued" if queued else "duplicate", "executionId": execution_id}
+        INGESTED_FAILURES.inc(result=result["status"])
+        results.append(result)
+    return results if isinstance(body, list) else results[0]
+
 @app.post("/api/heal")
 def heal_event(request: HealRequest):
     """Heal a workflow using the visitor's n8n credentials + visitor's Gemini key."""
@@ -211,26 +367,27 @@ def heal_event(request: HealRequest):
             request.error,
             request.n8nUrl,
             request.n8nApiKey,
-            request.geminiApiKey
+            request.geminiApiKey,
+            failing_node=request.failingNode
         )
         return result
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
+    except TenantRateLimited:
+        raise
     except Exception as e:
         return {"status": "explained", "message": f"Error during healing: {str(e)}"}
 
 
 # --- Static File Serving (for Render monolith) ---
-# Mount the Next.js static export if it exists (production build)
+# Mount the Next.js static export if it exists (production build).
+# Files are indexed and gzip/brotli-compressed once at startup, then served from memory
+# with Accept-Encoding negotiation and immutable caching for hashed bundles.
+from execution.static_server import PrecompressedStaticFiles
+
 STATIC_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "static_dashboard")
 if os.path.isdir(STATIC_DIR):
-    # Serve index.html at root
-    @app.get("/")
-    async def serve_root():
-        return FileResponse(os.path.join(STATIC_DIR, "index.html"))
-    
-    # Serve static files for everything else
-    app.mount("/", StaticFiles(directory=STATIC_DIR, html=True), name="static")
+    app.mount("/", PrecompressedStaticFiles(STATIC_DIR), name="static")
 
 
 if __name__ == "__main__":
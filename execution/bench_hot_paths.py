@@ -0,0 +1,186 @@
+"""
+Microbenchmarks for the CPU hot spots of the healer, on synthetic worst-case fixtures.
+
+Covers error extraction from deeply nested / very wide execution payloads (`find_error_recursive`),
+JavaScript fixing of a 10k-line Code node (`fix_javascript_syntax`), Code-node fixing across a
+500-node workflow (`fix_code_nodes`), error classification (`classify_error`) and Gemini response
+parsing (`parse_gemini_response`). Records median time and peak memory per function and compares
+against a stored baseline.
+
+Usage:
+    python execution/bench_hot_paths.py                    # report
+    python execution/bench_hot_paths.py --save-baseline    # store .tmp/hot_paths_baseline.json
+    python execution/bench_hot_paths.py --compare          # exit 1 on >25% time or memory regressions
+"""
+
+import copy
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from execution.core_healer import classify_error, find_error_recursive, fix_code_nodes, fix_javascript_syntax
+from execution.ai_healer import parse_gemini_response
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_FILE = os.path.join(REPO_ROOT, ".tmp", "hot_paths_baseline.json")
+REPEATS = int(os.getenv("BENCH_REPEATS", "7"))
+REGRESSION_THRESHOLD = 0.25
+
+
+# --- Synthetic fixtures ---
+
+def nested_execution(depth: int = 250) -> dict:
+    """An execution whose error sits at the bottom of a deep chain of nested objects and lists."""
+    node = {"error": {"message": "Cannot read properties of undefined (reading 'id')"}}
+    for level in range(depth):
+        node = {"json": {"level": level, "child": [node]}} if level % 2 else {"items": [{"meta": level}, node]}
+    return {"id": "1", "data": {"resultData": {"runData": {"Deep": [node]}}}}
+
+
+def wide_execution(nodes: int = 200, items: int = 200) -> dict:
+    """A wide execution (40k items across 200 nodes) whose only error is in the last node's run."""
+    run_data = {
+        f"Node {n}": [{"data": {"main": [[{"json": {"row": i, "email": f"user{i}@example.com", "tags": ["a", "b"]}}
+                                          for i in range(items)]]}}]
+        for n in range(nodes)
+    }
+    run_data[f"Node {nodes}"] = [{"error": {"message": "Request failed with status code 500"}}]
+    return {"id": "2", "data": {"resultData": {"runData": run_data}}}
+
+
+def big_code(lines: int = 10000) -> str:
+    """A 10k-line Code node with a sprinkling of the typos fix_javascript_syntax repairs."""
+    body = []
+    for i in range(lines):
+        if i % 50 == 0:
+            body.append(f"const v{i} = items[{i % 7}].json]name;;")
+        elif i % 37 == 0:
+            body.append(f"const s{i} = 'unterminated string")
+        elif i % 29 == 0:
+            body.append("const all = $input.ll();")
+        else:
+            body.append(f"const x{i} = items.map(item => item.json.value * {i});")
+    return "\n".join(body)
+
+
+def big_workflow(nodes: int = 500) -> dict:
+    """A 500-node workflow where every fifth node is a small broken Code node."""
+    result = []
+    for n in range(nodes):
+        if n % 5 == 0:
+            result.append({"name": f"Code {n}", "type": "n8n-nodes-base.code",
+                           "parameters": {"jsCode": "const a = $input.ll();;\nreturn a.map(x => x.json]id);"}})
+        else:
+            result.append({"name": f"HTTP {n}", "type": "n8n-nodes-base.httpRequest",
+                           "parameters": {"url": f"https://api.example.com/{n}", "options": {}}})
+    connections = {result[i]["name"]: {"main": [[{"node": result[i + 1]["name"], "type": "main", "index": 0}]]}
+                   for i in range(nodes - 1)}
+    return {"name": "Big Workflow", "nodes": result, "connections": connections, "settings": {}}
+
+
+ERROR_CORPUS = [
+    "SyntaxError: Unexpected token ']' in JSON at position 12",
+    "connect ECONNREFUSED 127.0.0.1:5432",
+    "429 Too Many Requests",
+    "401 Unauthorized",
+    "Cannot read properties of undefined (reading 'email')",
+    "The resource you are requesting could not be found",
+    "ReferenceError: nonExistentVar is not defined",
+    "socket hang up (timeout after 30000ms)",
+] * 250
+
+
+# --- Harness ---
+
+def measure(fn, setup=None, repeats: int = REPEATS) -> dict:
+    """Median wall time over `repeats` runs, then peak traced memory of one extra run."""
+    times = []
+    for _ in range(repeats):
+        arg = setup() if setup else None
+        start = time.perf_counter()
+        fn(arg)
+        times.append(time.perf_counter() - start)
+
+    arg = setup() if setup else None
+    tracemalloc.start()
+    fn(arg)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"median_ms": round(statistics.median(times) * 1000, 3), "peak_kb": round(peak / 1024, 1)}
+
+
+def build_cases() -> dict:
+    nested = nested_execution()
+    wide = wide_execution()
+    code = big_code()
+    workflow = big_workflow()
+    gemini_reply = "```json\n" + json.dumps({"explanation": "Fixed", "fixed_workflow": workflow}) + "\n```"
+
+    return {
+        "find_error_recursive[nested]": (lambda _: find_error_recursive(nested), None),
+        "find_error_recursive[wide]": (lambda _: find_error_recursive(wide), None),
+        "fix_javascript_syntax[10k_lines]": (lambda _: fix_javascript_syntax(code), None),
+        "fix_code_nodes[500_nodes]": (lambda wf: fix_code_nodes(wf["nodes"]), lambda: copy.deepcopy(workflow)),
+        "classify_error[2k_messages]": (lambda _: [classify_error(m) for m in ERROR_CORPUS], None),
+        "parse_gemini_response[500_nodes]": (lambda _: parse_gemini_response(gemini_reply), None),
+    }
+
+
+def compare(results: dict, baseline: dict) -> list:
+    """Return human-readable regressions beyond the threshold."""
+    regressions = []
+    for name, data in results.items():
+        before = baseline.get(name)
+        if not before:
+            continue
+        for metric in ("median_ms", "peak_kb"):
+            if before[metric] and data[metric] > before[metric] * (1 + REGRESSION_THRESHOLD):
+                regressions.append(f"{name} {metric}: {before[metric]} -> {data[metric]}")
+    return regressions
+
+
+def main():
+    baseline = None
+    if os.path.exists(BASELINE_FILE):
+        with open(BASELINE_FILE, "r") as f:
+            baseline = json.load(f)
+
+    print("=" * 60)
+    print(f"   Hot path microbenchmarks (median of {REPEATS})")
+    print("=" * 60)
+    results = {}
+    for name, (fn, setup) in build_cases().items():
+        results[name] = measure(fn, setup)
+        line = f"{name:<36} {results[name]['median_ms']:>10.3f} ms {results[name]['peak_kb']:>10.1f} KB peak"
+        if baseline and name in baseline:
+            before = baseline[name]["median_ms"]
+            if before:
+                line += f"   ({((results[name]['median_ms'] - before) / before) * 100:+.0f}% time)"
+        print(line)
+
+    if "--save-baseline" in sys.argv:
+        os.makedirs(os.path.dirname(BASELINE_FILE), exist_ok=True)
+        with open(BASELINE_FILE, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n💾 Baseline saved to {BASELINE_FILE}")
+
+    if "--compare" in sys.argv:
+        if not baseline:
+            print("\n⚠️  No baseline found. Run with --save-baseline first.")
+            sys.exit(1)
+        regressions = compare(results, baseline)
+        if regressions:
+            print("\n❌ Regressions:")
+            for regression in regressions:
+                print(f"   - {regression}")
+            sys.exit(1)
+        print("\n✅ No regressions.")
+
+
+if __name__ == "__main__":
+    main()
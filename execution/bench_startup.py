@@ -0,0 +1,146 @@
+"""
+Cold-start benchmark for the API, MCP server and agentic healer.
+
+Each target is imported in a fresh interpreter with `python -X importtime`, so the numbers reflect what
+a Render cold start or an editor launching the stdio MCP server actually pays. Reports wall time per
+target plus the most expensive modules by cumulative import time, and can save/compare a JSON baseline.
+
+Usage:
+    python execution/bench_startup.py                    # report
+    python execution/bench_startup.py --save-baseline    # store .tmp/startup_baseline.json
+    python execution/bench_startup.py --compare          # fail (exit 1) on >20% regressions
+"""
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_FILE = os.path.join(REPO_ROOT, ".tmp", "startup_baseline.json")
+RUNS = int(os.getenv("BENCH_STARTUP_RUNS", "5"))
+TOP_MODULES = 8
+REGRESSION_THRESHOLD = 0.20  # Fail --compare if a target gets 20% slower
+
+TARGETS = {
+    "api": "import execution.api",
+    "mcp_server": "import execution.mcp_server",
+    "agentic_healer": "import execution.agentic_healer",
+    "core_healer": "import execution.core_healer",
+    # What the first AI escalation pays when there was no background warmup
+    "gemini_first_escalation": "import execution.ai_healer as a; a.get_genai()",
+}
+
+
+def parse_importtime(stderr: str) -> dict:
+    """Parse `-X importtime` output into {module: cumulative_microseconds}."""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        # Format: "import time:   <self us> | <cumulative us> | <indented module name>"
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3:
+            continue
+        try:
+            modules[parts[2].strip()] = int(parts[1])
+        except ValueError:
+            continue
+    return modules
+
+
+def run_target(code: str) -> tuple:
+    """Import a target in a fresh interpreter; return (wall_seconds, {module: cumulative_us})."""
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=REPO_ROOT,
+        capture_output=True,
+        text=True,
+    )
+    wall = time.perf_counter() - start
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr else "import failed")
+    return wall, parse_importtime(proc.stderr)
+
+
+def benchmark(runs: int = RUNS) -> dict:
+    """Run every target `runs` times and return median wall time and per-module import cost."""
+    results = {}
+    for name, code in TARGETS.items():
+        walls = []
+        module_samples = {}
+        try:
+            for _ in range(runs):
+                wall, modules = run_target(code)
+                walls.append(wall)
+                for module, cost in modules.items():
+                    module_samples.setdefault(module, []).append(cost)
+        except RuntimeError as e:
+            print(f"⚠️  {name}: {e}")
+            continue
+
+        top_level = {m: statistics.median(v) / 1000 for m, v in module_samples.items() if "." not in m}
+        results[name] = {
+            "wall_ms": round(statistics.median(walls) * 1000, 1),
+            "top_modules_ms": dict(sorted(
+                ((m, round(v, 1)) for m, v in top_level.items()), key=lambda kv: kv[1], reverse=True
+            )[:TOP_MODULES]),
+        }
+    return results
+
+
+def print_report(results: dict, baseline: dict = None):
+    print("=" * 60)
+    print(f"   Startup benchmark (median of {RUNS} cold imports)")
+    print("=" * 60)
+    for name, data in results.items():
+        line = f"{name:<26} {data['wall_ms']:>8.1f} ms"
+        if baseline and name in baseline:
+            before = baseline[name]["wall_ms"]
+            line += f"   (baseline {before:.1f} ms, {((data['wall_ms'] - before) / before) * 100:+.0f}%)"
+        print(line)
+        for module, cost in data["top_modules_ms"].items():
+            print(f"    {module:<30} {cost:>8.1f} ms")
+
+
+def compare(results: dict, baseline: dict) -> list:
+    """Return the names of targets that regressed beyond the threshold."""
+    regressions = []
+    for name, data in results.items():
+        before = baseline.get(name, {}).get("wall_ms")
+        if before and data["wall_ms"] > before * (1 + REGRESSION_THRESHOLD):
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    baseline = None
+    if os.path.exists(BASELINE_FILE):
+        with open(BASELINE_FILE, "r") as f:
+            baseline = json.load(f)
+
+    results = benchmark()
+    print_report(results, baseline)
+
+    if "--save-baseline" in sys.argv:
+        os.makedirs(os.path.dirname(BASELINE_FILE), exist_ok=True)
+        with open(BASELINE_FILE, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n💾 Baseline saved to {BASELINE_FILE}")
+
+    if "--compare" in sys.argv:
+        if not baseline:
+            print("\n⚠️  No baseline found. Run with --save-baseline first.")
+            sys.exit(1)
+        regressions = compare(results, baseline)
+        if regressions:
+            print(f"\n❌ Startup regressions: {', '.join(regressions)}")
+            sys.exit(1)
+        print("\n✅ No startup regressions.")
+
+
+if __name__ == "__main__":
+    main()
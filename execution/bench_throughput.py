@@ -0,0 +1,224 @@
+"""
+End-to-end throughput benchmark against a local fake n8n (no live instance or Gemini key needed).
+
+Scenarios:
+    monitor  - one `monitor_and_heal()` cycle over every failed execution on the fake instance
+    events   - repeated POST /api/events (the dashboard's polling call)
+    heal     - POST /api/heal for a sample of failures
+
+Reports executions/sec, heal latency p50/p95/p99 and upstream call counts per n8n endpoint and Gemini model.
+
+Usage:
+    python execution/bench_throughput.py --executions 500 --failure-rate 0.3 --latency-ms 5 --gemini-ms 200
+    python execution/bench_throughput.py --scenario monitor --json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from execution.fake_n8n import FakeN8n, install_fake_gemini
+
+
+STATE_FILES = {  # Everything a heal persists; the benchmark must not touch the real .tmp/ state
+    "SNAPSHOT_DB": "snapshots.db",
+    "TRACE_FILE": "traces.jsonl",
+    "FIX_MEMORY_FILE": "fix_memory.json",
+    "FIXABILITY_MODEL_FILE": "fixability_model.json",
+    "HEAL_QUEUE_DB": "heal_queue.db",
+    "LINT_CACHE_FILE": "lint_cache.json",
+    "PROFILE_DIR": "profiles",
+}
+
+
+def isolate_state() -> str:
+    """Point every state file at a fresh temp directory. Call before the healer modules are imported."""
+    directory = tempfile.mkdtemp(prefix="heas-bench-")
+    for name, filename in STATE_FILES.items():
+        os.environ[name] = os.path.join(directory, filename)
+    return directory
+
+
+def percentile(values, p: float) -> float:
+    """Nearest-rank percentile of a list of numbers (0 for an empty list)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(p / 100.0 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def latency_summary(seconds) -> dict:
+    ms = [s * 1000 for s in seconds]
+    return {"count": len(ms), "p50_ms": round(percentile(ms, 50), 2), "p95_ms": round(percentile(ms, 95), 2),
+            "p99_ms": round(percentile(ms, 99), 2)}
+
+
+def bench_monitor(fake: FakeN8n, gemini) -> dict:
+    """Time one full detection + healing cycle of the agentic healer."""
+    from execution import agentic_healer
+
+    agentic_healer.N8N_URL, agentic_healer.N8N_KEY = fake.base_url, fake.api_key
+    agentic_healer.MONITOR_INTERVAL = 0
+    agentic_healer.POLL_LIMIT = len(fake.executions)
+    agentic_healer.PROCESSED_EXECUTIONS.clear()
+    agentic_healer.HEAL_LOG_FILE = os.path.join(tempfile.mkdtemp(), "heal_log.json")
+    agentic_healer.HEAL_QUEUE_DB = os.path.join(tempfile.mkdtemp(), "heal_queue.db")
+    agentic_healer._queue = None
+    agentic_healer._breaker = None
+
+    heal_times = []
+    original_heal = agentic_healer.heal_workflow
+
+    def timed_heal(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return original_heal(*args, **kwargs)
+        finally:
+            heal_times.append(time.perf_counter() - start)
+
+    agentic_healer.heal_workflow = timed_heal
+    fake.reset_calls()
+    gemini.calls.clear()
+    try:
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            agentic_healer.monitor_and_heal(max_cycles=1)
+        wall = time.perf_counter() - start
+    finally:
+        agentic_healer.heal_workflow = original_heal
+
+    return {
+        "failures_healed": len(heal_times),
+        "wall_s": round(wall, 3),
+        "executions_per_s": round(len(heal_times) / wall, 2) if wall else 0.0,
+        "heal_latency": latency_summary(heal_times),
+        "n8n_calls": dict(fake.calls),
+        "gemini_calls": dict(gemini.calls),
+    }
+
+
+def bench_events(fake: FakeN8n, gemini, requests_count: int) -> dict:
+    """Time the dashboard's /api/events polling call."""
+    from fastapi.testclient import TestClient
+    from execution.api import app, workflow_cache
+
+    workflow_cache.clear()
+    client = TestClient(app)
+    payload = {"n8nUrl": fake.base_url, "n8nApiKey": fake.api_key}
+    fake.reset_calls()
+    times = []
+    start = time.perf_counter()
+    for _ in range(requests_count):
+        t0 = time.perf_counter()
+        resp = client.post("/api/events", json=payload)
+        times.append(time.perf_counter() - t0)
+        resp.raise_for_status()
+    wall = time.perf_counter() - start
+    return {
+        "requests": requests_count,
+        "requests_per_s": round(requests_count / wall, 2) if wall else 0.0,
+        "latency": latency_summary(times),
+        "n8n_calls": dict(fake.calls),
+    }
+
+
+def bench_heal(fake: FakeN8n, gemini, heals: int) -> dict:
+    """Time POST /api/heal for the first `heals` failures on the fake instance."""
+    from fastapi.testclient import TestClient
+    from execution.api import app
+    from execution.fake_n8n import ERROR_TEMPLATES
+
+    client = TestClient(app)
+    failures = [e for e in fake.executions if e["status"] == "error"][:heals]
+    fake.reset_calls()
+    gemini.calls.clear()
+    times = []
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for exc in failures:
+            t0 = time.perf_counter()
+            resp = client.post("/api/heal", json={
+                "executionId": exc["id"], "workflowId": exc["workflowId"],
+                "error": ERROR_TEMPLATES[exc["_error_kind"]],
+                "n8nUrl": fake.base_url, "n8nApiKey": fake.api_key, "geminiApiKey": "fake-gemini-key",
+            })
+            times.append(time.perf_counter() - t0)
+            resp.raise_for_status()
+    wall = time.perf_counter() - start
+    return {
+        "heals": len(failures),
+        "heals_per_s": round(len(failures) / wall, 2) if wall else 0.0,
+        "heal_latency": latency_summary(times),
+        "n8n_calls": dict(fake.calls),
+        "gemini_calls": dict(gemini.calls),
+    }
+
+
+def print_report(results: dict):
+    print("=" * 60)
+    print("   Throughput benchmark (fake n8n + stubbed Gemini)")
+    print("=" * 60)
+    for scenario, data in results.items():
+        print(f"\n▶ {scenario}")
+        for key, value in data.items():
+            if isinstance(value, dict):
+                print(f"   {key}:")
+                for sub_key, sub_value in sorted(value.items()):
+                    print(f"      {sub_key:<32} {sub_value}")
+            else:
+                print(f"   {key:<35} {value}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenario", choices=["all", "monitor", "events", "heal"], default="all")
+    parser.add_argument("--executions", type=int, default=200)
+    parser.add_argument("--failure-rate", type=float, default=0.3)
+    parser.add_argument("--workflows", type=int, default=20)
+    parser.add_argument("--nodes", type=int, default=10, help="Nodes per workflow")
+    parser.add_argument("--payload-kb", type=int, default=4, help="Execution detail size")
+    parser.add_argument("--latency-ms", type=float, default=5, help="Fake n8n latency per request")
+    parser.add_argument("--gemini-ms", type=float, default=200, help="Stubbed Gemini latency per call")
+    parser.add_argument("--gemini-success", type=float, default=1.0)
+    parser.add_argument("--requests", type=int, default=20, help="/api/events requests")
+    parser.add_argument("--heals", type=int, default=20, help="/api/heal requests")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    isolate_state()
+    fake = FakeN8n(executions=args.executions, failure_rate=args.failure_rate, workflows=args.workflows,
+                   nodes_per_workflow=args.nodes, payload_kb=args.payload_kb, latency_ms=args.latency_ms).start()
+    # Credentials must be in place before the healer modules read them at import time
+    os.environ["N8N_API_URL"], os.environ["N8N_API_KEY"] = fake.base_url, fake.api_key
+    gemini = install_fake_gemini(args.gemini_ms, args.gemini_success)
+    # Measure the code paths, not the per-tenant outbound budget
+    from execution.n8n_client import configure_limits
+    configure_limits(fake.base_url, max_in_flight=0, rate=0)
+
+    results = {}
+    try:
+        if args.scenario in ("all", "events"):
+            results["api_events"] = bench_events(fake, gemini, args.requests)
+        if args.scenario in ("all", "heal"):
+            results["api_heal"] = bench_heal(fake, gemini, args.heals)
+        if args.scenario in ("all", "monitor"):
+            results["monitor_and_heal"] = bench_monitor(fake, gemini)
+    finally:
+        fake.stop()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_report(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,26 +1,59 @@
+import copy
 import os
 import json
-import requests
 import re
+from contextlib import contextmanager
 from typing import Dict, List, Optional, Tuple
 from dotenv import load_dotenv
 
-# Import AI healing logic
+# Import AI healing logic (cheap: the Gemini SDK itself is loaded lazily on first escalation)
 try:
     from execution.ai_healer import consult_gemini_for_fix
+    from execution.fix_memory import apply_changes, diff_workflows, record_replay_outcome, remember_fix, replay_fix
+    from execution.fixability import should_escalate
+    from execution.metrics import GEMINI_ESCALATIONS, HEAL_STAGE_SECONDS, HEALS_TOTAL, record_cache
+    from execution.n8n_client import N8nApiError, TenantRateLimited, n8n_request
+    from execution.snapshots import get_store
+    from execution.tracing import span
+    from execution.workflow_graph import graph_for
 except ImportError:
     # Handle direct execution or relative import issues
     import sys
     sys.path.append(os.path.dirname(os.path.abspath(__file__)))
     from ai_healer import consult_gemini_for_fix
+    from fix_memory import apply_changes, diff_workflows, record_replay_outcome, remember_fix, replay_fix
+    from fixability import should_escalate
+    from metrics import GEMINI_ESCALATIONS, HEAL_STAGE_SECONDS, HEALS_TOTAL, record_cache
+    from n8n_client import N8nApiError, TenantRateLimited, n8n_request
+    from snapshots import get_store
+    from tracing import span
+    from workflow_graph import graph_for
 
 load_dotenv()
 
+# Error classes the deterministic layer knows how to handle (checked in this order)
+ERROR_PATTERNS = {
+    "syntax": ["json", "parse", "syntax", "unexpected token", "is not a function", "not defined"],
+    "rate_limit": ["rate limit", "429", "quota exceeded", "too many requests"],
+    "auth": ["401", "unauthorized", "invalid credentials", "forbidden", "403"],
+    "network": ["connection refused", "timeout", "econnreset", "network error", "bad gateway", "service unavailable"],
+}
+
+MAX_REBASES = 3  # Refetch-and-rebase attempts when the workflow keeps changing under a heal
+CODE_NODE_TYPE = "n8n-nodes-base.code"
+
 # Fallback globals for backward compatibility (agentic_healer, MCP server, etc.)
 _DEFAULT_N8N_URL = os.getenv("N8N_API_URL")
 _DEFAULT_N8N_KEY = os.getenv("N8N_API_KEY")
 
 
+@contextmanager
+def _stage(name: str, **attributes):
+    """Time a heal stage both as a trace span and in the HEAL_STAGE_SECONDS histogram."""
+    with span(f"heal.{name}", **attributes) as record, HEAL_STAGE_SECONDS.time(stage=name):
+        yield record
+
+
 def _resolve_creds(n8n_url: Optional[str] = None, n8n_key: Optional[str] = None) -> Tuple[str, str]:
     """Resolve n8n credentials: use provided ones or fall back to env vars."""
     url = n8n_url or _DEFAULT_N8N_URL
@@ -30,15 +63,83 @@ def _resolve_creds(n8n_url: Optional[str] = None, n8n_key: Optional[str] = None)
     return url, key
 
 
+def find_error_recursive(data):
+    """Recursively search execution data for the first 'error' object with a message."""
+    if isinstance(data, dict):
+        if 'error' in data:
+            err = data['error']
+            if isinstance(err, dict):
+                 if 'message' in err: return err['message']
+                 if 'stack' in err: return str(err['stack'])[:100]
+            if isinstance(err, str): return err
+        for key, value in data.items():
+            found = find_error_recursive(value)
+            if found: return found
+    elif isinstance(data, list):
+        for item in data:
+            found = find_error_recursive(item)
+            if found: return found
+    return None
+
+
+def find_failing_node(data) -> Optional[str]:
+    """Name of the node an execution failed in: n8n's lastNodeExecuted, else the first node with an error in runData."""
+    result = ((data or {}).get('data') or {}).get('resultData') or {}
+    if result.get('lastNodeExecuted'):
+        return result['lastNodeExecuted']
+    for name, runs in (result.get('runData') or {}).items():
+        if any(isinstance(run, dict) and run.get('error') for run in runs or []):
+            return name
+    return None
+
+
+def is_failed_execution(execution: Dict) -> bool:
+    """True for executions that ended in an error (running/waiting ones are not failures)."""
+    status = execution.get('status')
+    if status:
+        return status in ("error", "crashed")
+    # Older n8n versions have no status field: unfinished *and* stopped means it failed
+    return not execution.get('finished', False) and execution.get('stoppedAt') is not None
+
+
+def list_failed_executions(limit: int = 50, n8n_url: str = None, n8n_key: str = None, known_ids=None) -> List[Dict]:
+    """Collect up to `limit` failed executions (newest first) using n8n's server-side status filter.
+
+    Pages through results until enough failures are found, or until a page contains only ids in
+    `known_ids` (everything older has already been processed).
+    """
+    url, key = _resolve_creds(n8n_url, n8n_key)
+    params = {"status": "error", "limit": min(limit, 250), "includeData": "false"}
+    known_ids = known_ids or set()
+    failed = []
+
+    while len(failed) < limit:
+        resp = n8n_request("GET", url, key, "/executions", params=params)
+        if resp.status_code != 200:
+            if not failed:
+                raise N8nApiError.from_response("Failed to fetch executions", resp)
+            break
+        body = resp.json()
+        page = body.get('data', [])
+        failed.extend(e for e in page if is_failed_execution(e))
+
+        cursor = body.get('nextCursor')
+        if not cursor or not page or all(e.get('id') in known_ids for e in page):
+            break
+        params = {**params, "cursor": cursor}
+
+    return failed[:limit]
+
+
 def get_workflow(workflow_id: str, n8n_url: str = None, n8n_key: str = None) -> Optional[Dict]:
     """Fetch full workflow JSON from n8n"""
     url, key = _resolve_creds(n8n_url, n8n_key)
-    endpoint = f"{url}/api/v1/workflows/{workflow_id}"
-    headers = {"X-N8N-API-KEY": key}
     try:
-        resp = requests.get(endpoint, headers=headers, timeout=10)
+        resp = n8n_request("GET", url, key, f"/workflows/{workflow_id}")
         if resp.status_code == 200:
             return resp.json()
+    except TenantRateLimited:
+        raise
     except Exception as e:
         print(f"Error fetching workflow {workflow_id}: {e}")
     return None
@@ -46,10 +147,9 @@ def get_workflow(workflow_id: str, n8n_url: str = None, n8n_key: str = None) ->
 def update_workflow(workflow_id: str, workflow_data: Dict, n8n_url: str = None, n8n_key: str = None) -> Tuple[bool, str]:
     """Update workflow in n8n"""
     url, key = _resolve_creds(n8n_url, n8n_key)
-    endpoint = f"{url}/api/v1/workflows/{workflow_id}"
-    headers = {"X-N8N-API-KEY": key, "Content-Type": "application/json"}
     try:
-        resp = requests.put(endpoint, headers=headers, json=workflow_data, timeout=10)
+        with _stage("update", workflow_id=workflow_id):
+            resp = n8n_request("PUT", url, key, f"/workflows/{workflow_id}", json=workflow_data)
         if resp.status_code in [200, 201]:
             return True, "Updated successfully"
         return False, f"Failed (Status {resp.status_code}): {resp.text}"
@@ -59,14 +159,159 @@ def update_workflow(workflow_id: str, workflow_data: Dict, n8n_url: str = None,
 def publish_workflow(workflow_id: str, n8n_url: str = None, n8n_key: str = None) -> bool:
     """Explicitly publish/activate workflow"""
     url, key = _resolve_creds(n8n_url, n8n_key)
-    endpoint = f"{url}/api/v1/workflows/{workflow_id}/activate"
-    headers = {"X-N8N-API-KEY": key}
     try:
-        resp = requests.post(endpoint, headers=headers, timeout=10)
+        with _stage("publish", workflow_id=workflow_id):
+            resp = n8n_request("POST", url, key, f"/workflows/{workflow_id}/activate")
         return resp.status_code in [200, 201]
     except:
         return False
 
+def _update_payload(workflow: Dict) -> Dict:
+    """The fields n8n accepts on PUT /workflows/{id}."""
+    return {
+        "nodes": workflow.get('nodes', []),
+        "connections": workflow.get('connections', {}),
+        "settings": workflow.get('settings', {}),
+        "name": workflow.get('name')
+    }
+
+def _canonical(payload: Dict) -> str:
+    """Order-insensitive JSON of an update payload, so reordered nodes don't count as a change."""
+    nodes = sorted(payload.get("nodes", []), key=lambda node: (node.get("name") or "", node.get("id") or ""))
+    return json.dumps({**payload, "nodes": nodes}, sort_keys=True, default=str)
+
+def matches_snapshot(workflow: Dict, snapshot_workflow: Dict) -> bool:
+    """True if a fetched workflow's nodes and connections are still the ones a snapshot stored."""
+    def structure(w):
+        return {"nodes": w.get("nodes", []), "connections": w.get("connections", {})}
+    return _canonical(structure(workflow)) == _canonical(structure(snapshot_workflow))
+
+def _version(workflow: Dict) -> Optional[str]:
+    return workflow.get("versionId") or workflow.get("updatedAt")
+
+def _merge_value(base, ours, theirs) -> Tuple[bool, object]:
+    """Three-way merge of one value: take our change unless they changed it differently."""
+    if ours == base or ours == theirs:
+        return True, theirs
+    if theirs == base:
+        return True, copy.deepcopy(ours)
+    return False, theirs
+
+def rebase_update(base: Dict, update: Dict, current: Dict) -> Optional[Dict]:
+    """Re-apply the changes `update` made to `base` on top of `current` (edited in n8n meanwhile).
+
+    Node parameters are patched with the fix memory's clean-apply rules (a Code node fix survives
+    unrelated edits elsewhere in the same script); anything else must not have been changed by both
+    sides. Returns the rebased PUT payload, or None on conflict.
+    """
+    rebased = copy.deepcopy(_update_payload(current))
+    base_payload, our_payload = _update_payload(base), _update_payload(update)
+    for field in ("connections", "settings", "name"):
+        ok, rebased[field] = _merge_value(base_payload[field], our_payload[field], rebased[field])
+        if not ok:
+            return None
+
+    base_nodes = {node.get("name"): node for node in base.get("nodes", [])}
+    our_nodes = {node.get("name"): node for node in update.get("nodes", [])}
+    current_nodes = {node.get("name"): node for node in rebased["nodes"]}
+    patches = {patch["node"]: patch["changes"] for patch in diff_workflows(base, update)}
+
+    for name, old in base_nodes.items():
+        if name not in our_nodes and name in current_nodes:  # We removed it
+            if current_nodes[name] != old:
+                return None
+            del current_nodes[name]
+    for name, ours in our_nodes.items():
+        theirs = current_nodes.get(name)
+        old = base_nodes.get(name)
+        if old is None:  # We added it
+            if theirs is None:
+                current_nodes[name] = copy.deepcopy(ours)
+            elif theirs != ours:
+                return None
+            continue
+        if theirs is None:  # They removed it; fine unless we changed it
+            if ours != old:
+                return None
+            continue
+        merged = dict(theirs)
+        for field in (set(old) | set(ours) | set(theirs)) - {"parameters"}:
+            ok, value = _merge_value(old.get(field), ours.get(field), theirs.get(field))
+            if not ok:
+                return None
+            if value is None and (field not in theirs or field not in ours):
+                merged.pop(field, None)
+            else:
+                merged[field] = value
+        if name in patches and theirs.get("parameters") != ours.get("parameters"):
+            params = apply_changes(theirs.get("parameters", {}), patches[name])
+            if params is None:
+                return None
+            merged["parameters"] = params
+        current_nodes[name] = merged
+    rebased["nodes"] = list(current_nodes.values())
+    return rebased
+
+def save_workflow(workflow_id: str, base: Dict, update: Dict, n8n_url: str = None,
+                  n8n_key: str = None) -> Tuple[str, str, Optional[int]]:
+    """Write `update` (a PUT payload derived from the fetched `base`) with optimistic concurrency.
+
+    Skips the PUT when the payload is canonically identical to what's deployed. Otherwise the workflow is
+    refetched first; if its versionId/updatedAt moved since `base` was fetched (someone edited it), the
+    change is rebased onto the new version, or abandoned if it conflicts with those edits. The version
+    being replaced and the one written are both kept in the snapshot store.
+    Returns (status, message, pre-heal snapshot id) with status "updated", "unchanged", "conflict" or "failed".
+    """
+    url, key = _resolve_creds(n8n_url, n8n_key)
+    for _ in range(MAX_REBASES + 1):
+        if _canonical(update) == _canonical(_update_payload(base)):
+            return "unchanged", "Workflow already matches the fix; skipped update.", None
+        if _version(base) is None:  # Nothing to compare against (older n8n); write as before
+            break
+        current = get_workflow(workflow_id, url, key)
+        if current is None:
+            return "failed", "Could not refetch workflow before updating.", None
+        if _version(current) == _version(base):
+            break
+        rebased = rebase_update(base, update, current)
+        if rebased is None:
+            return "conflict", "Workflow was edited in n8n since it was fetched and the fix conflicts with those edits.", None
+        print(f"♻️ Workflow {workflow_id} changed since fetch; rebased the fix onto version {_version(current)}")
+        base, update = current, rebased
+    else:
+        return "conflict", "Workflow kept changing while the fix was being applied.", None
+
+    try:
+        snapshot_id = get_store().save(url, workflow_id, base, "pre_heal")
+    except Exception as e:
+        return "failed", f"Could not snapshot workflow before updating: {e}", None
+    success, msg = update_workflow(workflow_id, update, url, key)
+    if success:
+        try:
+            get_store().save(url, workflow_id, update, "post_heal")
+        except Exception as e:
+            print(f"⚠️ Warning: Failed to snapshot healed workflow {workflow_id}: {e}")
+    return ("updated" if success else "failed"), msg, snapshot_id
+
+def rollback_workflow(snapshot_id: int, n8n_url: str = None, n8n_key: str = None) -> Tuple[bool, str]:
+    """Restore a workflow to a stored snapshot with a single PUT (then publish).
+
+    The snapshot is restored to the n8n instance it was taken from; passing a different `n8n_url` is refused.
+    """
+    snapshot = get_store().get(snapshot_id)
+    if snapshot is None:
+        return False, f"No snapshot {snapshot_id}."
+    if n8n_url and n8n_url.rstrip("/") != snapshot["n8n_url"]:
+        return False, f"Snapshot {snapshot_id} belongs to a different n8n instance."
+    url, key = _resolve_creds(snapshot["n8n_url"], n8n_key)
+    workflow_id = snapshot["workflow_id"]
+    success, msg = update_workflow(workflow_id, snapshot["workflow"], url, key)
+    if not success:
+        return False, f"Rollback of workflow {workflow_id} failed: {msg}"
+    publish_workflow(workflow_id, url, key)
+    get_store().save(url, workflow_id, snapshot["workflow"], "rollback")
+    return True, f"Restored workflow {workflow_id} to snapshot {snapshot_id} ({snapshot['label']})."
+
 def fix_javascript_syntax(code: str) -> Tuple[str, bool]:
     """Attempt to fix common JavaScript syntax errors."""
     original = code
@@ -99,83 +344,152 @@ def fix_javascript_syntax(code: str) -> Tuple[str, bool]:
     
     return code, code != original
 
-def deterministic_fix(workflow_id: str, error_msg: str, n8n_url: str = None, n8n_key: str = None) -> Tuple[bool, str]:
-    """Attempt deterministic fixes based on error patterns."""
+def error_classes(error_msg: str) -> List[str]:
+    """Return every ERROR_PATTERNS class an error message matches, in check order."""
     error_lower = error_msg.lower()
+    return [error_class for error_class, patterns in ERROR_PATTERNS.items()
+            if any(pattern in error_lower for pattern in patterns)]
+
+def classify_error(error_msg: str) -> Optional[str]:
+    """Return the primary error class for a message, or None if no pattern matches."""
+    classes = error_classes(error_msg)
+    return classes[0] if classes else None
+
+def fix_code_nodes(nodes: List[Dict]) -> List[str]:
+    """Apply fix_javascript_syntax to every Code node in place. Returns the names of nodes changed."""
+    fixed_nodes = []
+    for node in nodes:
+        if node.get('type') == CODE_NODE_TYPE:
+            params = node.get('parameters', {})
+            js_code = params.get('jsCode', '')
+            if js_code:
+                fixed_code, was_modified = fix_javascript_syntax(js_code)
+                if was_modified:
+                    params['jsCode'] = fixed_code
+                    node['parameters'] = params
+                    fixed_nodes.append(node.get('name', 'Unknown'))
+    return fixed_nodes
+
+def deterministic_fix(workflow_id: str, error_msg: str, n8n_url: str = None, n8n_key: str = None,
+                      failing_node: str = None) -> Tuple[bool, str, Optional[int]]:
+    """Attempt deterministic fixes based on error patterns. Returns (success, message, pre-heal snapshot id).
+
+    With the `failing_node` known, only the Code nodes it depends on are fixed, unless none of them needs it.
+    """
+    classes = error_classes(error_msg)
     
     # 1. JSON / Syntax Errors
-    if any(pattern in error_lower for pattern in ["json", "parse", "syntax", "unexpected token", "is not a function", "not defined"]):
+    if "syntax" in classes:
         workflow = get_workflow(workflow_id, n8n_url, n8n_key)
         if not workflow:
-            return False, "Could not fetch workflow for fixing."
+            return False, "Could not fetch workflow for fixing.", None
         
-        nodes = workflow.get('nodes', [])
-        fixed_any = False
-        fixed_nodes = []
+        original = copy.deepcopy(workflow)
+        graph = graph_for(workflow, n8n_url)
+        code_nodes = graph.of_type(CODE_NODE_TYPE)
+        suspects = set(graph.suspects(failing_node))
+        fixed_nodes = fix_code_nodes([graph.node(workflow, name) for name in code_nodes if name in suspects])
+        if not fixed_nodes:
+            fixed_nodes = fix_code_nodes([graph.node(workflow, name) for name in code_nodes if name not in suspects])
         
-        for node in nodes:
-            if node.get('type') == 'n8n-nodes-base.code':
-                params = node.get('parameters', {})
-                js_code = params.get('jsCode', '')
-                if js_code:
-                    fixed_code, was_modified = fix_javascript_syntax(js_code)
-                    if was_modified:
-                        params['jsCode'] = fixed_code
-                        node['parameters'] = params
-                        fixed_any = True
-                        fixed_nodes.append(node.get('name', 'Unknown'))
-        
-        if fixed_any:
-            update_data = {
-                "nodes": nodes,
-                "connections": workflow.get('connections', {}),
-                "settings": workflow.get('settings', {}),
-                "name": workflow.get('name')
-            }
-            success, msg = update_workflow(workflow_id, update_data, n8n_url, n8n_key)
-            if success:
+        if fixed_nodes:
+            status, msg, snapshot_id = save_workflow(workflow_id, original, _update_payload(workflow), n8n_url, n8n_key)
+            if status == "updated":
                 publish_workflow(workflow_id, n8n_url, n8n_key)
-                return True, f"✅ Fixed code in nodes: {', '.join(fixed_nodes)} (Published)"
+                return True, f"✅ Fixed code in nodes: {', '.join(fixed_nodes)} (Published)", snapshot_id
+            elif status == "unchanged":
+                return True, f"✅ Fixed code in nodes: {', '.join(fixed_nodes)} (already deployed)", None
             else:
-                return False, f"Failed to update workflow: {msg}"
+                return False, f"Failed to update workflow: {msg}", None
     
     # 2. Rate Limiting
-    if any(pattern in error_lower for pattern in ["rate limit", "429", "quota exceeded", "too many requests"]):
-        return True, "✅ Rate limit detected. RECOMMENDED: Add a 'Wait' node before API calls."
+    if "rate_limit" in classes:
+        return True, "✅ Rate limit detected. RECOMMENDED: Add a 'Wait' node before API calls.", None
 
     # 3. Authentication Errors (Explanation only)
-    if any(pattern in error_lower for pattern in ["401", "unauthorized", "invalid credentials", "forbidden", "403"]):
-        return False, "🔐 Auth Error: Please refresh credentials in n8n settings."
+    if "auth" in classes:
+        return False, "🔐 Auth Error: Please refresh credentials in n8n settings.", None
+
+    return False, "No deterministic fix found.", None
 
-    return False, "No deterministic fix found."
+def heal_workflow(workflow_id: str, execution_id: str, error_msg: str, n8n_url: str = None, n8n_key: str = None,
+                  gemini_api_key: str = None, failing_node: str = None) -> Dict:
+    """Main entry point for healing a workflow failure.
 
-def heal_workflow(workflow_id: str, execution_id: str, error_msg: str, n8n_url: str = None, n8n_key: str = None, gemini_api_key: str = None) -> Dict:
-    """Main entry point for healing a workflow failure."""
+    `failing_node` (the execution's lastNodeExecuted) focuses the fixers on that node and its inputs.
+    The result carries the heal's `trace_id`, a per-stage `timings` breakdown (ms) from its spans and, when
+    known, the `failing_node` and its `node_type`.
+    """
+    located = {"failing_node": failing_node} if failing_node else {}
+    with span("heal_workflow", workflow_id=workflow_id, execution_id=execution_id) as root:
+        result = _run_heal_stages(workflow_id, execution_id, error_msg, n8n_url, n8n_key, gemini_api_key, located)
+        root["attributes"]["status"] = result["status"]
+    HEALS_TOTAL.inc(status=result["status"])
+    return {**result, **located, "trace_id": root["trace_id"], "timings": dict(root["breakdown"])}
+
+def _run_heal_stages(workflow_id: str, execution_id: str, error_msg: str, n8n_url: str = None, n8n_key: str = None,
+                     gemini_api_key: str = None, located: Optional[Dict] = None) -> Dict:
+    """Deterministic fix -> network retry -> fix memory replay -> Gemini, each stage timed in HEAL_STAGE_SECONDS.
+
+    `located` holds the failing node, if known; its node type is added once the workflow is fetched.
+    """
+    located = {} if located is None else located
+    failing_node = located.get("failing_node")
     
     # Resolve credentials once for the whole flow
     url, key = _resolve_creds(n8n_url, n8n_key)
     
     # Step 1: Try Deterministic Fixes
-    success, message = deterministic_fix(workflow_id, error_msg, url, key)
+    with _stage("deterministic", workflow_id=workflow_id):
+        success, message, snapshot_id = deterministic_fix(workflow_id, error_msg, url, key, failing_node)
     if success:
-        return {"status": "resolved", "message": message}
+        return {"status": "resolved", "message": message, "snapshot_id": snapshot_id}
     
     # Step 2: Try Connection/Network Retry
-    if any(pattern in error_msg.lower() for pattern in ["connection refused", "timeout", "econnreset", "network error"]):
-        retry_endpoint = f"{url}/api/v1/executions/{execution_id}/retry"
-        headers = {"X-N8N-API-KEY": key}
+    if "network" in error_classes(error_msg):
         try:
-            resp = requests.post(retry_endpoint, headers=headers, timeout=10)
+            with _stage("retry", execution_id=execution_id):
+                resp = n8n_request("POST", url, key, f"/executions/{execution_id}/retry")
             if resp.status_code in [200, 201]:
                 return {"status": "resolved", "message": "✅ Auto-Retry triggered for network issue."}
         except:
             pass
 
-    # Step 3: AI Escalation (Gemini)
-    print(f"🤖 Escalating to Gemini AI for {workflow_id}...")
     workflow_json = get_workflow(workflow_id, url, key)
+    graph = graph_for(workflow_json, url) if workflow_json else None
+    if graph and failing_node in graph:
+        located["node_type"] = graph.types[failing_node]
+
+    # Step 3: Replay a fix that already worked for this kind of error (no AI call)
+    if workflow_json:
+        with _stage("replay", workflow_id=workflow_id):
+            replayed_nodes, replayed_names, refs = replay_fix(url, workflow_json, error_msg, failing_node)
+        record_cache("fix_memory", hit=bool(replayed_nodes))
+        if replayed_nodes:
+            status, update_msg, snapshot_id = save_workflow(
+                workflow_id, workflow_json, {**_update_payload(workflow_json), "nodes": replayed_nodes}, url, key)
+            if status == "updated":
+                publish_workflow(workflow_id, url, key)
+                # Credited by verification once the workflow runs clean (see agentic_healer.verify_heals)
+                return {"status": "resolved",
+                        "message": f"🧠 Replayed a proven fix on nodes: {', '.join(replayed_names)} (Published)",
+                        "snapshot_id": snapshot_id, "replay_refs": refs}
+            record_replay_outcome(url, refs, False)
+
+    # Step 4: AI Escalation (Gemini), unless the fixability model says similar errors never get fixed
+    if workflow_json:
+        escalate, p_fixed = should_escalate(error_msg, located.get("node_type"))
+        GEMINI_ESCALATIONS.inc(decision="escalated" if escalate else "skipped")
+        if not escalate:
+            hint = message if message != "No deterministic fix found." else f"Manual review required for: {error_msg[:100]}..."
+            return {"status": "explained",
+                    "message": f"🛠️ Skipped AI (similar errors fixed {p_fixed:.0%} of the time). {hint}"}
+
+    print(f"🤖 Escalating to Gemini AI for {workflow_id}...")
     if workflow_json:
-        ai_success, explanation, fixed_workflow = consult_gemini_for_fix(workflow_json, error_msg, gemini_api_key)
+        with _stage("gemini", workflow_id=workflow_id):
+            ai_success, explanation, fixed_workflow = consult_gemini_for_fix(
+                workflow_json, error_msg, gemini_api_key, failing_node=failing_node, graph=graph)
         if ai_success and fixed_workflow:
             update_data = {
                 "nodes": fixed_workflow.get("nodes", workflow_json.get("nodes", [])),
@@ -183,10 +497,15 @@ def heal_workflow(workflow_id: str, execution_id: str, error_msg: str, n8n_url:
                 "settings": fixed_workflow.get("settings", workflow_json.get("settings", {})),
                 "name": fixed_workflow.get("name", workflow_json.get("name"))
             }
-            update_success, update_msg = update_workflow(workflow_id, update_data, url, key)
-            if update_success:
+            status, update_msg, snapshot_id = save_workflow(workflow_id, workflow_json, update_data, url, key)
+            if status == "updated":
                 publish_workflow(workflow_id, url, key)
-                return {"status": "resolved", "message": f"🤖 Gemini AI fixed it: {explanation} (Published)"}
+                # Stored pending: replayable only once verification credits these refs
+                memory_refs = remember_fix(url, error_msg, workflow_json, update_data, workflow_id)
+                return {"status": "resolved", "message": f"🤖 Gemini AI fixed it: {explanation} (Published)",
+                        "snapshot_id": snapshot_id, "memory_refs": memory_refs}
+            elif status == "unchanged":
+                return {"status": "explained", "message": f"🤖 AI proposed no changes: {explanation}"}
             else:
                 return {"status": "explained", "message": f"🤖 AI found fix but failed to apply: {update_msg}"}
         else:
@@ -0,0 +1,134 @@
+"""
+Size-capped fetching of execution details.
+
+An execution fetched with `includeData=true` carries every node's items (and binary data), and can run to
+hundreds of megabytes. `fetch_execution_failure` streams the body instead of loading it in one piece:
+
+- Bodies up to `EXECUTION_SPILL_BYTES` are parsed in memory as before.
+- Larger bodies are spilled to a temporary file, memory-mapped, and scanned for the error and the failing
+  node (regex over the mapped bytes, decoding only a small window after each `"error"` key), so the page
+  cache holds the payload instead of the Python heap.
+- Reading stops at `EXECUTION_MAX_BYTES`. The result is marked `truncated`, and holds whatever error the
+  prefix contained.
+"""
+
+import json
+import mmap
+import os
+import re
+import tempfile
+from typing import Dict, Optional, Tuple
+
+try:
+    from execution.core_healer import find_error_recursive, find_failing_node
+    from execution.metrics import EXECUTION_FETCH_BYTES, EXECUTION_FETCHES
+    from execution.n8n_client import n8n_request
+except ImportError:
+    from core_healer import find_error_recursive, find_failing_node
+    from metrics import EXECUTION_FETCH_BYTES, EXECUTION_FETCHES
+    from n8n_client import n8n_request
+
+EXECUTION_SPILL_BYTES = int(os.getenv("EXECUTION_SPILL_BYTES", str(8 * 1024 * 1024)))  # Larger bodies go to disk
+EXECUTION_MAX_BYTES = int(os.getenv("EXECUTION_MAX_BYTES", str(256 * 1024 * 1024)))  # Stop reading after this
+EXECUTION_SPILL_DIR = os.getenv("EXECUTION_SPILL_DIR") or None  # Defaults to the system temp directory
+CHUNK_SIZE = 256 * 1024
+ERROR_WINDOW = 64 * 1024  # Bytes decoded after an "error" key when scanning a spilled body
+
+_ERROR_KEY_RE = re.compile(rb'"error"\s*:\s*')
+_LAST_NODE_RE = re.compile(rb'"lastNodeExecuted"\s*:\s*("(?:[^"\\]|\\.)*")')
+_MESSAGE_RE = re.compile(rb'"message"\s*:\s*("(?:[^"\\]|\\.)*")')
+
+
+def _error_value(window: bytes) -> Optional[str]:
+    """The message of the error value at the start of `window`, by find_error_recursive's rules."""
+    try:
+        value, _ = json.JSONDecoder().raw_decode(window.decode("utf-8", errors="ignore"))
+    except ValueError:
+        # Cut off by the window (e.g. an error object with a huge stack): settle for its message field
+        match = _MESSAGE_RE.search(window) if window[:1] == b"{" else None
+        return json.loads(match.group(1)) if match else None
+    if isinstance(value, dict):
+        if "message" in value:
+            return value["message"]
+        return str(value["stack"])[:100] if "stack" in value else None
+    return value if isinstance(value, str) else None
+
+
+def scan_failure(buffer) -> Tuple[Optional[str], Optional[str]]:
+    """(error message, failing node) from raw execution JSON, without parsing it.
+
+    `buffer` is any bytes-like object, e.g. an mmap. It may be a truncated prefix of the document.
+    """
+    error = None
+    for match in _ERROR_KEY_RE.finditer(buffer):
+        error = _error_value(bytes(buffer[match.end():match.end() + ERROR_WINDOW]))
+        if error:
+            break
+    node = _LAST_NODE_RE.search(buffer)
+    return error, (json.loads(node.group(1)) if node else None)
+
+
+def fetch_execution_failure(n8n_url: str, n8n_key: str, execution_id: str, timeout: float = 30) -> Dict:
+    """Fetch an execution's error message and failing node with bounded memory.
+
+    Returns {"status": "complete" | "truncated" | "failed", "error", "failing_node", "bytes", "spilled",
+    "status_code"}; `error` is None when the (possibly truncated) body has no error message.
+    """
+    resp = n8n_request("GET", n8n_url, n8n_key, f"/executions/{execution_id}",
+                       params={"includeData": "true"}, timeout=timeout, stream=True)
+    result = {"status": "failed", "error": None, "failing_node": None, "bytes": 0, "spilled": False,
+              "status_code": resp.status_code}
+    try:
+        if resp.status_code != 200:
+            return result
+        buffer, spill, size, truncated = bytearray(), None, 0, False
+        try:
+            for chunk in resp.iter_content(CHUNK_SIZE):
+                if size + len(chunk) > EXECUTION_MAX_BYTES:
+                    chunk, truncated = chunk[:EXECUTION_MAX_BYTES - size], True
+                size += len(chunk)
+                if spill is None and size > EXECUTION_SPILL_BYTES:
+                    spill = tempfile.TemporaryFile(prefix="heas-execution-", dir=EXECUTION_SPILL_DIR)
+                    spill.write(buffer)
+                    buffer = None
+                if spill is None:
+                    buffer += chunk
+                else:
+                    spill.write(chunk)
+                if truncated:
+                    break
+
+            if spill is None:
+                try:
+                    if truncated:
+                        raise ValueError("truncated body")
+                    data = json.loads(buffer)
+                    error, failing_node = find_error_recursive(data), find_failing_node(data)
+                except ValueError:
+                    error, failing_node = scan_failure(buffer)
+            else:
+                spill.flush()
+                with mmap.mmap(spill.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    error, failing_node = scan_failure(mapped)
+        finally:
+            if spill is not None:
+                spill.close()
+    finally:
+        resp.close()
+
+    EXECUTION_FETCHES.inc(result="truncated" if truncated else "spilled" if spill is not None else "in_memory")
+    EXECUTION_FETCH_BYTES.observe(size)
+    if truncated:
+        print(f"⚠️ Execution {execution_id} data exceeds {EXECUTION_MAX_BYTES // (1024 * 1024)} MB; "
+              f"searched the first {size // (1024 * 1024)} MB for its error")
+    return {**result, "status": "truncated" if truncated else "complete", "error": error,
+            "failing_node": failing_node, "bytes": size, "spilled": spill is not None}
+
+
+def describe_missing_error(result: Dict) -> str:
+    """The message to show when a fetch found no error."""
+    if result["status"] == "truncated":
+        return f"Unknown Error (execution data truncated at {result['bytes'] // (1024 * 1024)} MB, no message found before the cap)"
+    if result["status"] == "failed":
+        return f"Failed to fetch logs (Status: {result['status_code']})"
+    return "Unknown Error (No message found in logs)"
@@ -0,0 +1,268 @@
+"""
+In-process stand-in for the n8n REST API and the Gemini SDK, for benchmarks and offline runs.
+
+Implements the endpoints this project calls (executions list/detail/retry, workflows list/get/put/activate)
+on a local threaded HTTP server with configurable latency, failure mix and payload sizes, and counts every
+upstream call so benchmarks can report how many requests each code path makes.
+
+Usage:
+    fake = FakeN8n(executions=500, failure_rate=0.3, latency_ms=5).start()
+    os.environ["N8N_API_URL"], os.environ["N8N_API_KEY"] = fake.base_url, fake.api_key
+    ...
+    fake.stop()
+"""
+
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+# Error message templates per failure class; syntax errors point at a Code node the fixer can repair
+ERROR_TEMPLATES = {
+    "syntax": "SyntaxError: Unexpected token ']' in Code node",
+    "network": "connect ECONNRESET 10.0.0.12:443 (timeout after 30000ms)",
+    "auth": "401 Unauthorized - invalid credentials for Google Sheets",
+    "rate_limit": "429 Too Many Requests - quota exceeded",
+    "data": "Cannot read properties of undefined (reading 'email')",
+}
+DEFAULT_ERROR_MIX = {"syntax": 0.3, "network": 0.25, "auth": 0.15, "rate_limit": 0.1, "data": 0.2}
+
+BROKEN_JS = "const items = $input.ll();;\nconst first = items[0].json]name;\nreturn items;"
+
+
+def _endpoint_label(method: str, path: str) -> str:
+    """Collapse ids so call counts group by endpoint, e.g. 'GET /workflows/{id}'."""
+    path = path.replace("/api/v1", "", 1)
+    path = re.sub(r"/(workflows|executions)/[^/]+", r"/\1/{id}", path)
+    return f"{method} {path}"
+
+
+class FakeN8n:
+    """A fake n8n instance with synthetic workflows and executions."""
+
+    def __init__(self, executions: int = 200, failure_rate: float = 0.3, error_mix: Optional[Dict[str, float]] = None,
+                 workflows: int = 20, nodes_per_workflow: int = 10, payload_kb: int = 4, latency_ms: float = 5,
+                 api_key: str = "fake-n8n-key", seed: int = 42):
+        self.api_key = api_key
+        self.latency = latency_ms / 1000.0
+        self.payload_kb = payload_kb
+        self.calls = Counter()
+        self.lock = threading.Lock()
+        self.server = None
+        self.thread = None
+        self.base_url = None
+
+        rng = random.Random(seed)
+        mix = error_mix or DEFAULT_ERROR_MIX
+        kinds, weights = list(mix), list(mix.values())
+
+        self.workflows = {str(i): self._make_workflow(str(i), nodes_per_workflow) for i in range(1, workflows + 1)}
+        started = datetime(2026, 1, 1, tzinfo=timezone.utc)
+        self.executions = []
+        for i in range(executions, 0, -1):  # newest first, like n8n
+            failed = rng.random() < failure_rate
+            kind = rng.choices(kinds, weights)[0] if failed else None
+            start = started + timedelta(seconds=i * 7)
+            self.executions.append({
+                "id": str(i),
+                "workflowId": str(rng.randint(1, workflows)),
+                "finished": not failed,
+                "mode": "trigger",
+                "status": "error" if failed else "success",
+                "startedAt": start.isoformat().replace("+00:00", "Z"),
+                "stoppedAt": (start + timedelta(seconds=2)).isoformat().replace("+00:00", "Z"),
+                "_error_kind": kind,
+            })
+        self.executions_by_id = {e["id"]: e for e in self.executions}
+
+    # --- Synthetic data ---
+
+    def _make_workflow(self, workflow_id: str, node_count: int) -> Dict:
+        nodes = [{"name": "Webhook", "type": "n8n-nodes-base.webhook", "parameters": {"path": f"wf-{workflow_id}"},
+                  "typeVersion": 1, "position": [0, 0]}]
+        for n in range(1, node_count):
+            if n == node_count - 1:
+                node = {"name": f"Code {n}", "type": "n8n-nodes-base.code", "parameters": {"jsCode": BROKEN_JS}}
+            else:
+                node = {"name": f"HTTP {n}", "type": "n8n-nodes-base.httpRequest",
+                        "parameters": {"url": f"https://api.example.com/{n}", "method": "GET"}}
+            nodes.append({**node, "typeVersion": 1, "position": [n * 200, 0]})
+        connections = {
+            nodes[i]["name"]: {"main": [[{"node": nodes[i + 1]["name"], "type": "main", "index": 0}]]}
+            for i in range(len(nodes) - 1)
+        }
+        return {"id": workflow_id, "name": f"Benchmark Workflow {workflow_id}", "active": True, "nodes": nodes,
+                "connections": connections, "settings": {"executionOrder": "v1"}, "versionId": "v1",
+                "updatedAt": "2026-01-01T00:00:00.000Z"}
+
+    def _execution_detail(self, execution: Dict) -> Dict:
+        """Nested run data padded to payload_kb, with the error buried in the last node's run."""
+        detail = {k: v for k, v in execution.items() if not k.startswith("_")}
+        workflow = self.workflows[execution["workflowId"]]
+        last_node = workflow["nodes"][-1]["name"]
+        filler = "x" * 200
+        items = [{"json": {"row": i, "payload": filler}} for i in range(max(1, self.payload_kb * 1024 // 230))]
+        run_data = {node["name"]: [{"data": {"main": [items]}, "executionTime": 3}] for node in workflow["nodes"][:-1]}
+        result = {"runData": run_data, "lastNodeExecuted": last_node}
+        if execution["_error_kind"]:
+            error = {"message": ERROR_TEMPLATES[execution["_error_kind"]], "stack": "Error\n    at Code (vm:1:1)"}
+            run_data[last_node] = [{"error": error, "executionTime": 1}]
+            result["error"] = error
+        detail["data"] = {"resultData": result}
+        return detail
+
+    # --- Request handling ---
+
+    def handle(self, method: str, raw_path: str, body: Optional[Dict]) -> tuple:
+        parsed = urlparse(raw_path)
+        path, query = parsed.path, {k: v[-1] for k, v in parse_qs(parsed.query).items()}
+        with self.lock:
+            self.calls[_endpoint_label(method, path)] += 1
+
+        parts = path.rstrip("/").split("/")[3:]  # strip '', 'api', 'v1'
+        if not parts:
+            return 404, {"message": "not found"}
+
+        if parts[0] == "executions":
+            if len(parts) == 1 and method == "GET":
+                items = self.executions
+                if query.get("status"):
+                    items = [e for e in items if e["status"] == query["status"]]
+                if query.get("workflowId"):
+                    items = [e for e in items if e["workflowId"] == query["workflowId"]]
+                return 200, self._page(items, query)
+            execution = self.executions_by_id.get(parts[1])
+            if execution is None:
+                return 404, {"message": "execution not found"}
+            if len(parts) == 3 and parts[2] == "retry" and method == "POST":
+                return 200, {"id": f"retry-{execution['id']}", "workflowId": execution["workflowId"]}
+            if method == "GET":
+                if query.get("includeData") == "true":
+                    return 200, self._execution_detail(execution)
+                return 200, {k: v for k, v in execution.items() if not k.startswith("_")}
+
+        if parts[0] == "workflows":
+            if len(parts) == 1 and method == "GET":
+                summaries = [{k: wf[k] for k in ("id", "name", "active", "updatedAt")} for wf in self.workflows.values()]
+                return 200, self._page(summaries, query)
+            workflow = self.workflows.get(parts[1])
+            if workflow is None:
+                return 404, {"message": "workflow not found"}
+            if len(parts) == 3 and parts[2] in ("activate", "deactivate") and method == "POST":
+                workflow["active"] = parts[2] == "activate"
+                return 200, workflow
+            if method == "GET":
+                return 200, workflow
+            if method == "PUT":
+                with self.lock:
+                    version = int(workflow["versionId"].lstrip("v")) + 1
+                    workflow.update({k: v for k, v in (body or {}).items() if k in ("name", "nodes", "connections", "settings")})
+                    workflow["versionId"] = f"v{version}"
+                    workflow["updatedAt"] = datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+                return 200, workflow
+
+        return 404, {"message": "not found"}
+
+    @staticmethod
+    def _page(items: List[Dict], query: Dict) -> Dict:
+        limit = int(query.get("limit", 100))
+        offset = int(query.get("cursor", 0))
+        page = items[offset:offset + limit]
+        next_cursor = str(offset + limit) if offset + limit < len(items) else None
+        return {"data": page, "nextCursor": next_cursor}
+
+    # --- Server lifecycle ---
+
+    def start(self) -> "FakeN8n":
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True  # Headers and body are separate writes; avoid 40ms delayed-ACK stalls
+
+            def _respond(self):
+                if fake.latency:
+                    time.sleep(fake.latency)
+                length = int(self.headers.get("Content-Length") or 0)
+                body = json.loads(self.rfile.read(length)) if length else None
+                if self.headers.get("X-N8N-API-KEY") != fake.api_key:
+                    status, payload = 401, {"message": "unauthorized"}
+                else:
+                    status, payload = fake.handle(self.command, self.path, body)
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            do_GET = do_POST = do_PUT = do_PATCH = _respond
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.thread = threading.Thread(target=self.server.serve_forever, name="fake-n8n", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+
+    def reset_calls(self):
+        with self.lock:
+            self.calls.clear()
+
+
+class FakeGenAI:
+    """Drop-in for the google.generativeai module: echoes the workflow back as 'fixed' after a delay."""
+
+    def __init__(self, latency_ms: float = 200, success_rate: float = 1.0, seed: int = 7):
+        self.latency = latency_ms / 1000.0
+        self.success_rate = success_rate
+        self.calls = Counter()
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+
+    def configure(self, api_key=None):
+        pass
+
+    def GenerativeModel(self, name):
+        return _FakeModel(self, name)
+
+
+class _FakeModel:
+    def __init__(self, genai: FakeGenAI, name: str):
+        self.genai = genai
+        self.name = name
+
+    def generate_content(self, prompt: str):
+        with self.genai.lock:
+            self.genai.calls[self.name] += 1
+            ok = self.genai.rng.random() < self.genai.success_rate
+        time.sleep(self.genai.latency)
+        if not ok:
+            raise RuntimeError("503 model overloaded")
+        start = prompt.index("WORKFLOW JSON:") + len("WORKFLOW JSON:")
+        workflow = json.loads(prompt[start:prompt.index("TASK:")])
+        text = json.dumps({"explanation": "Stubbed fix", "fixed_workflow": workflow})
+        return type("FakeResponse", (), {"text": text})()
+
+
+def install_fake_gemini(latency_ms: float = 200, success_rate: float = 1.0) -> FakeGenAI:
+    """Make ai_healer use a FakeGenAI instead of importing the real SDK."""
+    from execution import ai_healer
+    fake = FakeGenAI(latency_ms, success_rate)
+    ai_healer._genai = fake
+    ai_healer.GEMINI_API_KEY = ai_healer.GEMINI_API_KEY or "fake-gemini-key"
+    return fake
@@ -0,0 +1,267 @@
+"""
+Fix memory: proven node patches from past heals, replayed before escalating to Gemini.
+
+Every successful AI heal is diffed node by node against the workflow it started from, and each
+changed parameter is stored under the error's signature (the message with ids, numbers, URLs and
+quoted values normalised away) and the node's type. When the same kind of error hits a node of that
+type again, `replay_fix` applies the stored patch locally, but only where it applies cleanly: string
+parameters (e.g. Code node source) are patched as line-level edits whose original lines must all be
+present; other values are swapped only on the failing node (or the node the patch was learned from,
+in the workflow it was learned in) and only when the current value equals the one the patch replaced.
+When the failing node is known, replay touches nothing but that node and the nodes feeding it.
+
+Memory is kept per n8n instance (`tenant_of` its URL): one tenant's fixes are never replayed on
+another's workflows. A new patch is stored pending and only replays once verification has seen the
+healed workflow run clean; every replay earns (or loses) credit the same way.
+"""
+
+import copy
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+import uuid
+from difflib import SequenceMatcher
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    from execution.n8n_client import tenant_of
+    from execution.workflow_graph import graph_for
+except ImportError:
+    from n8n_client import tenant_of
+    from workflow_graph import graph_for
+
+FIX_MEMORY_FILE = os.getenv("FIX_MEMORY_FILE", ".tmp/fix_memory.json")
+MAX_SIGNATURES = 1000  # Least recently used (tenant, signature) keys are dropped beyond this
+MAX_PATCHES_PER_KEY = 5  # Per (signature, node type)
+
+_SIGNATURE_RULES = [
+    (re.compile(r"https?://\S+"), "<url>"),
+    (re.compile(r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}"), "<uuid>"),
+    (re.compile(r"'[^']*'|\"[^\"]*\"|`[^`]*`"), "<str>"),
+    (re.compile(r"\b0x[0-9a-f]+\b|\b\d+(?:\.\d+)?\b"), "<n>"),
+    (re.compile(r"\s+"), " "),
+]
+
+_lock = threading.Lock()
+_cache: Dict[str, Any] = {"mtime": None, "data": None}
+
+
+def error_signature(error_msg: str) -> str:
+    """Normalise an error message so recurrences of the same failure share one key."""
+    signature = (error_msg or "").lower()
+    for pattern, replacement in _SIGNATURE_RULES:
+        signature = pattern.sub(replacement, signature)
+    return signature.strip()[:200]
+
+
+def _memory_key(n8n_url: Optional[str], signature: str) -> str:
+    """Storage key of a signature within one n8n instance's memory."""
+    return f"{tenant_of(n8n_url or '')} {signature}"
+
+
+# --- Patches ---
+
+def _diff_value(before: Any, after: Any) -> Dict:
+    """Describe how one parameter changed: line edits for multi-line strings, else a whole-value swap."""
+    if isinstance(before, str) and isinstance(after, str) and "\n" in before:
+        a, b = before.splitlines(keepends=True), after.splitlines(keepends=True)
+        edits = []
+        for tag, i1, i2, j1, j2 in SequenceMatcher(None, a, b, autojunk=False).get_opcodes():
+            if tag == "equal":
+                continue
+            if tag == "insert":
+                # Anchor pure insertions on the neighbouring line so they have something to match
+                if i1 > 0:
+                    edits.append({"before": a[i1 - 1], "after": a[i1 - 1] + "".join(b[j1:j2])})
+                else:
+                    edits.append({"before": a[0], "after": "".join(b[j1:j2]) + a[0]})
+            else:
+                edits.append({"before": "".join(a[i1:i2]), "after": "".join(b[j1:j2])})
+        return {"kind": "lines", "edits": edits}
+    return {"kind": "value", "from": before, "to": after}
+
+
+def _apply_value(current: Any, change: Dict) -> Tuple[bool, Any]:
+    if change["kind"] == "lines":
+        if not isinstance(current, str):
+            return False, current
+        for edit in change["edits"]:
+            if edit["before"] not in current:
+                return False, current
+            current = current.replace(edit["before"], edit["after"], 1)
+        return True, current
+    if current == change["from"]:
+        return True, copy.deepcopy(change["to"])
+    return False, current
+
+
+def apply_changes(params: Dict, changes: Dict[str, Dict]) -> Optional[Dict]:
+    """A patched copy of a node's parameters, or None if any change doesn't apply cleanly."""
+    params = copy.deepcopy(params)
+    for key, change in changes.items():
+        ok, value = _apply_value(params.get(key), change)
+        if not ok:
+            return None
+        if value is None:
+            params.pop(key, None)
+        else:
+            params[key] = value
+    return params
+
+
+def diff_workflows(before: Dict, after: Dict) -> List[Dict]:
+    """Per-node parameter patches between two versions of a workflow (nodes matched by name and type)."""
+    old_nodes = {node.get("name"): node for node in before.get("nodes", [])}
+    patches = []
+    for node in after.get("nodes", []):
+        old = old_nodes.get(node.get("name"))
+        if not old or old.get("type") != node.get("type"):
+            continue
+        old_params, new_params = old.get("parameters", {}), node.get("parameters", {})
+        changes = {
+            key: _diff_value(old_params.get(key), new_params.get(key))
+            for key in sorted(set(old_params) | set(new_params))
+            if old_params.get(key) != new_params.get(key)
+        }
+        if changes:
+            patches.append({"node_type": node.get("type"), "node": node.get("name"), "changes": changes})
+    return patches
+
+
+# --- Storage ---
+
+def _load() -> Dict:
+    """The memory file's contents, re-read only when it changed on disk. Call with _lock held."""
+    try:
+        mtime = os.path.getmtime(FIX_MEMORY_FILE)
+    except OSError:
+        mtime = None
+    if _cache["data"] is None or mtime != _cache["mtime"]:
+        data = {"signatures": {}}
+        if mtime is not None:
+            try:
+                with open(FIX_MEMORY_FILE, "r") as f:
+                    data = json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                print(f"⚠️ Warning: Failed to load {FIX_MEMORY_FILE}: {e}")
+        _cache.update(mtime=mtime, data=data)
+    return _cache["data"]
+
+
+def _save(data: Dict):
+    """Atomically rewrite the memory file. Call with _lock held."""
+    signatures = data["signatures"]
+    if len(signatures) > MAX_SIGNATURES:
+        by_use = sorted(signatures, key=lambda sig: signatures[sig].get("last_used", 0))
+        for sig in by_use[:len(signatures) - MAX_SIGNATURES]:
+            del signatures[sig]
+    directory = os.path.dirname(FIX_MEMORY_FILE) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".fix_memory.")
+    with os.fdopen(fd, "w") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, FIX_MEMORY_FILE)
+    _cache.update(mtime=os.path.getmtime(FIX_MEMORY_FILE), data=data)
+
+
+def remember_fix(n8n_url: str, error_msg: str, before: Dict, after: Dict,
+                workflow_id: Optional[str] = None) -> List[Tuple[str, str, str]]:
+    """Store the node patches of a heal under the instance and error signature, pending verification.
+
+    Returns the patches' refs: pass them to `record_replay_outcome` once the heal is verified or
+    regressed. Until a patch has been credited, `replay_fix` does not use it.
+    """
+    patches = diff_workflows(before, after)
+    if not patches:
+        return []
+    signature = error_signature(error_msg)
+    key = _memory_key(n8n_url, signature)
+    now = time.time()
+    refs = []
+    with _lock:
+        data = _load()
+        entry = data["signatures"].setdefault(key, {"node_types": {}})
+        entry["last_used"] = now
+        for patch in patches:
+            known = entry["node_types"].setdefault(patch["node_type"], [])
+            existing = next((p for p in known if p["changes"] == patch["changes"]), None)
+            if existing:
+                existing["last_used"] = now
+            else:
+                existing = {"id": uuid.uuid4().hex[:12], "changes": patch["changes"], "learned_from": patch["node"],
+                            "workflow_id": None if workflow_id is None else str(workflow_id),
+                            "successes": 0, "failures": 0, "created_at": now, "last_used": now}
+                known.append(existing)
+            refs.append((signature, patch["node_type"], existing["id"]))
+            known.sort(key=lambda p: (p["successes"] - p["failures"], p["last_used"]), reverse=True)
+            del known[MAX_PATCHES_PER_KEY:]
+        _save(data)
+    # A pending patch trimmed straight away has nothing left to credit
+    return [ref for ref in refs if any(p["id"] == ref[2] for p in entry["node_types"][ref[1]])]
+
+
+def replay_fix(n8n_url: str, workflow: Dict, error_msg: str,
+               failing_node: Optional[str] = None) -> Tuple[Optional[List[Dict]], List[str], List[Tuple[str, str, str]]]:
+    """Apply verified patches remembered on this n8n instance for this error to a copy of the workflow's nodes.
+
+    With a known `failing_node`, only that node and its upstream suspects are patched.
+    Returns (patched nodes or None, names of patched nodes, refs for `record_replay_outcome`).
+    The workflow itself is not modified.
+    """
+    signature = error_signature(error_msg)
+    with _lock:
+        entry = _load()["signatures"].get(_memory_key(n8n_url, signature))
+        node_types = copy.deepcopy(entry["node_types"]) if entry else {}
+    if not node_types:
+        return None, [], []
+
+    graph = graph_for(workflow, n8n_url)
+    scope = set(graph.suspects(failing_node)) if failing_node in graph else None
+    workflow_id = None if workflow.get("id") is None else str(workflow["id"])
+    nodes = list(workflow.get("nodes", []))
+    fixed, refs = [], []
+    for index, node in enumerate(nodes):
+        name = node.get("name")
+        if scope is not None and name not in scope:
+            continue
+        for patch in node_types.get(node.get("type"), []):
+            if patch["successes"] <= patch["failures"]:
+                continue  # Pending verification, or fails as often as it works
+            # A whole-value swap (e.g. method GET -> POST) says nothing about other nodes of the same type;
+            # node names like "Code" recur across workflows, so the learned name only counts in its own workflow
+            learned_here = workflow_id is not None and patch.get("workflow_id") == workflow_id
+            targeted = name == failing_node or (learned_here and name == patch["learned_from"])
+            if not targeted and any(change["kind"] == "value" for change in patch["changes"].values()):
+                continue
+            params = apply_changes(node.get("parameters", {}), patch["changes"])
+            if params is not None:
+                nodes[index] = {**node, "parameters": params}
+                fixed.append(name or "Unknown")
+                refs.append((signature, node.get("type"), patch["id"]))
+                break
+    return (nodes if fixed else None), fixed, refs
+
+
+def record_replay_outcome(n8n_url: str, refs: List[Tuple[str, str, str]], success: bool):
+    """Credit (or debit) patches a heal stored or replayed; only patches that succeed more than they fail replay.
+
+    Call with success=True only once the healed workflow is verified, not when its update is saved.
+    """
+    if not refs:
+        return
+    with _lock:
+        data = _load()
+        now = time.time()
+        for signature, node_type, patch_id in refs:
+            key = _memory_key(n8n_url, signature)
+            known = data["signatures"].get(key, {}).get("node_types", {}).get(node_type, [])
+            patch = next((p for p in known if p["id"] == patch_id), None)
+            if patch is None:
+                continue
+            patch["successes" if success else "failures"] += 1
+            patch["last_used"] = now
+            data["signatures"][key]["last_used"] = now
+        _save(data)
@@ -0,0 +1,281 @@
+"""
+Local fixability classifier: predicts from the error text whether Gemini is worth calling.
+
+Two multinomial naive Bayes models over word unigrams + bigrams of the normalised error signature
+(plus the failing node's type when known), trained offline from `.tmp/heal_log.json`:
+  - gemini: for heals that reached the AI stage, did Gemini fix it ("fixed") or not ("unfixed")?
+  - stage:  which stage resolved the failure (deterministic, retry, replay, gemini) or "explained".
+
+`should_escalate()` gates the Gemini stage in heal_workflow: when a trained model is confident that
+similar errors never get fixed by the AI, the heal goes straight to an explanation instead.
+
+Usage:
+    python -m execution.fixability train       # time-ordered holdout report, then fit on everything and save
+    python -m execution.fixability evaluate    # score the saved model on heals logged after it was trained
+    python -m execution.fixability predict "401 Unauthorized - invalid credentials"
+"""
+
+import json
+import math
+import os
+import re
+import sys
+import threading
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+try:
+    from execution.fix_memory import error_signature
+except ImportError:
+    from fix_memory import error_signature
+
+HEAL_LOG_FILE = ".tmp/heal_log.json"
+FIXABILITY_MODEL_FILE = os.getenv("FIXABILITY_MODEL_FILE", ".tmp/fixability_model.json")
+FIXABILITY_THRESHOLD = float(os.getenv("FIXABILITY_THRESHOLD", "0.15"))  # Skip Gemini below this P(fixed)
+MIN_TRAINING_EXAMPLES = 20  # Don't gate on a model trained on fewer Gemini attempts
+HOLDOUT_FRACTION = 0.2
+
+_TOKEN_RE = re.compile(r"[a-z0-9_<>]+")
+_STAGE_PREFIXES = [
+    ("✅ Fixed code", "deterministic"),
+    ("✅ Rate limit", "deterministic"),
+    ("✅ Auto-Retry", "retry"),
+    ("🧠 Replayed", "replay"),
+    ("🤖 Gemini AI fixed", "gemini"),
+]
+
+_lock = threading.Lock()
+_cache: Dict = {"mtime": None, "model": None}
+
+
+def features(error_msg: str, node_type: Optional[str] = None) -> List[str]:
+    """Word unigrams and bigrams of the error signature, plus a node-type token."""
+    words = _TOKEN_RE.findall(error_signature(error_msg))
+    tokens = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+    if node_type:
+        tokens.append(f"node:{node_type}")
+    return tokens
+
+
+# --- Labels from the heal log ---
+
+def resolved_stage(entry: Dict) -> str:
+    """The stage that resolved a logged heal, or 'explained' (including heals whose fix later regressed)."""
+    message = entry.get("heal_message") or ""
+    if entry.get("heal_status") == "retrying":
+        return "retry"
+    if entry.get("heal_status") == "resolved" and entry.get("verification") != "regressed":
+        for prefix, stage in _STAGE_PREFIXES:
+            if message.startswith(prefix):
+                return stage
+    return "explained"
+
+
+def reached_gemini(entry: Dict) -> bool:
+    """True if Gemini was consulted during the heal."""
+    return "heal.gemini" in (entry.get("timings") or {}) or (entry.get("heal_message") or "").startswith("🤖")
+
+
+def load_examples(path: str = HEAL_LOG_FILE) -> List[Dict]:
+    """Heal log entries usable for training, oldest first."""
+    if not os.path.exists(path):
+        return []
+    with open(path, "r") as f:
+        content = f.read().strip()
+    entries = json.loads(content) if content else []
+    entries = [e for e in entries if e.get("error")]
+    return sorted(entries, key=lambda e: e.get("timestamp") or "")
+
+
+# --- Naive Bayes ---
+
+class NaiveBayes:
+    """Multinomial naive Bayes with Laplace smoothing, serialisable to plain JSON."""
+
+    def __init__(self, state: Optional[Dict] = None):
+        state = state or {}
+        self.docs = Counter(state.get("docs", {}))
+        self.tokens = {label: Counter(counts) for label, counts in state.get("tokens", {}).items()}
+        self.totals = Counter(state.get("totals", {}))
+        self.vocab = set(state.get("vocab", []))
+
+    def fit(self, samples: Iterable[Tuple[List[str], str]]) -> "NaiveBayes":
+        for tokens, label in samples:
+            self.docs[label] += 1
+            self.tokens.setdefault(label, Counter()).update(tokens)
+            self.totals[label] += len(tokens)
+            self.vocab.update(tokens)
+        return self
+
+    def predict_proba(self, tokens: List[str]) -> Dict[str, float]:
+        total_docs = sum(self.docs.values())
+        if not total_docs:
+            return {}
+        vocab_size = len(self.vocab) or 1
+        scores = {}
+        for label, docs in self.docs.items():
+            counts, denominator = self.tokens.get(label, Counter()), self.totals[label] + vocab_size
+            score = math.log(docs / total_docs)
+            for token in tokens:
+                if token in self.vocab:
+                    score += math.log((counts[token] + 1) / denominator)
+            scores[label] = score
+        top = max(scores.values())
+        exp = {label: math.exp(score - top) for label, score in scores.items()}
+        norm = sum(exp.values())
+        return {label: value / norm for label, value in exp.items()}
+
+    def predict(self, tokens: List[str]) -> Optional[str]:
+        proba = self.predict_proba(tokens)
+        return max(proba, key=proba.get) if proba else None
+
+    def to_dict(self) -> Dict:
+        return {"docs": dict(self.docs), "tokens": {label: dict(c) for label, c in self.tokens.items()},
+                "totals": dict(self.totals), "vocab": sorted(self.vocab)}
+
+
+def _gemini_samples(entries: List[Dict]):
+    return [(features(e["error"], e.get("node_type")), "fixed" if resolved_stage(e) == "gemini" else "unfixed")
+            for e in entries if reached_gemini(e)]
+
+
+def _stage_samples(entries: List[Dict]):
+    return [(features(e["error"], e.get("node_type")), resolved_stage(e)) for e in entries]
+
+
+def train(entries: List[Dict]) -> Dict:
+    """Fit both models on heal log entries (oldest first, as load_examples returns them)."""
+    return {
+        "trained_at": datetime.now().isoformat(),
+        "trained_through": entries[-1].get("timestamp") if entries else None,  # Newest heal the model has seen
+        "examples": len(entries),
+        "gemini": NaiveBayes().fit(_gemini_samples(entries)).to_dict(),
+        "stage": NaiveBayes().fit(_stage_samples(entries)).to_dict(),
+    }
+
+
+def evaluate(model: Dict, entries: List[Dict]) -> Dict:
+    """Per-label precision/recall of both models (and the gate's effect) on `entries`."""
+    report = {}
+    for name, samples in (("gemini", _gemini_samples(entries)), ("stage", _stage_samples(entries))):
+        nb = NaiveBayes(model[name])
+        pairs = [(label, nb.predict(tokens)) for tokens, label in samples]
+        labels = sorted({label for label, _ in pairs} | {p for _, p in pairs if p})
+        per_label = {}
+        for label in labels:
+            tp = sum(1 for truth, pred in pairs if truth == label and pred == label)
+            predicted = sum(1 for _, pred in pairs if pred == label)
+            actual = sum(1 for truth, _ in pairs if truth == label)
+            per_label[label] = {"precision": round(tp / predicted, 3) if predicted else None,
+                                "recall": round(tp / actual, 3) if actual else None, "support": actual}
+        accuracy = sum(1 for truth, pred in pairs if truth == pred) / len(pairs) if pairs else None
+        report[name] = {"examples": len(pairs), "accuracy": round(accuracy, 3) if accuracy is not None else None,
+                        "labels": per_label}
+
+    # What the gate would have done: Gemini calls saved vs. fixes lost
+    gate = NaiveBayes(model["gemini"])
+    skipped = [label for tokens, label in _gemini_samples(entries)
+               if gate.predict_proba(tokens).get("fixed", 1.0) < FIXABILITY_THRESHOLD]
+    report["gate"] = {"threshold": FIXABILITY_THRESHOLD, "calls_skipped": len(skipped),
+                      "fixes_lost": skipped.count("fixed")}
+    return report
+
+
+def split_holdout(entries: List[Dict], fraction: float = HOLDOUT_FRACTION) -> Tuple[List[Dict], List[Dict]]:
+    """Time-ordered split: the newest `fraction` of heals is held out."""
+    cut = max(1, int(len(entries) * (1 - fraction))) if len(entries) > 1 else len(entries)
+    return entries[:cut], entries[cut:]
+
+
+# --- Runtime gate ---
+
+def save_model(model: Dict, path: Optional[str] = None) -> str:
+    path = path or FIXABILITY_MODEL_FILE
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(model, f)
+    return path
+
+
+def load_model() -> Optional[Dict]:
+    """The saved model (re-read when the file changes), or None if it hasn't been trained."""
+    with _lock:
+        try:
+            mtime = os.path.getmtime(FIXABILITY_MODEL_FILE)
+        except OSError:
+            return None
+        if mtime != _cache["mtime"]:
+            try:
+                with open(FIXABILITY_MODEL_FILE, "r") as f:
+                    model = json.load(f)
+                _cache.update(mtime=mtime, model={**model, "gemini": NaiveBayes(model["gemini"]),
+                                                  "stage": NaiveBayes(model["stage"])})
+            except (OSError, ValueError, KeyError) as e:
+                print(f"⚠️ Warning: Failed to load {FIXABILITY_MODEL_FILE}: {e}")
+                _cache.update(mtime=mtime, model=None)
+        return _cache["model"]
+
+
+def should_escalate(error_msg: str, node_type: Optional[str] = None) -> Tuple[bool, Optional[float]]:
+    """Whether to call Gemini for this error, and the model's P(fixed) if a model is available.
+
+    Without a trained model (or with too little Gemini history) every error is escalated.
+    """
+    model = load_model()
+    if not model:
+        return True, None
+    gemini = model["gemini"]
+    if sum(gemini.docs.values()) < MIN_TRAINING_EXAMPLES or len(gemini.docs) < 2:
+        return True, None
+    p_fixed = gemini.predict_proba(features(error_msg, node_type)).get("fixed", 0.0)
+    return p_fixed >= FIXABILITY_THRESHOLD, p_fixed
+
+
+def _print_report(title: str, report: Dict):
+    print(f"\n{title}")
+    for name in ("gemini", "stage"):
+        section = report[name]
+        print(f"  {name}: {section['examples']} examples, accuracy {section['accuracy']}")
+        for label, scores in section["labels"].items():
+            print(f"    {label:<14} precision {scores['precision']}  recall {scores['recall']}  (n={scores['support']})")
+    gate = report["gate"]
+    print(f"  gate @ {gate['threshold']}: {gate['calls_skipped']} Gemini calls skipped, {gate['fixes_lost']} fixes lost")
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "train"
+    if command == "predict" and len(sys.argv) > 2:
+        escalate, p_fixed = should_escalate(sys.argv[2], sys.argv[3] if len(sys.argv) > 3 else None)
+        model = load_model()
+        stage = model["stage"].predict(features(sys.argv[2])) if model else None
+        print(json.dumps({"escalate": escalate, "p_fixed": p_fixed, "expected_stage": stage}, indent=2))
+        sys.exit(0)
+
+    examples = load_examples()
+    if len(examples) < 2:
+        print(f"❌ Not enough heal history in {HEAL_LOG_FILE} ({len(examples)} entries)")
+        sys.exit(1)
+    if command == "evaluate":
+        model = load_model()
+        if not model:
+            print(f"❌ No model at {FIXABILITY_MODEL_FILE}; run 'train' first")
+            sys.exit(1)
+        # The saved model was fit on everything up to trained_through; only later heals are unseen
+        trained_through = model.get("trained_through") or ""
+        unseen = [e for e in examples if (e.get("timestamp") or "") > trained_through]
+        if unseen:
+            raw = {"gemini": model["gemini"].to_dict(), "stage": model["stage"].to_dict()}
+            _print_report(f"Saved model on the {len(unseen)} heals logged since {trained_through}:", evaluate(raw, unseen))
+        else:
+            train_set, holdout = split_holdout(examples)
+            _print_report(f"No heals since the saved model was trained; refit on {len(train_set)} heals, "
+                          f"evaluated on the newest {len(holdout)}:", evaluate(train(train_set), holdout))
+    else:
+        train_set, holdout = split_holdout(examples)
+        _print_report(f"Trained on {len(train_set)} heals, evaluated on the newest {len(holdout)}:",
+                      evaluate(train(train_set), holdout))
+        path = save_model(train(examples))
+        print(f"\n✅ Model trained on all {len(examples)} heals saved to {path}")
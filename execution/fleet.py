@@ -0,0 +1,226 @@
+"""
+Fleet mode: one agentic healer process monitoring many n8n instances.
+
+The fleet file (JSON) lists the instances to watch:
+
+    {
+      "max_workers": 8,
+      "defaults": {"interval": 30, "min_interval": 5, "max_interval": 120, "max_concurrency": 2},
+      "instances": [
+        {"name": "prod", "url": "https://n8n.example.com", "api_key_env": "PROD_N8N_KEY", "interval": 15},
+        {"name": "staging", "url": "http://staging:5678", "api_key": "...", "max_concurrency": 1, "rate_limit": 5}
+      ]
+    }
+
+Each instance's poll interval adapts between `min_interval` and `max_interval` to its execution volume and failure rate
+(see adaptive_poll.py), starting from `interval`. Each instance gets its own keep-alive connection pool (sized by `max_concurrency`, which also bounds
+its parallel heals) and its own processed-execution set; `rate_limit` optionally caps the calls per second
+sent to a small instance (default N8N_TENANT_RATE). The scheduler runs poll cycles on a shared
+worker pool in earliest-due-first order with at most one cycle per instance in flight, so a slow or
+hanging instance holds a single worker and only delays its own next poll. Between polls, each instance
+wakes every HEALER_DRAIN_INTERVAL seconds to heal failures pushed to its queue via /api/ingest/failure
+(pass ?instance=<name> there).
+
+Usage:
+    python -m execution.fleet fleet.json [--profile SECONDS]     (or HEALER_FLEET_CONFIG=fleet.json)
+"""
+
+import heapq
+import itertools
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from execution.adaptive_poll import MAX_POLL_INTERVAL, MIN_POLL_INTERVAL
+from execution.agentic_healer import (DRAIN_INTERVAL, ERROR_FETCH_CONCURRENCY, FLEET_CONFIG, METRICS_PORT, MONITOR_INTERVAL,
+                                      PROFILE_SECONDS, drain_queue, enable_profiling, get_leases, make_schedule,
+                                      poll_with_schedule)
+from execution.metrics import POLL_CYCLE_SECONDS, POLL_LAG_SECONDS, start_metrics_server
+from execution.n8n_client import configure_limits, configure_pool
+
+DEFAULT_MAX_CONCURRENCY = 2
+MAX_DEFAULT_WORKERS = 16  # Worker pool size when the file doesn't set max_workers
+
+
+def load_fleet_config(path: str) -> Dict:
+    """Read and validate a fleet file. Raises ValueError for missing credentials, duplicate names or a bad rate_limit."""
+    with open(path, "r") as f:
+        config = json.load(f)
+
+    defaults = {"interval": MONITOR_INTERVAL, "min_interval": MIN_POLL_INTERVAL, "max_interval": MAX_POLL_INTERVAL,
+                "max_concurrency": DEFAULT_MAX_CONCURRENCY, **config.get("defaults", {})}
+    instances = []
+    for raw in config.get("instances", []):
+        if raw.get("enabled", True) is False:
+            continue
+        entry = {**defaults, **raw}
+        name = entry.get("name") or entry.get("url")
+        api_key = entry.get("api_key") or (os.getenv(entry["api_key_env"]) if entry.get("api_key_env") else None)
+        if not entry.get("url") or not api_key:
+            raise ValueError(f"Fleet instance '{name}' needs a url and an api_key (or an api_key_env that is set)")
+        if any(i["name"] == name for i in instances):
+            raise ValueError(f"Duplicate fleet instance name '{name}'")
+        rate_limit = entry.get("rate_limit")
+        if rate_limit is not None and (isinstance(rate_limit, bool) or not isinstance(rate_limit, (int, float))
+                                       or rate_limit <= 0):
+            raise ValueError(f"Fleet instance '{name}' has an invalid rate_limit {rate_limit!r} (calls per second, > 0)")
+        instances.append({
+            "name": name,
+            "url": entry["url"].rstrip("/"),
+            "api_key": api_key,
+            "interval": float(entry["interval"]),
+            "min_interval": float(entry["min_interval"]),
+            "max_interval": float(entry["max_interval"]),
+            "max_concurrency": max(1, int(entry["max_concurrency"])),
+            "rate_limit": float(rate_limit) if rate_limit is not None else None,
+        })
+
+    if not instances:
+        raise ValueError(f"No enabled instances in fleet config {path}")
+    max_workers = int(config.get("max_workers") or min(len(instances), MAX_DEFAULT_WORKERS))
+    return {"max_workers": max(1, max_workers), "instances": instances}
+
+
+class FleetScheduler:
+    """Polls every instance on its own interval from a shared, bounded worker pool."""
+
+    def __init__(self, instances: List[Dict], max_workers: int):
+        self.instances = {i["name"]: i for i in instances}
+        self.processed = {name: set() for name in self.instances}
+        self.schedules = {name: make_schedule(i["interval"], i["min_interval"], i["max_interval"])
+                          for name, i in self.instances.items()}
+        self._last_start: Dict[str, float] = {}
+        self._next_poll: Dict[str, float] = {}
+        self.cycles = Counter()  # Completed poll cycles per instance
+        self.max_workers = max_workers
+        self._seq = itertools.count()  # Tie-breaker so equal due times keep config order
+        self._due = [(time.monotonic(), next(self._seq), name) for name in self.instances]
+        heapq.heapify(self._due)
+        self._in_flight = 0
+        self._stopped = False
+        self._cond = threading.Condition()
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+
+    def _run_cycle(self, instance: Dict, scheduled: float, max_cycles: Optional[int]):
+        """Poll the instance if its poll is due, otherwise just heal failures pushed to its queue."""
+        name = instance["name"]
+        started = time.monotonic()
+        next_poll = self._next_poll.get(name, 0.0)
+        try:
+            if started >= next_poll:
+                POLL_LAG_SECONDS.observe(max(0.0, started - max(scheduled, next_poll)), instance=name)
+                last_start = self._last_start.get(name)
+                self._last_start[name] = started
+                self._next_poll[name] = started + instance["interval"]
+                with POLL_CYCLE_SECONDS.time(instance=name):
+                    delay = poll_with_schedule(self.schedules[name], started - last_start if last_start else None,
+                                               instance["url"], instance["api_key"], self.processed[name], name,
+                                               heal_concurrency=instance["max_concurrency"])
+                # Next poll is one (adaptive) interval after this one started, like the single-instance loop
+                self._next_poll[name] = started + delay
+                with self._cond:
+                    self.cycles[name] += 1
+            else:
+                drain_queue(instance["url"], instance["api_key"], self.processed[name], name,
+                            heal_concurrency=instance["max_concurrency"])
+        except Exception as e:
+            print(f"⚠️  [{name}] {e}")
+        finally:
+            with self._cond:
+                self._in_flight -= 1
+                if max_cycles is None or self.cycles[name] < max_cycles:
+                    wake = min(self._next_poll[name], time.monotonic() + DRAIN_INTERVAL)
+                    heapq.heappush(self._due, (wake, next(self._seq), name))
+                self._cond.notify()
+
+    def _next_due(self) -> Optional[tuple]:
+        """Block until an instance is due; None once stopped or when nothing is left to run."""
+        with self._cond:
+            while not self._stopped:
+                if self._due:
+                    wait = self._due[0][0] - time.monotonic()
+                    if wait <= 0:
+                        self._in_flight += 1
+                        return heapq.heappop(self._due)
+                    self._cond.wait(wait)
+                elif self._in_flight:
+                    self._cond.wait()
+                else:
+                    return None
+            return None
+
+    def run(self, max_cycles: Optional[int] = None):
+        """Schedule poll cycles until stop() (or until each instance completed `max_cycles`)."""
+        pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="fleet")
+        try:
+            while True:
+                item = self._next_due()
+                if item is None:
+                    break
+                scheduled, _, name = item
+                pool.submit(self._run_cycle, self.instances[name], scheduled, max_cycles)
+        except KeyboardInterrupt:
+            self.stop()
+            raise
+        finally:
+            # Don't wait on a hanging instance when stopping
+            pool.shutdown(wait=not self._stopped, cancel_futures=self._stopped)
+
+
+def run_fleet(path: str, max_cycles: Optional[int] = None) -> FleetScheduler:
+    """Load the fleet file, set up per-instance pools and run the scheduler in this thread."""
+    config = load_fleet_config(path)
+    for instance in config["instances"]:
+        # Enough connections for the parallel error fetches and heals of one cycle
+        configure_pool(instance["url"], max(ERROR_FETCH_CONCURRENCY, instance["max_concurrency"] + 1),
+                       label=instance["name"])
+        if instance.get("rate_limit"):
+            configure_limits(instance["url"], rate=instance["rate_limit"])
+
+    print("=" * 60)
+    print("   🤖 Agentic Self-Annealing System for n8n (fleet mode)")
+    print(f"   Monitoring {len(config['instances'])} instances with {config['max_workers']} workers:")
+    for instance in config["instances"]:
+        print(f"   • {instance['name']}: {instance['url']} every {instance['min_interval']:g}-{instance['max_interval']:g}s "
+              f"(max {instance['max_concurrency']} parallel heals)")
+    if METRICS_PORT:
+        start_metrics_server(int(METRICS_PORT))
+        print(f"   Metrics: http://localhost:{METRICS_PORT}/metrics")
+    leases = get_leases()
+    if leases:
+        print(f"   Replica: {leases.replica_id} ({len(leases.ring.replicas)} live)")
+    print("=" * 60)
+
+    scheduler = FleetScheduler(config["instances"], config["max_workers"])
+    try:
+        scheduler.run(max_cycles)
+    except KeyboardInterrupt:
+        scheduler.stop()
+        if leases:
+            leases.leave()
+        print("\n\n🛑 Fleet healer stopped by user")
+    return scheduler
+
+
+if __name__ == "__main__":
+    # The fleet's own entry point: run via agentic_healer's __main__, this module would drive a second copy
+    # of agentic_healer (its queue, breaker and profiler settings) that the CLI flags never touched
+    args = [arg for arg in sys.argv[1:] if arg != "--fleet"]
+    if "--profile" in args:
+        index = args.index("--profile")
+        PROFILE_SECONDS = args[index + 1]
+        del args[index:index + 2]
+    path = args[0] if args else FLEET_CONFIG
+    if not path:
+        sys.exit("Usage: python -m execution.fleet fleet.json [--profile SECONDS]")
+    enable_profiling(float(PROFILE_SECONDS) if PROFILE_SECONDS else None)
+    run_fleet(path)
@@ -0,0 +1,241 @@
+"""
+Durable, crash-safe queue between failure detection and healing (SQLite).
+
+Detected failures are enqueued under a unique key (so re-polling the same execution is a no-op) and
+workers claim them with a visibility timeout. A claimed job that is neither acked nor nacked before
+the timeout (the process died mid-heal) becomes claimable again, which gives at-least-once delivery.
+Each claim carries a fresh `claim_token`: ack, nack and release only apply while the caller's claim is
+the current one, so a worker whose claim expired can't finish or dead-letter a job another worker has
+since reclaimed. Failed attempts are retried with a delay until `max_attempts`, then dead-lettered for
+inspection.
+
+Job statuses: pending -> done | dead. A pending job with a live claim is in flight.
+"""
+
+import json
+import os
+import sqlite3
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+HEAL_QUEUE_DB = os.getenv("HEAL_QUEUE_DB", ".tmp/heal_queue.db")  # Shared by the API (ingestion) and the healer
+DONE_RETENTION = 7 * 24 * 3600  # Keep acked jobs (the dedupe record) for a week
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    queue TEXT NOT NULL,
+    job_key TEXT NOT NULL UNIQUE,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    available_at REAL NOT NULL,
+    claimed_by TEXT,
+    claim_token TEXT,
+    claim_expires REAL,
+    last_error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_ready ON jobs (queue, status, available_at);
+"""
+
+
+class HealQueue:
+    """At-least-once job queue stored in a single SQLite file."""
+
+    def __init__(self, db_path: str, visibility_timeout: float = 600, max_attempts: int = 5):
+        self.db_path = db_path
+        self.visibility_timeout = visibility_timeout
+        self.max_attempts = max_attempts
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+            if "claim_token" not in columns:  # Queue files created before claim tokens
+                conn.execute("ALTER TABLE jobs ADD COLUMN claim_token TEXT")
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=10, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _job(row: sqlite3.Row) -> Dict:
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"])
+        return job
+
+    def enqueue(self, job_key: str, payload: Dict, queue: str = "heal", delay: float = 0) -> bool:
+        """Add a job unless one with `job_key` already exists. Returns True if it was added."""
+        now = time.time()
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO jobs (queue, job_key, payload, available_at, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (queue, job_key, json.dumps(payload, default=str), now + delay, now, now))
+            return cursor.rowcount == 1
+
+    def existing_keys(self, job_keys: List[str]) -> set:
+        """The subset of `job_keys` already in the queue, whatever their status."""
+        found = set()
+        with self._connect() as conn:
+            for i in range(0, len(job_keys), 500):
+                chunk = job_keys[i:i + 500]
+                rows = conn.execute(f"SELECT job_key FROM jobs WHERE job_key IN ({','.join('?' * len(chunk))})", chunk)
+                found.update(row["job_key"] for row in rows)
+        return found
+
+    def status(self, job_key: str) -> Optional[str]:
+        """A job's status (pending, done or dead), or None if the queue never had it."""
+        with self._connect() as conn:
+            row = conn.execute("SELECT status FROM jobs WHERE job_key = ?", (job_key,)).fetchone()
+        return row["status"] if row else None
+
+    def claim(self, worker_id: str, limit: int = 10, queue: str = "heal") -> List[Dict]:
+        """Claim up to `limit` ready jobs (oldest first) for `visibility_timeout` seconds.
+
+        Each job carries the `claim_token` to pass to ack, nack or release. Jobs whose claims expired with
+        no attempts left are dead-lettered instead of handed out again.
+        """
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute(
+                    "UPDATE jobs SET status = 'dead', last_error = COALESCE(last_error, 'visibility timeout expired'), "
+                    "updated_at = ? WHERE queue = ? AND status = 'pending' AND claim_expires < ? AND attempts >= ?",
+                    (now, queue, now, self.max_attempts))
+                rows = conn.execute(
+                    "SELECT * FROM jobs WHERE queue = ? AND status = 'pending' AND available_at <= ? "
+                    "AND (claim_expires IS NULL OR claim_expires < ?) ORDER BY id LIMIT ?",
+                    (queue, now, now, limit)).fetchall()
+                tokens = {row["id"]: uuid.uuid4().hex for row in rows}
+                conn.executemany(
+                    "UPDATE jobs SET attempts = attempts + 1, claimed_by = ?, claim_token = ?, claim_expires = ?, "
+                    "updated_at = ? WHERE id = ?",
+                    [(worker_id, token, now + self.visibility_timeout, now, job_id) for job_id, token in tokens.items()])
+                conn.execute("COMMIT")
+            except sqlite3.Error:
+                conn.execute("ROLLBACK")
+                raise
+        jobs = [self._job(row) for row in rows]
+        for job in jobs:
+            job["attempts"] += 1
+            job["claim_token"] = tokens[job["id"]]
+        return jobs
+
+    def ack(self, job_id: int, claim_token: str) -> bool:
+        """Mark a job as done. Returns False if the claim was lost (it expired and the job was reclaimed)."""
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = 'done', claimed_by = NULL, claim_token = NULL, claim_expires = NULL, "
+                "updated_at = ? WHERE id = ? AND status = 'pending' AND claim_token = ?", (time.time(), job_id, claim_token))
+            return cursor.rowcount == 1
+
+    def nack(self, job_id: int, claim_token: str, error: str, delay: float = 30) -> str:
+        """Record a failed attempt: retry after `delay`, or dead-letter once attempts run out.
+
+        Returns the new status, or "lost" if the claim was lost (the job is left to its current holder).
+        """
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute("SELECT attempts FROM jobs WHERE id = ? AND status = 'pending' AND claim_token = ?",
+                                   (job_id, claim_token)).fetchone()
+                if row is None:
+                    conn.execute("ROLLBACK")
+                    return "lost"
+                status = "dead" if row["attempts"] >= self.max_attempts else "pending"
+                conn.execute(
+                    "UPDATE jobs SET status = ?, last_error = ?, available_at = ?, claimed_by = NULL, claim_token = NULL, "
+                    "claim_expires = NULL, updated_at = ? WHERE id = ?", (status, error[:2000], now + delay, now, job_id))
+                conn.execute("COMMIT")
+            except sqlite3.Error:
+                conn.execute("ROLLBACK")
+                raise
+        return status
+
+    def release(self, job_id: int, claim_token: str, delay: float = 0) -> bool:
+        """Hand a claimed job back without counting the attempt (e.g. it couldn't be started).
+
+        Returns False if the claim was lost.
+        """
+        now = time.time()
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET attempts = MAX(attempts - 1, 0), available_at = ?, claimed_by = NULL, claim_token = NULL, "
+                "claim_expires = NULL, updated_at = ? WHERE id = ? AND status = 'pending' AND claim_token = ?",
+                (now + delay, now, job_id, claim_token))
+            return cursor.rowcount == 1
+
+    def release_claims(self, queue: Optional[str] = None) -> int:
+        """Make every in-flight job claimable now. Only safe when no other worker shares the file."""
+        now = time.time()
+        query = ("UPDATE jobs SET claimed_by = NULL, claim_token = NULL, claim_expires = NULL, updated_at = ? "
+                 "WHERE status = 'pending' AND claim_expires IS NOT NULL")
+        params = [now]
+        if queue:
+            query += " AND queue = ?"
+            params.append(queue)
+        with self._connect() as conn:
+            return conn.execute(query, params).rowcount
+
+    def requeue_dead(self, job_id: int) -> bool:
+        """Give a dead-lettered job a fresh set of attempts."""
+        now = time.time()
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = 'pending', attempts = 0, available_at = ?, updated_at = ? "
+                "WHERE id = ? AND status = 'dead'", (now, now, job_id))
+            return cursor.rowcount == 1
+
+    def dead_letters(self, limit: int = 50, queue: Optional[str] = None) -> List[Dict]:
+        query, params = "SELECT * FROM jobs WHERE status = 'dead'", []
+        if queue:
+            query += " AND queue = ?"
+            params.append(queue)
+        with self._connect() as conn:
+            rows = conn.execute(query + " ORDER BY updated_at DESC LIMIT ?", params + [limit]).fetchall()
+        return [self._job(row) for row in rows]
+
+    def stats(self, queue: Optional[str] = None) -> Dict[str, int]:
+        """Job counts: pending (ready or waiting to retry), in_flight, done and dead."""
+        now = time.time()
+        where, params = ("WHERE queue = ?", [queue]) if queue else ("", [])
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT "
+                "SUM(status = 'pending' AND (claim_expires IS NULL OR claim_expires < ?)), "
+                "SUM(status = 'pending' AND claim_expires >= ?), "
+                "SUM(status = 'done'), SUM(status = 'dead') FROM jobs " + where, [now, now] + params).fetchone()
+        return {name: int(value or 0) for name, value in zip(("pending", "in_flight", "done", "dead"), row)}
+
+    def purge_done(self, older_than: float = DONE_RETENTION) -> int:
+        with self._connect() as conn:
+            return conn.execute("DELETE FROM jobs WHERE status = 'done' AND updated_at < ?",
+                                (time.time() - older_than,)).rowcount
+
+
+if __name__ == "__main__":
+    # Inspect the queue: python -m execution.heal_queue [stats|dead|requeue <job_id>]
+    import sys
+    queue = HealQueue(HEAL_QUEUE_DB)
+    command = sys.argv[1] if len(sys.argv) > 1 else "stats"
+    if command == "dead":
+        for job in queue.dead_letters():
+            print(f"{job['id']}\t{job['job_key']}\tattempts={job['attempts']}\t{job['last_error']}")
+    elif command == "requeue" and len(sys.argv) > 2:
+        print("✅ Requeued" if queue.requeue_dead(int(sys.argv[2])) else "❌ No dead job with that id")
+    else:
+        print(json.dumps(queue.stats(), indent=2))
@@ -0,0 +1,158 @@
+"""
+Lease-based work partitioning so several agentic healer replicas can run side by side.
+
+Replicas share one SQLite file (HEALER_LEASE_DB). Each replica heartbeats into it; the live replicas
+form a consistent hash ring, and a workflow is handled only by the replica it hashes to. Before healing,
+the owner also takes a per-workflow lease (renewed by the heartbeat) so two replicas never update the
+same workflow at once, even while the ring is changing. Healed execution ids are recorded in the same
+file, so a replica that takes over a dead replica's workflows doesn't heal their old failures again.
+
+When a replica dies its heartbeat goes stale: after `ttl` seconds it drops off the ring, its workflows
+rehash to the survivors and its leases expire.
+"""
+
+import bisect
+import hashlib
+import os
+import socket
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import List, Optional
+
+VIRTUAL_NODES = 64  # Points per replica on the hash ring (smooths the split)
+HEALED_RETENTION = 7 * 24 * 3600  # Forget healed execution ids after a week
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS replicas (replica_id TEXT PRIMARY KEY, heartbeat_at REAL NOT NULL);
+CREATE TABLE IF NOT EXISTS leases (lease_key TEXT PRIMARY KEY, replica_id TEXT NOT NULL, expires_at REAL NOT NULL);
+CREATE TABLE IF NOT EXISTS healed (execution_key TEXT PRIMARY KEY, replica_id TEXT NOT NULL, healed_at REAL NOT NULL);
+"""
+
+
+def default_replica_id() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+def _hash(value: str) -> int:
+    return int.from_bytes(hashlib.md5(value.encode()).digest()[:8], "big")
+
+
+class HashRing:
+    """Consistent hash ring: adding or removing a replica only moves that replica's share of keys."""
+
+    def __init__(self, replicas: List[str], virtual_nodes: int = VIRTUAL_NODES):
+        self.replicas = sorted(replicas)
+        points = sorted((_hash(f"{replica}#{i}"), replica) for replica in self.replicas for i in range(virtual_nodes))
+        self._hashes = [h for h, _ in points]
+        self._owners = [r for _, r in points]
+
+    def owner(self, key: str) -> Optional[str]:
+        if not self._hashes:
+            return None
+        index = bisect.bisect(self._hashes, _hash(key)) % len(self._hashes)
+        return self._owners[index]
+
+
+class LeaseManager:
+    """One replica's view of the shared lease database."""
+
+    def __init__(self, db_path: str, replica_id: Optional[str] = None, ttl: float = 60):
+        self.db_path = db_path
+        self.replica_id = replica_id or default_replica_id()
+        self.ttl = ttl
+        self.ring = HashRing([self.replica_id])
+        self._stop = threading.Event()
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=10, isolation_level=None)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            yield conn
+        finally:
+            conn.close()
+
+    # --- Membership ---
+
+    def heartbeat(self) -> List[str]:
+        """Announce this replica, renew its leases and refresh the ring. Returns the live replicas."""
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("INSERT INTO replicas (replica_id, heartbeat_at) VALUES (?, ?) "
+                         "ON CONFLICT(replica_id) DO UPDATE SET heartbeat_at = excluded.heartbeat_at",
+                         (self.replica_id, now))
+            conn.execute("UPDATE leases SET expires_at = ? WHERE replica_id = ?", (now + self.ttl, self.replica_id))
+            conn.execute("DELETE FROM replicas WHERE heartbeat_at < ?", (now - 10 * self.ttl,))
+            conn.execute("DELETE FROM healed WHERE healed_at < ?", (now - HEALED_RETENTION,))
+            live = [row[0] for row in conn.execute(
+                "SELECT replica_id FROM replicas WHERE heartbeat_at >= ?", (now - self.ttl,))]
+        if sorted(live) != self.ring.replicas:
+            self.ring = HashRing(live)
+        return self.ring.replicas
+
+    def start_heartbeat(self) -> threading.Thread:
+        """Heartbeat every ttl/3 on a daemon thread."""
+        self.heartbeat()
+
+        def run():
+            while not self._stop.wait(self.ttl / 3):
+                try:
+                    self.heartbeat()
+                except sqlite3.Error as e:
+                    print(f"⚠️ Warning: Lease heartbeat failed: {e}")
+
+        thread = threading.Thread(target=run, name="lease-heartbeat", daemon=True)
+        thread.start()
+        return thread
+
+    def leave(self):
+        """Stop heartbeating and hand this replica's workflows to the others immediately."""
+        self._stop.set()
+        with self._connect() as conn:
+            conn.execute("DELETE FROM replicas WHERE replica_id = ?", (self.replica_id,))
+            conn.execute("DELETE FROM leases WHERE replica_id = ?", (self.replica_id,))
+
+    def owns(self, key: str) -> bool:
+        return self.ring.owner(key) == self.replica_id
+
+    # --- Leases ---
+
+    def acquire(self, key: str) -> bool:
+        """Take (or keep) the lease on `key`. Fails while another replica holds an unexpired lease."""
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute("SELECT replica_id, expires_at FROM leases WHERE lease_key = ?", (key,)).fetchone()
+                if row and row[0] != self.replica_id and row[1] > now:
+                    conn.execute("ROLLBACK")
+                    return False
+                conn.execute("INSERT OR REPLACE INTO leases (lease_key, replica_id, expires_at) VALUES (?, ?, ?)",
+                             (key, self.replica_id, now + self.ttl))
+                conn.execute("COMMIT")
+                return True
+            except sqlite3.Error:
+                conn.execute("ROLLBACK")
+                raise
+
+    def release(self, key: str):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM leases WHERE lease_key = ? AND replica_id = ?", (key, self.replica_id))
+
+    # --- Shared processed set ---
+
+    def is_healed(self, execution_key: str) -> bool:
+        with self._connect() as conn:
+            return conn.execute("SELECT 1 FROM healed WHERE execution_key = ?", (execution_key,)).fetchone() is not None
+
+    def mark_healed(self, execution_key: str):
+        with self._connect() as conn:
+            conn.execute("INSERT OR IGNORE INTO healed (execution_key, replica_id, healed_at) VALUES (?, ?, ?)",
+                         (execution_key, self.replica_id, time.time()))
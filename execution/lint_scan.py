@@ -0,0 +1,305 @@
+"""
+Proactive lint scan of every workflow's Code nodes.
+
+Pages through all workflows on an n8n instance and parse-checks every Code node with `node --check`
+(the script wrapped in an async function, as n8n runs it), so a broken script is found before it fails in
+production. The healer's heuristics (`fix_javascript_syntax`) are only tried on scripts that don't parse,
+and a fix is only offered when the fixed script parses; valid scripts are never touched. Without a
+`node` binary the scan reports that the parse check is unavailable and finds (and fixes) nothing.
+With --fix, problems are fixed the way a heal would: through `save_workflow` (snapshot + conflict check)
+and a publish.
+
+Repeated scans are cheap: a workflow whose updatedAt hasn't changed isn't refetched, and each
+script is analysed once per distinct content (sha256, also keyed by the checks' own source and the node
+version, so changing the rules invalidates the cache). Uncached scripts are analysed in a process pool.
+
+Usage:
+    python -m execution.lint_scan [--fix] [--workers N] [--json]
+"""
+
+import hashlib
+import inspect
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from difflib import SequenceMatcher
+from typing import Dict, List, Optional, Tuple
+
+try:
+    from execution.core_healer import CODE_NODE_TYPE, fix_javascript_syntax, get_workflow, publish_workflow, save_workflow
+    from execution.n8n_client import n8n_request
+except ImportError:
+    sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+    from core_healer import CODE_NODE_TYPE, fix_javascript_syntax, get_workflow, publish_workflow, save_workflow
+    from n8n_client import n8n_request
+
+N8N_URL = os.getenv("N8N_API_URL")
+N8N_KEY = os.getenv("N8N_API_KEY")
+LINT_CACHE_FILE = os.getenv("LINT_CACHE_FILE", ".tmp/lint_cache.json")
+LINT_WORKERS = int(os.getenv("LINT_WORKERS", str(os.cpu_count() or 2)))
+FETCH_CONCURRENCY = 5  # Parallel workflow fetches
+INLINE_THRESHOLD = 8  # Fewer uncached scripts than this are linted in-process (pool startup costs more)
+NODE_BINARY = os.getenv("NODE_BINARY") or shutil.which("node")  # Parse checker; None disables the scan
+PARSE_TIMEOUT = 10  # Seconds per `node --check`
+
+_NODE_ERROR_RE = re.compile(r"^\w*Error: .*$", re.MULTILINE)
+_NODE_LINE_RE = re.compile(r":(\d+)\n")
+
+_versions: Dict[str, Optional[str]] = {}  # node and rules versions, computed on first use (not at import)
+
+
+def _node_version() -> Optional[str]:
+    """`node --version` (None without node), run once per process."""
+    if "node" not in _versions:
+        version = None
+        if NODE_BINARY:
+            try:
+                version = subprocess.run([NODE_BINARY, "--version"], capture_output=True, text=True,
+                                         timeout=PARSE_TIMEOUT).stdout.strip() or None
+            except (OSError, subprocess.SubprocessError):
+                pass
+        _versions["node"] = version
+    return _versions["node"]
+
+
+def check_syntax(code: str) -> Tuple[Optional[bool], Optional[str]]:
+    """(parses, error) for a Code node script: (None, None) when node is unavailable.
+
+    The script is wrapped in an async function, as n8n runs it (top-level return/await are valid).
+    """
+    if not NODE_BINARY:
+        return None, None
+    fd, path = tempfile.mkstemp(prefix="heas-lint-", suffix=".js")
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(f"(async function () {{\n{code}\n}})\n")
+        proc = subprocess.run([NODE_BINARY, "--check", path], capture_output=True, text=True, timeout=PARSE_TIMEOUT)
+    except (OSError, subprocess.SubprocessError):
+        return None, None
+    finally:
+        os.remove(path)
+    if proc.returncode == 0:
+        return True, None
+    message = _NODE_ERROR_RE.search(proc.stderr)
+    line = _NODE_LINE_RE.search(proc.stderr)
+    error = message.group(0) if message else "SyntaxError"
+    return False, f"line {int(line.group(1)) - 1}: {error}" if line else error
+
+
+def _rules_version() -> str:
+    """Hash of the checks' source and the node version: cached results from other rules don't count."""
+    if "rules" not in _versions:
+        _versions["rules"] = hashlib.sha256("\0".join([
+            inspect.getsource(fix_javascript_syntax), inspect.getsource(check_syntax), _node_version() or "",
+        ]).encode()).hexdigest()[:12]
+    return _versions["rules"]
+
+
+def code_hash(code: str) -> str:
+    return hashlib.sha256(f"{_rules_version()}\0{code}".encode()).hexdigest()
+
+
+def lint_code(code: str) -> Dict:
+    """Parse-check one script; if it doesn't parse, the lines a fix would change and whether that fix parses."""
+    parses, error = check_syntax(code)
+    if parses is not False:
+        return {"syntax_error": None, "issues": [], "fixable": False}
+    fixed, modified = fix_javascript_syntax(code)
+    issues = []
+    if modified and check_syntax(fixed)[0]:
+        before, after = code.splitlines(), fixed.splitlines()
+        for tag, i1, i2, j1, j2 in SequenceMatcher(None, before, after, autojunk=False).get_opcodes():
+            if tag != "equal":
+                issues.append({"line": i1 + 1, "before": "\n".join(before[i1:i2]), "after": "\n".join(after[j1:j2])})
+    return {"syntax_error": error, "issues": issues, "fixable": bool(issues)}
+
+
+def _lint_batch(codes: List[str]) -> List[Dict]:
+    """Process pool entry point (one task per chunk of scripts)."""
+    return [lint_code(code) for code in codes]
+
+
+# --- Cache ---
+
+def _load_cache() -> Dict:
+    try:
+        with open(LINT_CACHE_FILE, "r") as f:
+            cache = json.load(f)
+        if cache.get("rules") == _rules_version():
+            return cache
+    except (OSError, ValueError):
+        pass
+    return {"rules": _rules_version(), "workflows": {}, "results": {}}
+
+
+def _save_cache(cache: Dict):
+    directory = os.path.dirname(LINT_CACHE_FILE)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{LINT_CACHE_FILE}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(cache, f)
+    os.replace(tmp_path, LINT_CACHE_FILE)
+
+
+# --- Scan ---
+
+def list_workflows(n8n_url: str, n8n_key: str) -> List[Dict]:
+    """Every workflow on the instance (follows nextCursor)."""
+    workflows, params = [], {"limit": 250}
+    while True:
+        resp = n8n_request("GET", n8n_url, n8n_key, "/workflows", params=params)
+        if resp.status_code != 200:
+            raise RuntimeError(f"Failed to list workflows (Status {resp.status_code})")
+        body = resp.json()
+        workflows.extend(body.get("data", []))
+        if not body.get("nextCursor") or not body.get("data"):
+            return workflows
+        params = {**params, "cursor": body["nextCursor"]}
+
+
+def _lint_pending(codes: List[str], workers: int) -> List[Dict]:
+    if len(codes) < INLINE_THRESHOLD or workers <= 1:
+        return _lint_batch(codes)
+    chunk = max(1, len(codes) // (workers * 4))
+    chunks = [codes[i:i + chunk] for i in range(0, len(codes), chunk)]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return [result for batch in pool.map(_lint_batch, chunks) for result in batch]
+
+
+def scan_workflows(n8n_url: str = None, n8n_key: str = None, fix: bool = False,
+                   workers: int = LINT_WORKERS) -> Dict:
+    """Lint every Code node on the instance; with `fix`, apply and publish the fixes.
+
+    Returns {"workflows", "code_nodes", "analyzed", "parse_check", "findings": [...], "fixed": [...], "errors": [...]}.
+    Without node, `parse_check` is "unavailable" and nothing is scanned.
+    """
+    url, key = n8n_url or N8N_URL, n8n_key or N8N_KEY
+    if not url or not key:
+        raise ValueError("n8n URL and API Key are required (or set N8N_API_URL/N8N_API_KEY).")
+    node_version = _node_version()
+    if not node_version:
+        return {"workflows": 0, "code_nodes": 0, "analyzed": 0, "parse_check": "unavailable",
+                "findings": [], "fixed": [], "errors": []}
+    cache = _load_cache()
+    summaries = list_workflows(url, key)
+
+    # Only fetch workflows that changed since the last scan (listings may already include nodes).
+    # updatedAt first: it is in every listing, versionId isn't.
+    def version(workflow: Dict) -> Optional[str]:
+        return workflow.get("updatedAt") or workflow.get("versionId")
+
+    def cache_key(workflow_id) -> str:
+        return f"{url.rstrip('/')}|{workflow_id}"
+
+    to_fetch = [s for s in summaries if "nodes" not in s and (
+        version(s) is None or cache["workflows"].get(cache_key(s.get("id")), {}).get("version") != version(s))]
+    with ThreadPoolExecutor(max_workers=FETCH_CONCURRENCY) as pool:
+        fetched = dict(zip([s.get("id") for s in to_fetch], pool.map(lambda s: get_workflow(s.get("id"), url, key), to_fetch)))
+
+    errors, nodes_by_workflow, workflows = [], {}, {}
+    for summary in summaries:
+        workflow_id = summary.get("id")
+        workflow = summary if "nodes" in summary else fetched.get(workflow_id)
+        if workflow_id in fetched and workflow is None:
+            errors.append({"workflow_id": workflow_id, "error": "could not fetch workflow"})
+            continue
+        if workflow is None:  # Unchanged since the last scan
+            nodes_by_workflow[workflow_id] = cache["workflows"][cache_key(workflow_id)]["nodes"]
+            continue
+        workflows[workflow_id] = workflow
+        nodes_by_workflow[workflow_id] = {
+            node.get("name"): code_hash(node["parameters"]["jsCode"])
+            for node in workflow.get("nodes", [])
+            if node.get("type") == CODE_NODE_TYPE and node.get("parameters", {}).get("jsCode")
+        }
+        cache["workflows"][cache_key(workflow_id)] = {"version": version(workflow), "name": workflow.get("name"),
+                                                      "nodes": nodes_by_workflow[workflow_id]}
+
+    # Analyse each distinct uncached script once
+    pending = {}
+    for workflow_id, workflow in workflows.items():
+        for node in workflow.get("nodes", []):
+            digest = nodes_by_workflow[workflow_id].get(node.get("name"))
+            if digest and digest not in cache["results"] and digest not in pending:
+                pending[digest] = node["parameters"]["jsCode"]
+    cache["results"].update(zip(pending, _lint_pending(list(pending.values()), workers)))
+
+    findings = []
+    for workflow_id, nodes in nodes_by_workflow.items():
+        name = cache["workflows"].get(cache_key(workflow_id), {}).get("name")
+        for node_name, digest in nodes.items():
+            result = cache["results"].get(digest)
+            if result and result["syntax_error"]:
+                findings.append({"workflow_id": workflow_id, "workflow_name": name, "node": node_name, **result})
+
+    fixed = []
+    if fix:
+        for workflow_id in sorted({f["workflow_id"] for f in findings if f["fixable"]}, key=str):
+            fixed.extend(_fix_workflow(workflow_id, workflows.get(workflow_id), url, key, errors))
+
+    # Forget workflows that no longer exist and results no workflow references
+    live = {cache_key(s.get("id")) for s in summaries}
+    cache["workflows"] = {k: v for k, v in cache["workflows"].items() if k in live or not k.startswith(f"{url.rstrip('/')}|")}
+    referenced = {digest for entry in cache["workflows"].values() for digest in entry["nodes"].values()}
+    cache["results"] = {digest: result for digest, result in cache["results"].items() if digest in referenced}
+    _save_cache(cache)
+
+    code_nodes = sum(len(nodes) for nodes in nodes_by_workflow.values())
+    return {"workflows": len(summaries), "code_nodes": code_nodes, "analyzed": len(pending),
+            "parse_check": node_version, "findings": findings, "fixed": fixed, "errors": errors}
+
+
+def _fix_workflow(workflow_id: str, workflow: Optional[Dict], url: str, key: str, errors: List[Dict]) -> List[Dict]:
+    """Apply the syntax fixes to the workflow's Code nodes that don't parse (if the fix parses) and publish it."""
+    workflow = workflow or get_workflow(workflow_id, url, key)
+    if not workflow:
+        errors.append({"workflow_id": workflow_id, "error": "could not fetch workflow to fix"})
+        return []
+    update = json.loads(json.dumps({field: workflow.get(field) for field in ("name", "nodes", "connections", "settings")}))
+    fixed_nodes = []
+    for node in update["nodes"]:
+        code = node.get("parameters", {}).get("jsCode") if node.get("type") == CODE_NODE_TYPE else None
+        if code and lint_code(code)["fixable"]:
+            node["parameters"]["jsCode"] = fix_javascript_syntax(code)[0]
+            fixed_nodes.append(node.get("name"))
+    if not fixed_nodes:
+        return []
+    status, message, snapshot_id = save_workflow(workflow_id, workflow, update, url, key)
+    if status == "updated":
+        publish_workflow(workflow_id, url, key)
+    elif status != "unchanged":
+        errors.append({"workflow_id": workflow_id, "error": message})
+        return []
+    return [{"workflow_id": workflow_id, "nodes": fixed_nodes, "status": status, "snapshot_id": snapshot_id}]
+
+
+def format_report(report: Dict) -> str:
+    if report.get("parse_check") == "unavailable":
+        return "⚠️ Lint scan skipped: no `node` binary to parse-check scripts with (install Node.js or set NODE_BINARY)."
+    lines = [f"🔍 Scanned {report['code_nodes']} Code nodes in {report['workflows']} workflows "
+             f"({report['analyzed']} analysed, the rest cached)."]
+    if not report["findings"]:
+        lines.append("✅ No problems found.")
+    for finding in report["findings"]:
+        lines.append(f"\n⚠️ {finding['workflow_name']} (ID: {finding['workflow_id']}) → `{finding['node']}`: "
+                     f"{finding['syntax_error']}" + ("" if finding["fixable"] else " (no automatic fix)"))
+        for issue in finding["issues"]:
+            lines.append(f"   line {issue['line']}: {issue['before'].strip()!r} → {issue['after'].strip()!r}")
+    for fix in report["fixed"]:
+        lines.append(f"\n✅ Fixed {', '.join(fix['nodes'])} in workflow {fix['workflow_id']} ({fix['status']}, "
+                     f"snapshot {fix['snapshot_id']})")
+    for error in report["errors"]:
+        lines.append(f"\n❌ Workflow {error['workflow_id']}: {error['error']}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    workers = int(sys.argv[sys.argv.index("--workers") + 1]) if "--workers" in sys.argv else LINT_WORKERS
+    report = scan_workflows(fix="--fix" in sys.argv, workers=workers)
+    print(json.dumps(report, indent=2) if "--json" in sys.argv else format_report(report))
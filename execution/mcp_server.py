@@ -1,17 +1,25 @@
 import os
 import json
-import requests
-from typing import Any, Dict, List, Optional
+import time
+import asyncio
+import httpx
+from typing import Any, Dict, List, Optional, Tuple
 from mcp.server.fastmcp import FastMCP
 from dotenv import load_dotenv
 
 # Import shared core healer
 try:
-    from execution.core_healer import heal_workflow, get_workflow
+    from execution.core_healer import heal_workflow, is_failed_execution
+    from execution.execution_fetch import describe_missing_error, fetch_execution_failure
+    from execution.lint_scan import format_report, scan_workflows
+    from execution.workflow_graph import graph_for
 except ImportError:
     import sys
     sys.path.append(os.path.dirname(os.path.abspath(__file__)))
-    from core_healer import heal_workflow, get_workflow
+    from core_healer import heal_workflow, is_failed_execution
+    from execution_fetch import describe_missing_error, fetch_execution_failure
+    from lint_scan import format_report, scan_workflows
+    from workflow_graph import graph_for
 
 load_dotenv()
 
@@ -20,77 +28,245 @@ mcp = FastMCP("N8N Healer")
 
 N8N_URL = os.getenv("N8N_API_URL")
 N8N_KEY = os.getenv("N8N_API_KEY")
-HEADERS = {"X-N8N-API-KEY": N8N_KEY}
+MAX_RESPONSE_CHARS = int(os.getenv("MCP_MAX_RESPONSE_CHARS", "20000"))  # Keep tool output out of megabyte territory
+WORKFLOW_CACHE_TTL = int(os.getenv("MCP_WORKFLOW_CACHE_TTL", "60"))  # Seconds a fetched workflow is reused
+ERROR_FETCH_CONCURRENCY = int(os.getenv("MCP_ERROR_FETCH_CONCURRENCY", "5"))  # Parallel execution-detail fetches
+
+# One pooled client shared by every tool call (created lazily inside the server's event loop)
+_client: Optional[httpx.AsyncClient] = None
+_workflow_cache: Dict[str, tuple] = {}  # workflow_id -> (fetched_at, workflow_json)
+
+
+def get_client() -> httpx.AsyncClient:
+    """Return the shared keep-alive client for the configured n8n instance."""
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            base_url=f"{N8N_URL}/api/v1",
+            headers={"X-N8N-API-KEY": N8N_KEY or ""},
+            timeout=10,
+            limits=httpx.Limits(max_connections=10, max_keepalive_connections=5),
+        )
+    return _client
+
+
+async def fetch_workflow(workflow_id: str, refresh: bool = False) -> Optional[Dict]:
+    """Fetch a workflow, serving repeated lookups from a short-lived cache."""
+    cached = _workflow_cache.get(workflow_id)
+    if cached and not refresh and time.monotonic() - cached[0] < WORKFLOW_CACHE_TTL:
+        return cached[1]
+    resp = await get_client().get(f"/workflows/{workflow_id}")
+    if resp.status_code != 200:
+        return None
+    workflow = resp.json()
+    _workflow_cache[workflow_id] = (time.monotonic(), workflow)
+    return workflow
+
+
+async def fetch_failure(execution_id: str, semaphore: asyncio.Semaphore) -> Tuple[str, Optional[str]]:
+    """Fetch one execution's error message and failing node (concurrency bounded by semaphore).
+
+    Execution data can be huge, so it is streamed with a size cap (see execution_fetch) rather than
+    loaded through the async client.
+    """
+    async with semaphore:
+        try:
+            result = await asyncio.to_thread(fetch_execution_failure, N8N_URL, N8N_KEY, execution_id)
+        except Exception as e:
+            return f"Could not fetch details: {e}", None
+    return result["error"] or describe_missing_error(result), result["failing_node"]
+
+
+def bound_output(text: str, hint: str = "") -> str:
+    """Truncate a tool response to MAX_RESPONSE_CHARS, telling the model how to get the rest."""
+    if len(text) <= MAX_RESPONSE_CHARS:
+        return text
+    note = f"\n\n… truncated ({len(text)} chars total). {hint}".rstrip()
+    return text[:MAX_RESPONSE_CHARS - len(note)] + note
+
+
+def summarize_workflow(workflow: Dict) -> str:
+    """Compact view of a workflow: nodes with types and the connection edges, no parameters."""
+    nodes = workflow.get("nodes", [])
+    status = "🟢 Active" if workflow.get("active") else "⚪ Inactive"
+    output = [
+        f"### {workflow.get('name')} (ID: `{workflow.get('id')}`) {status}",
+        f"Updated: {workflow.get('updatedAt')} | Nodes: {len(nodes)}",
+        "",
+        "**Nodes:**",
+    ]
+    for node in nodes:
+        disabled = " (disabled)" if node.get("disabled") else ""
+        output.append(f"- `{node.get('name')}` — {node.get('type')}{disabled}")
+
+    output.extend(["", "**Connections:**"])
+    for source, outputs in workflow.get("connections", {}).items():
+        for output_type, branches in outputs.items():
+            for index, branch in enumerate(branches or []):
+                targets = ", ".join(f"`{link.get('node')}`" for link in branch or [])
+                if targets:
+                    suffix = f" [{output_type}:{index}]" if output_type != "main" or len(branches) > 1 else ""
+                    output.append(f"- `{source}`{suffix} → {targets}")
+    return "\n".join(output)
+
 
 @mcp.tool()
-def list_n8n_workflows() -> str:
+async def list_n8n_workflows(cursor: Optional[str] = None, limit: int = 50) -> str:
     """
-    List all n8n workflows with their current status.
-    Returns a formatted string containing workflow names and IDs.
+    List n8n workflows with their current status, one page at a time.
+    Pass the returned cursor to fetch the next page.
     """
-    url = f"{N8N_URL}/api/v1/workflows"
+    params = {"limit": max(1, min(limit, 250))}
+    if cursor:
+        params["cursor"] = cursor
     try:
-        resp = requests.get(url, headers=HEADERS, timeout=10)
+        resp = await get_client().get("/workflows", params=params)
         if resp.status_code == 200:
-            workflows = resp.json().get("data", [])
+            body = resp.json()
+            workflows = body.get("data", [])
             output = ["### N8N Workflows", ""]
             for wf in workflows:
                 status = "🟢 Active" if wf.get("active") else "⚪ Inactive"
                 output.append(f"- **{wf.get('name')}** (ID: `{wf.get('id')}`) {status}")
-            return "\n".join(output)
+            if body.get("nextCursor"):
+                output.extend(["", f"More workflows available. Next cursor: `{body['nextCursor']}`"])
+            return bound_output("\n".join(output), "Request a smaller limit.")
         return f"Error fetching workflows: Status {resp.status_code}"
     except Exception as e:
         return f"Exception: {str(e)}"
 
 @mcp.tool()
-def get_failed_n8n_executions(limit: int = 10) -> str:
+async def get_failed_n8n_executions(limit: int = 10, cursor: Optional[str] = None) -> str:
     """
-    Get the most recent failed N8N executions.
+    Get the most recent failed N8N executions, with the error message of each.
+    Pass the returned cursor to look further back.
     """
-    url = f"{N8N_URL}/api/v1/executions?limit={limit}&includeData=false"
+    limit = max(1, min(limit, 100))
+    params = {"status": "error", "limit": limit, "includeData": "false"}
+    if cursor:
+        params["cursor"] = cursor
+    failed = []
+    next_cursor = None
     try:
-        resp = requests.get(url, headers=HEADERS, timeout=10)
-        if resp.status_code == 200:
-            executions = resp.json().get("data", [])
-            failed = [e for e in executions if not e.get("finished", False)]
-            
-            if not failed:
-                return "No failed executions detected in the last few runs."
-                
-            output = ["### Detected Failures", ""]
-            for exc in failed:
-                output.append(f"- **Execution ID:** `{exc.get('id')}`")
-                output.append(f"  - **Workflow ID:** `{exc.get('workflowId')}`")
-                output.append(f"  - **Started:** {exc.get('startedAt')}")
-                output.append("")
-            return "\n".join(output)
-        return f"Error fetching executions: Status {resp.status_code}"
+        # Page through error executions until we have `limit` real failures
+        while len(failed) < limit:
+            resp = await get_client().get("/executions", params=params)
+            if resp.status_code != 200:
+                if failed:
+                    break
+                return f"Error fetching executions: Status {resp.status_code}"
+            body = resp.json()
+            page = body.get("data", [])
+            failed.extend(e for e in page if is_failed_execution(e))
+            next_cursor = body.get("nextCursor")
+            if not next_cursor or not page:
+                break
+            params = {**params, "cursor": next_cursor}
+
+        if not failed:
+            return "No failed executions detected in the last few runs."
+
+        failed = failed[:limit]
+        semaphore = asyncio.Semaphore(ERROR_FETCH_CONCURRENCY)
+        failures = await asyncio.gather(*(fetch_failure(exc.get("id"), semaphore) for exc in failed))
+
+        output = ["### Detected Failures", ""]
+        for exc, (error, failing_node) in zip(failed, failures):
+            output.append(f"- **Execution ID:** `{exc.get('id')}`")
+            output.append(f"  - **Workflow ID:** `{exc.get('workflowId')}`")
+            if failing_node:
+                output.append(f"  - **Failing Node:** `{failing_node}`")
+            output.append(f"  - **Started:** {exc.get('startedAt')}")
+            output.append(f"  - **Error:** {str(error)[:300]}")
+            output.append("")
+        if next_cursor:
+            output.append(f"Older failures may exist. Next cursor: `{next_cursor}`")
+        return bound_output("\n".join(output), "Request a smaller limit.")
     except Exception as e:
         return f"Exception: {str(e)}"
 
 @mcp.tool()
-def fix_n8n_workflow(workflow_id: str, execution_id: str, error_message: str) -> str:
+async def fix_n8n_workflow(workflow_id: str, execution_id: str, error_message: str,
+                           failing_node: Optional[str] = None) -> str:
     """
     Triggers the self-healing logic for a specific failed workflow.
     It will attempt deterministic fixes first, then escalate to AI (Gemini).
+    Pass the failing node from get_failed_n8n_executions so the fix targets it and the nodes feeding it.
     """
     try:
-        result = heal_workflow(workflow_id, execution_id, error_message)
+        # The healer is synchronous; run it off the event loop so other tool calls stay responsive
+        result = await asyncio.to_thread(heal_workflow, workflow_id, execution_id, error_message,
+                                         failing_node=failing_node)
+        _workflow_cache.pop(workflow_id, None)
         status_emoji = "✅" if result["status"] == "resolved" else "🔍"
         return f"{status_emoji} **Heal Status:** {result['status'].upper()}\n\n**Result:** {result['message']}"
     except Exception as e:
         return f"❌ Error during healing process: {str(e)}"
 
 @mcp.tool()
-def get_workflow_details(workflow_id: str) -> str:
+async def get_workflow_details(workflow_id: str, node_type: Optional[str] = None) -> str:
     """
-    Returns the full JSON structure of an n8n workflow for analysis.
+    Returns a compact summary of an n8n workflow: its nodes (name, type) and connections.
+    With node_type (e.g. n8n-nodes-base.code), lists only the nodes of that type.
+    Use get_workflow_node to drill into a single node's full configuration.
     """
-    workflow = get_workflow(workflow_id)
+    try:
+        workflow = await fetch_workflow(workflow_id)
+    except Exception as e:
+        return f"Exception: {str(e)}"
+    if workflow and node_type:
+        names = graph_for(workflow, N8N_URL).of_type(node_type)
+        listing = "\n".join(f"- `{name}`" for name in names) or "(none)"
+        return bound_output(f"### `{node_type}` nodes in {workflow.get('name')} ({len(names)})\n{listing}")
     if workflow:
-        return json.dumps(workflow, indent=2)
+        return bound_output(summarize_workflow(workflow), "Use get_workflow_node for individual nodes.")
     return f"Could not find workflow with ID: {workflow_id}"
 
+@mcp.tool()
+async def get_workflow_node(workflow_id: str, node_name: str) -> str:
+    """
+    Returns the full JSON configuration of a single node in an n8n workflow, with the nodes feeding it
+    (upstream, in data-flow order) and the nodes it feeds.
+    """
+    try:
+        workflow = await fetch_workflow(workflow_id)
+    except Exception as e:
+        return f"Exception: {str(e)}"
+    if not workflow:
+        return f"Could not find workflow with ID: {workflow_id}"
+    graph = graph_for(workflow, N8N_URL)
+    node = graph.node(workflow, node_name)
+    if node:
+        upstream = " → ".join(f"`{name}`" for name in graph.upstream_chain(node_name)) or "none"
+        downstream = ", ".join(f"`{name}`" for name in graph.downstream[node_name]) or "none"
+        return bound_output(f"**Upstream:** {upstream}\n**Feeds:** {downstream}\n\n{json.dumps(node, indent=2)}")
+    names = ", ".join(f"`{n.get('name')}`" for n in workflow.get("nodes", []))
+    return bound_output(f"No node named `{node_name}` in workflow {workflow_id}. Nodes: {names}")
+
+@mcp.tool()
+async def scan_code_nodes(fix: bool = False) -> str:
+    """
+    Parse-checks the JavaScript of every Code node in every workflow on the instance (with `node --check`),
+    so broken scripts are found before they fail. Unchanged workflows and scripts are served from a cache.
+    With fix=True, scripts that don't parse get the healer's syntax fixes, but only when the fixed script
+    parses; they are then snapshotted and published.
+    """
+    try:
+        report = await asyncio.to_thread(scan_workflows, N8N_URL, N8N_KEY, fix)
+    except Exception as e:
+        return f"❌ Scan failed: {str(e)}"
+    if fix:
+        _workflow_cache.clear()
+    return bound_output(format_report(report), "Run `python -m execution.lint_scan --json` for the full report.")
+
 if __name__ == "__main__":
+    # Optionally preload the Gemini SDK in the background so the first fix call is fast
+    if os.getenv("GEMINI_WARMUP", "0") == "1":
+        try:
+            from execution.ai_healer import warmup_in_background
+        except ImportError:
+            from ai_healer import warmup_in_background
+        warmup_in_background()
+
     # In FastMCP, run() handles stdio by default when called as a script
     mcp.run()
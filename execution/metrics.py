@@ -0,0 +1,226 @@
+"""
+Minimal Prometheus-compatible metrics for the healer (no client library needed).
+
+Metrics are module-level singletons shared by every component in the process. The API exposes them at
+`/api/metrics`; the agentic healer can serve them on its own port via `start_metrics_server()`
+(enabled with HEALER_METRICS_PORT).
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Tuple
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+_registry: List["_Metric"] = []
+_lock = threading.Lock()
+
+
+def _format_labels(labelnames: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{str(value)}"'.replace("\n", " ") for name, value in zip(labelnames, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], object] = {}
+        with _lock:
+            _registry.append(self)
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with _lock:
+            items = list(self._values.items())
+        for key, value in items:
+            lines.extend(self._render_sample(key, value))
+        return lines
+
+    def _render_sample(self, key, value) -> List[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with _lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        with _lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with _lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with _lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state["counts"][i] += 1
+            state["sum"] += value
+            state["count"] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the wall time of the wrapped block (also when it raises)."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def _render_sample(self, key, state) -> List[str]:
+        lines = []
+        for bound, count in zip(self.buckets, state["counts"]):
+            le = 'le="%s"' % _format_value(bound)
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {count}")
+        lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(state['sum'])}")
+        lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {state['count']}")
+        return lines
+
+
+# --- Healer metrics ---
+
+HEAL_STAGE_SECONDS = Histogram(
+    "heas_heal_stage_seconds", "Time spent in each heal_workflow stage.", ("stage",))
+HEALS_TOTAL = Counter(
+    "heas_heals_total", "Heal attempts by final status.", ("status",))
+N8N_REQUEST_SECONDS = Histogram(
+    "heas_n8n_request_seconds", "Latency of n8n API calls.", ("endpoint",))
+N8N_REQUEST_ERRORS = Counter(
+    "heas_n8n_request_errors_total", "Failed n8n API calls (HTTP status >= 400 or exception).", ("endpoint", "reason"))
+N8N_QUEUE_SECONDS = Histogram(
+    "heas_n8n_queue_seconds", "Time n8n calls waited for their tenant's concurrency and rate budget.", ("tenant",),
+    buckets=(0.001, 0.01, 0.05, 0.1, 0.5, 1, 2.5, 5, 10))
+N8N_IN_FLIGHT = Gauge(
+    "heas_n8n_in_flight", "n8n calls in flight per tenant (fleet instance name, or \"visitor\" for all other n8n instances).", ("tenant",))
+N8N_THROTTLED = Counter(
+    "heas_n8n_throttled_total", "n8n calls refused because their tenant stayed over budget for the maximum wait.", ("tenant",))
+GEMINI_REQUEST_SECONDS = Histogram(
+    "heas_gemini_request_seconds", "Latency of Gemini generate_content calls.", ("model",),
+    buckets=(0.5, 1, 2.5, 5, 10, 20, 30, 60, 120))
+GEMINI_REQUEST_ERRORS = Counter(
+    "heas_gemini_request_errors_total", "Failed Gemini calls (exception or unparseable reply).", ("model",))
+QUEUE_DEPTH = Gauge(
+    "heas_queue_depth", "Detected failures waiting to be healed.", ("queue",))
+CACHE_REQUESTS = Counter(
+    "heas_cache_requests_total", "Cache lookups by result (hit/miss).", ("cache", "result"))
+CACHE_HIT_RATIO = Gauge(
+    "heas_cache_hit_ratio", "Fraction of cache lookups that were hits.", ("cache",))
+POLL_LAG_SECONDS = Histogram(
+    "heas_poll_lag_seconds", "How late each poll cycle started relative to its schedule.", ("instance",),
+    buckets=(0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60, 300))
+POLL_CYCLE_SECONDS = Histogram(
+    "heas_poll_cycle_seconds", "Duration of one poll + heal cycle per n8n instance.", ("instance",),
+    buckets=(0.05, 0.1, 0.5, 1, 5, 10, 30, 60, 300))
+POLL_INTERVAL_SECONDS = Gauge(
+    "heas_poll_interval_seconds", "Current delay before the next poll (adaptive, includes error backoff).", ("instance",))
+DETECTION_LAG_SECONDS = Histogram(
+    "heas_detection_lag_seconds", "Time from a failed execution stopping to the healer detecting it.", ("instance",),
+    buckets=(1, 5, 10, 30, 60, 120, 300, 600, 1800, 3600))
+INGESTED_FAILURES = Counter(
+    "heas_ingested_failures_total", "Failures pushed to /api/ingest/failure, by result.", ("result",))
+POLL_ERRORS = Counter(
+    "heas_poll_errors_total", "Poll cycles that failed, per n8n instance.", ("instance",))
+RETRY_OUTCOMES = Counter(
+    "heas_retry_outcomes_total", "Scheduled execution retries by outcome (succeeded/failed/rate_limited/deferred/gave_up).",
+    ("result",))
+HEAL_VERIFICATIONS = Counter(
+    "heas_heal_verifications_total", "Post-heal verification outcomes (verified/regressed/unverified) and rollbacks (rolled_back/rollback_failed/rollback_skipped).", ("result",))
+EXECUTION_FETCHES = Counter(
+    "heas_execution_fetches_total", "Execution detail fetches by how the body was held (in_memory/spilled/truncated).", ("result",))
+EXECUTION_FETCH_BYTES = Histogram(
+    "heas_execution_fetch_bytes", "Size of fetched execution detail bodies (bytes read, capped).", (),
+    buckets=(2 ** 16, 2 ** 18, 2 ** 20, 2 ** 22, 2 ** 24, 2 ** 26, 2 ** 28, 2 ** 30))
+GEMINI_ESCALATIONS = Counter(
+    "heas_gemini_escalations_total", "Fixability gate decisions before the Gemini stage (escalated/skipped).", ("decision",))
+
+
+def record_cache(cache: str, hit: bool):
+    """Count a cache lookup and refresh the hit ratio gauge for that cache."""
+    CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
+    hits = CACHE_REQUESTS.value(cache=cache, result="hit")
+    total = hits + CACHE_REQUESTS.value(cache=cache, result="miss")
+    CACHE_HIT_RATIO.set(hits / total if total else 0.0, cache=cache)
+
+
+def render_metrics() -> str:
+    """Render every registered metric in the Prometheus text exposition format."""
+    with _lock:
+        metrics = list(_registry)
+    lines = []
+    for metric in metrics:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+def start_metrics_server(port: int, host: str = "0.0.0.0") -> ThreadingHTTPServer:
+    """Serve /metrics on a daemon thread (for processes without the FastAPI app)."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] not in ("/metrics", "/api/metrics"):
+                self.send_response(404)
+                self.end_headers()
+                return
+            body = render_metrics().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-exporter", daemon=True).start()
+    return server
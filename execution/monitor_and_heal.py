@@ -1,5 +1,7 @@
 import json
 import os
+import sys
+import tempfile
 import requests
 from datetime import datetime
 from dotenv import load_dotenv
@@ -9,6 +11,10 @@ load_dotenv()
 DATA_FILE = "dashboard/public/data/events.json"
 N8N_URL = os.getenv("N8N_API_URL")
 N8N_KEY = os.getenv("N8N_API_KEY")
+PAGE_SIZE = 20  # Executions per n8n page request
+SNAPSHOT_RETENTION = int(os.getenv("SNAPSHOT_RETENTION", "200"))  # Max events kept in the snapshot
+REQUEST_TIMEOUT = float(os.getenv("N8N_REQUEST_TIMEOUT", "30"))  # Seconds per n8n API call
+RUNNING_STATUSES = {"new", "running", "waiting"}  # n8n execution statuses that aren't final yet
 
 workflow_cache = {}
 
@@ -25,7 +31,7 @@ def get_workflow_name(workflow_id):
     headers = {"X-N8N-API-KEY": N8N_KEY}
     
     try:
-        resp = requests.get(url, headers=headers)
+        resp = requests.get(url, headers=headers, timeout=REQUEST_TIMEOUT)
         if resp.status_code == 200:
             name = resp.json().get('name', f"Workflow {workflow_id}")
             workflow_cache[workflow_id] = name
@@ -62,7 +68,7 @@ def get_real_error_message(execution_id):
     
     try:
         print(f"   > Fetching details for Execution {execution_id}...")
-        resp = requests.get(url, headers=headers)
+        resp = requests.get(url, headers=headers, timeout=REQUEST_TIMEOUT)
         if resp.status_code == 200:
             full_data = resp.json()
             error = find_error_recursive(full_data)
@@ -98,7 +104,139 @@ def heal_execution(execution_id, workflow_id, error_msg):
 
     return False, "Manual Intervention Required"
 
-def fetch_n8n_executions():
+def load_snapshot(file_path):
+    """Load the existing events snapshot. A missing or corrupt file yields an empty history."""
+    if not os.path.exists(file_path):
+        return []
+    try:
+        with open(file_path, 'r') as f:
+            events = json.load(f)
+        return events if isinstance(events, list) else []
+    except (json.JSONDecodeError, OSError) as e:
+        print(f"Warning: Ignoring unreadable snapshot {file_path}: {e}")
+        return []
+
+def write_snapshot_atomic(file_path, events):
+    """Write the snapshot to a temp file in the same directory, then rename it over the old one.
+
+    Readers (the dashboard dev server) either see the previous file or the new one, never a partial write.
+    """
+    ensure_dir(file_path)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(file_path) or ".", prefix=".events-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(events, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, file_path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def fetch_execution_pages(headers, known_ids, max_items):
+    """Page through recent executions (newest first) until we reach one already in the snapshot."""
+    url = f"{N8N_URL}/api/v1/executions"
+    params = {"limit": PAGE_SIZE, "includeData": "false"}
+    collected = []
+
+    while len(collected) < max_items:
+        response = requests.get(url, headers=headers, params=params, timeout=REQUEST_TIMEOUT)
+        if response.status_code != 200:
+            if not collected:
+                raise RuntimeError(f"Failed to fetch executions. Status: {response.status_code}")
+            break
+
+        body = response.json()
+        page = body.get('data', [])
+        collected.extend(page)
+
+        # Stop as soon as the page overlaps the snapshot: everything older is already merged
+        if any(exc.get('id') in known_ids for exc in page):
+            break
+        cursor = body.get('nextCursor')
+        if not cursor or not page:
+            break
+        params = {**params, "cursor": cursor}
+
+    return collected[:max_items]
+
+def fetch_execution(headers, execution_id):
+    """Re-read one execution's summary. Returns (status code, summary or None)."""
+    url = f"{N8N_URL}/api/v1/executions/{execution_id}"
+    response = requests.get(url, headers=headers, params={"includeData": "false"}, timeout=REQUEST_TIMEOUT)
+    return response.status_code, response.json() if response.status_code == 200 else None
+
+def is_running(exc):
+    """True while an execution hasn't reached a final state (older n8n has no status: not finished, not stopped)."""
+    status = exc.get('status')
+    if status:
+        return status in RUNNING_STATUSES
+    return not exc.get('finished') and not exc.get('stoppedAt')
+
+def build_event(exc, cached=None, analyse=True):
+    """Turn an n8n execution summary into a dashboard event, reusing cached error details when possible.
+
+    With analyse=False a failure is recorded as detected without fetching its details or healing it.
+    A running execution is recorded as "Running" (not a failure) and re-read on later refreshes.
+    """
+    if is_running(exc):
+        return {
+            "id": exc.get('id'),
+            "workflowName": get_workflow_name(exc.get('workflowId')),
+            "error": "Still running",
+            "timestamp": exc.get('startedAt'),
+            "status": "Running",
+            "fixAttempted": False
+        }
+
+    is_success = exc.get('finished')
+
+    # A failure we already analysed: keep its error/heal result instead of refetching the details
+    if not is_success and cached and cached.get('fixAttempted'):
+        return {**cached, "workflowName": get_workflow_name(exc.get('workflowId'))}
+
+    # Default Statuses
+    status = "Resolved" if is_success else "Detected"
+    error_msg = "Completed Successfully"
+
+    if not is_success and not analyse:
+        error_msg = "Backfilled from history (not analysed)"
+    elif not is_success:
+        # FETCH REAL ERROR
+        error_msg = get_real_error_message(exc.get('id'))
+
+        # Try to Heal based on the REAL error
+        healed, fix_note = heal_execution(exc.get('id'), exc.get('workflowId'), error_msg)
+
+        if healed:
+             status = "Resolved"
+             error_msg = f"{error_msg} -> {fix_note}"
+
+    return {
+        "id": exc.get('id'),
+        "workflowName": get_workflow_name(exc.get('workflowId')),
+        "error": error_msg,
+        "timestamp": exc.get('startedAt'),
+        "status": status,
+        "fixAttempted": True if not is_success and analyse else False
+    }
+
+def merge_events(existing, new_events, retention=SNAPSHOT_RETENTION):
+    """Merge fresh events into the snapshot (newest first), replacing stale copies and bounding history."""
+    merged = {event.get('id'): event for event in existing}
+    for event in new_events:
+        merged[event.get('id')] = event
+    ordered = sorted(merged.values(), key=lambda e: e.get('timestamp') or "", reverse=True)
+    return ordered[:retention]
+
+def fetch_n8n_executions(incremental=True):
+    """Refresh the dashboard snapshot.
+
+    In incremental mode (default) only executions newer than the snapshot are fetched and merged;
+    pass incremental=False (or --full on the command line) to rebuild from the latest page only.
+    With no snapshot yet, history is backfilled but only the latest page of failures is analysed and healed.
+    """
     if not N8N_URL or not N8N_KEY:
         print("Error: N8N_API_URL or N8N_API_KEY not set in .env")
         return
@@ -106,60 +244,44 @@ def fetch_n8n_executions():
     headers = {
         "X-N8N-API-KEY": N8N_KEY
     }
-    
-    # Fetch recent executions (limit 20 is enough for a dashboard demo to be fast)
-    url = f"{N8N_URL}/api/v1/executions?limit=20&includeData=false"
-    
+
+    existing = load_snapshot(DATA_FILE) if incremental else []
+    cache = {event.get('id'): event for event in existing}
+
     try:
         print(f"Connecting to n8n at {N8N_URL}...")
-        response = requests.get(url, headers=headers)
-        
-        if response.status_code != 200:
-            print(f"Error: Failed to fetch executions. Status: {response.status_code}")
-            return
-
-        executions = response.json().get('data', [])
+        max_items = SNAPSHOT_RETENTION if incremental else PAGE_SIZE
+        executions = fetch_execution_pages(headers, set(cache), max_items)
         print(f"Fetched {len(executions)} recent executions.")
 
-        events = []
-        for exc in executions:
-            name = get_workflow_name(exc.get('workflowId'))
-            is_success = exc.get('finished')
-            
-            # Default Statuses
-            status = "Resolved" if is_success else "Detected"
-            error_msg = "Completed Successfully"
-            
-            if not is_success:
-                # FETCH REAL ERROR
-                error_msg = get_real_error_message(exc.get('id'))
-                
-                # Try to Heal based on the REAL error
-                healed, fix_note = heal_execution(exc.get('id'), exc.get('workflowId'), error_msg)
-                
-                if healed:
-                     status = "Resolved"
-                     error_msg = f"{error_msg} -> {fix_note}"
-
-            event = {
-                "id": exc.get('id'),
-                "workflowName": name,
-                "error": error_msg,
-                "timestamp": exc.get('startedAt'),
-                "status": status,
-                "fixAttempted": True if not is_success else False
-            }
-            events.append(event)
-
-        # Save to file
-        ensure_dir(DATA_FILE)
-        with open(DATA_FILE, 'w') as f:
-            json.dump(events, f, indent=2)
-            
-        print(f"Updated {DATA_FILE} with {len(events)} events.")
+        # Executions still running at the last refresh: paging stops at the snapshot, so re-read them
+        fetched_ids = {exc.get('id') for exc in executions}
+        unfinished = [e for e in existing if e.get('status') == "Running" and e.get('id') not in fetched_ids]
+        for event in unfinished:
+            try:
+                status_code, exc = fetch_execution(headers, event.get('id'))
+            except requests.RequestException as e:
+                print(f"Warning: Could not re-read execution {event.get('id')}: {e}")
+                continue
+            if exc:
+                executions.append(exc)
+            elif status_code == 404:
+                existing.remove(event)  # Deleted in n8n
+        if unfinished:
+            print(f"Re-read {len(unfinished)} executions that were still running.")
+
+        # First run: don't heal up to SNAPSHOT_RETENTION historical failures in one go
+        backfill = incremental and not existing
+        events = [build_event(exc, cache.get(exc.get('id')), analyse=not backfill or i < PAGE_SIZE)
+                  for i, exc in enumerate(executions)]
+        reused = sum(1 for exc in executions if exc.get('id') in cache)
+        snapshot = merge_events(existing, events)
+
+        write_snapshot_atomic(DATA_FILE, snapshot)
+        print(f"Updated {DATA_FILE}: {len(events) - reused} new, {reused} refreshed, {len(snapshot)} retained.")
 
     except Exception as e:
         print(f"Connection Exception: {e}")
 
 if __name__ == "__main__":
-    fetch_n8n_executions()
+    fetch_n8n_executions(incremental="--full" not in sys.argv)
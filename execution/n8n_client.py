@@ -0,0 +1,291 @@
+"""
+Shared HTTP layer for n8n API calls.
+
+Every n8n request made by the API, the core healer and the agentic healer goes through `n8n_request()`,
+which reuses a keep-alive `requests.Session` per n8n instance, records latency and error metrics
+per endpoint (ids collapsed, e.g. `GET /workflows/{id}`) and opens a trace span for the call.
+
+Each n8n instance (tenant) also has an outbound budget: at most `N8N_TENANT_MAX_IN_FLIGHT` concurrent
+calls and `N8N_TENANT_RATE` calls per second (token bucket, bursts up to `N8N_TENANT_BURST`). A call over
+budget queues for up to `N8N_TENANT_MAX_WAIT` seconds, then raises `TenantRateLimited` (the API answers
+429 with Retry-After). One visitor's large dashboard can then neither starve the others' connections nor
+flood a small self-hosted n8n. Request handlers shorten the wait with `tenant_wait()` (the API uses
+`N8N_TENANT_API_MAX_WAIT`), so an over-budget visitor is refused instead of holding a worker thread.
+
+Limiters and sessions are kept for the `N8N_MAX_TENANTS` most recently used instances; idle ones beyond
+that are dropped (sessions closed). Instances set up with `configure_pool`/`configure_limits` (the fleet,
+the healer) are pinned and never dropped. Per-tenant metrics are labelled with the name given there;
+every other instance is reported as "visitor", so hostnames never appear in /api/metrics.
+"""
+
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    from execution.metrics import N8N_IN_FLIGHT, N8N_QUEUE_SECONDS, N8N_REQUEST_ERRORS, N8N_REQUEST_SECONDS, N8N_THROTTLED
+    from execution.tracing import span
+except ImportError:
+    from metrics import N8N_IN_FLIGHT, N8N_QUEUE_SECONDS, N8N_REQUEST_ERRORS, N8N_REQUEST_SECONDS, N8N_THROTTLED
+    from tracing import span
+
+TENANT_MAX_IN_FLIGHT = int(os.getenv("N8N_TENANT_MAX_IN_FLIGHT", "8"))  # Concurrent calls per n8n instance (0 = no cap)
+TENANT_RATE = float(os.getenv("N8N_TENANT_RATE", "50"))  # Calls per second per n8n instance (0 = no cap)
+TENANT_BURST = float(os.getenv("N8N_TENANT_BURST", "100"))  # Calls allowed back to back before the rate applies
+TENANT_MAX_WAIT = float(os.getenv("N8N_TENANT_MAX_WAIT", "5"))  # Seconds a call may queue before it is refused
+MAX_TENANTS = int(os.getenv("N8N_MAX_TENANTS", "256"))  # Idle limiters/sessions beyond this are dropped (LRU)
+VISITOR_LABEL = "visitor"  # Metric label of instances not configured by name
+
+_sessions: "OrderedDict[str, requests.Session]" = OrderedDict()
+_pinned_sessions = set()
+_sessions_lock = threading.Lock()
+_max_wait: ContextVar[Optional[float]] = ContextVar("n8n_tenant_max_wait", default=None)
+
+_ID_SEGMENT_RE = re.compile(r"/(workflows|executions)/[^/?]+")
+
+
+class N8nApiError(RuntimeError):
+    """An n8n API call answered with an error status. Carries the status and any Retry-After hint (seconds)."""
+
+    def __init__(self, message: str, status_code: int, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+    @classmethod
+    def from_response(cls, message: str, resp: requests.Response) -> "N8nApiError":
+        return cls(f"{message}. Status: {resp.status_code}", resp.status_code, retry_after_seconds(resp))
+
+
+class TenantRateLimited(N8nApiError):
+    """A call to an n8n instance stayed over that tenant's budget for TENANT_MAX_WAIT seconds."""
+
+    def __init__(self, tenant: str, retry_after: float):
+        super().__init__(f"Too many requests to n8n at {tenant} (over its outbound budget); retry in {retry_after:.0f}s", 429, retry_after)
+        self.tenant = tenant
+
+
+class TenantLimiter:
+    """In-flight cap plus token bucket for one n8n instance."""
+
+    def __init__(self, tenant: str, max_in_flight: int = TENANT_MAX_IN_FLIGHT, rate: float = TENANT_RATE,
+                 burst: float = TENANT_BURST):
+        self.tenant = tenant
+        self.label = VISITOR_LABEL
+        self.pinned = False
+        self.max_in_flight = max_in_flight
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self.in_flight = 0
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self.condition = threading.Condition()
+
+    def _refill(self, now: float):
+        if self.rate > 0:
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, max_wait: float = TENANT_MAX_WAIT) -> float:
+        """Wait for a slot and a token. Returns the seconds queued; raises TenantRateLimited after `max_wait`."""
+        start = time.monotonic()
+        with self.condition:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                slot_free = self.max_in_flight <= 0 or self.in_flight < self.max_in_flight
+                token_wait = 0.0 if self.rate <= 0 or self.tokens >= 1 else (1 - self.tokens) / self.rate
+                if slot_free and not token_wait:
+                    self.in_flight += 1
+                    if self.rate > 0:
+                        self.tokens -= 1
+                    return now - start
+                remaining = start + max_wait - now
+                if remaining <= 0:
+                    raise TenantRateLimited(self.tenant, max(token_wait, 1.0))
+                # A finishing call notifies; a missing token arrives on its own schedule
+                self.condition.wait(min(remaining, token_wait) if token_wait else remaining)
+
+    def release(self):
+        with self.condition:
+            self.in_flight -= 1
+            self.condition.notify_all()
+
+
+_limiters: "OrderedDict[str, TenantLimiter]" = OrderedDict()
+_limiters_lock = threading.Lock()
+
+
+def tenant_of(base_url: str) -> str:
+    """Tenant key of an n8n instance: its host[:port]."""
+    return urlparse(base_url).netloc or base_url.rstrip("/")
+
+
+def _evict_idle(entries: OrderedDict, keep, on_evict=None):
+    """Drop least recently used entries beyond MAX_TENANTS, skipping those `keep` says are in use. Call with the lock held."""
+    for key in list(entries):
+        if len(entries) <= MAX_TENANTS:
+            return
+        if not keep(key, entries[key]):
+            evicted = entries.pop(key)
+            if on_evict:
+                on_evict(evicted)
+
+
+def get_limiter(base_url: str) -> TenantLimiter:
+    tenant = tenant_of(base_url)
+    with _limiters_lock:
+        limiter = _limiters.get(tenant)
+        if limiter is None:
+            limiter = _limiters[tenant] = TenantLimiter(tenant)
+            _evict_idle(_limiters, lambda _, other: other.pinned or other.in_flight > 0 or other is limiter)
+        else:
+            _limiters.move_to_end(tenant)
+        return limiter
+
+
+def configure_limits(base_url: str, max_in_flight: Optional[int] = None, rate: Optional[float] = None,
+                     burst: Optional[float] = None, label: Optional[str] = None) -> TenantLimiter:
+    """Override the outbound budget of one n8n instance (None keeps the current value) and pin it.
+
+    `label` names the instance in the per-tenant metrics (e.g. its fleet name) instead of "visitor".
+    """
+    limiter = get_limiter(base_url)
+    with limiter.condition:
+        limiter.pinned = True
+        if label is not None:
+            limiter.label = label
+        if max_in_flight is not None:
+            limiter.max_in_flight = max_in_flight
+        if rate is not None:
+            limiter.rate = rate
+        if burst is not None:
+            limiter.burst = limiter.tokens = max(1.0, burst)
+        limiter.condition.notify_all()
+    return limiter
+
+
+@contextmanager
+def tenant_wait(max_wait: float):
+    """Cap how long n8n calls made in this context (thread or task) may queue for their tenant's budget."""
+    token = _max_wait.set(max_wait)
+    try:
+        yield
+    finally:
+        _max_wait.reset(token)
+
+
+@contextmanager
+def tenant_slot(base_url: str):
+    """Hold one unit of the tenant's budget for the duration of a call."""
+    limiter = get_limiter(base_url)
+    max_wait = _max_wait.get()
+    try:
+        waited = limiter.acquire(TENANT_MAX_WAIT if max_wait is None else max_wait)
+    except TenantRateLimited:
+        N8N_THROTTLED.inc(tenant=limiter.label)
+        raise
+    N8N_QUEUE_SECONDS.observe(waited, tenant=limiter.label)
+    N8N_IN_FLIGHT.inc(tenant=limiter.label)
+    try:
+        yield
+    finally:
+        N8N_IN_FLIGHT.dec(tenant=limiter.label)
+        limiter.release()
+
+
+def retry_after_seconds(resp: requests.Response) -> Optional[float]:
+    """Parse a Retry-After header (delta seconds or HTTP date)."""
+    value = resp.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+def get_session(base_url: str) -> requests.Session:
+    """Return the pooled session for an n8n instance, creating it on first use."""
+    with _sessions_lock:
+        session = _sessions.get(base_url)
+        if session is None:
+            session = _sessions[base_url] = requests.Session()
+            # Idle = no call in flight to that tenant; a closed session's connections are simply not reused
+            _evict_idle(_sessions, lambda url, _: url in _pinned_sessions or url == base_url or _busy(url),
+                        lambda evicted: evicted.close())
+        else:
+            _sessions.move_to_end(base_url)
+        return session
+
+
+def _busy(base_url: str) -> bool:
+    limiter = _limiters.get(tenant_of(base_url))
+    return limiter is not None and limiter.in_flight > 0
+
+
+def configure_pool(base_url: str, pool_size: int, label: Optional[str] = None) -> requests.Session:
+    """Give an n8n instance its own pinned session with up to `pool_size` keep-alive connections (and as many calls in flight)."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(1, pool_size))
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    with _sessions_lock:
+        previous = _sessions.get(base_url)
+        _sessions[base_url] = session
+        _pinned_sessions.add(base_url)
+    if previous is not None:
+        previous.close()
+    configure_limits(base_url, max_in_flight=max(pool_size, TENANT_MAX_IN_FLIGHT) if TENANT_MAX_IN_FLIGHT > 0 else None,
+                     label=label)
+    return session
+
+
+def endpoint_label(method: str, path: str) -> str:
+    """Metric label for a request: method plus path with ids collapsed."""
+    path = _ID_SEGMENT_RE.sub(r"/\1/{id}", path.split("?", 1)[0])
+    return f"{method.upper()} {path}"
+
+
+def n8n_request(method: str, base_url: str, api_key: str, path: str, params: Optional[Dict] = None,
+                json: Optional[Dict] = None, timeout: float = 10, **kwargs) -> requests.Response:
+    """Call the n8n public API (`path` is relative to /api/v1). Exceptions propagate to the caller.
+
+    Raises TenantRateLimited when the instance stays over its outbound budget. With `stream=True` the
+    budget is held until the response headers arrive, not while the body is read.
+    """
+    label = endpoint_label(method, path)
+    headers = {"X-N8N-API-KEY": api_key}
+    if json is not None:
+        headers["Content-Type"] = "application/json"
+
+    # Queue time counts toward the tenant's queue metric, not the endpoint's latency
+    with tenant_slot(base_url):
+        with span(f"n8n {label}", endpoint=label, path=path) as record, N8N_REQUEST_SECONDS.time(endpoint=label):
+            try:
+                resp = get_session(base_url).request(
+                    method, f"{base_url}/api/v1{path}", headers=headers, params=params, json=json, timeout=timeout, **kwargs
+                )
+            except Exception as e:
+                N8N_REQUEST_ERRORS.inc(endpoint=label, reason=type(e).__name__)
+                raise
+            record["attributes"]["status_code"] = resp.status_code
+
+    if resp.status_code >= 400:
+        N8N_REQUEST_ERRORS.inc(endpoint=label, reason=str(resp.status_code))
+    return resp
@@ -0,0 +1,85 @@
+"""
+Opt-in sampling profiler for the running API or agentic healer process.
+
+A background thread samples the stacks of every thread (`sys._current_frames()`) at a fixed interval
+for a bounded time and aggregates them as folded stacks ("thread;outer;...;inner count"), the input
+format of flamegraph.pl, speedscope and inferno. It is a wall-clock profile: threads waiting on I/O
+show up in their waiting frames, which is usually what you want for a poll/heal loop.
+
+Usage:
+    folded = profile_for(30)                  # blocks for 30s, returns folded text
+    path = write_profile(folded, "api")       # .tmp/profiles/api-<timestamp>.folded
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Optional
+
+PROFILE_DIR = os.getenv("PROFILE_DIR", ".tmp/profiles")
+DEFAULT_INTERVAL = 0.005  # 200 Hz
+MAX_PROFILE_SECONDS = 300
+
+_capture_lock = threading.Lock()  # One capture at a time per process
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _folded_stack(frame, thread_name: str) -> str:
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    return ";".join([thread_name] + labels[::-1])
+
+
+def profile_for(seconds: float, interval: float = DEFAULT_INTERVAL) -> str:
+    """Sample all threads for `seconds` and return the folded-stack profile."""
+    seconds = max(0.1, min(seconds, MAX_PROFILE_SECONDS))
+    if not _capture_lock.acquire(blocking=False):
+        raise RuntimeError("A profile capture is already running.")
+    try:
+        me = threading.get_ident()
+        stacks = Counter()
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == me:
+                    continue
+                stacks[_folded_stack(frame, names.get(thread_id, f"thread-{thread_id}"))] += 1
+            time.sleep(interval)
+    finally:
+        _capture_lock.release()
+    return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+
+def write_profile(folded: str, label: str, directory: Optional[str] = None) -> str:
+    """Write a folded profile to PROFILE_DIR and return its path."""
+    directory = directory or PROFILE_DIR
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{label}-{datetime.now().strftime('%Y%m%d-%H%M%S')}.folded")
+    with open(path, "w") as f:
+        f.write(folded)
+    return path
+
+
+def capture_in_background(seconds: float, label: str, interval: float = DEFAULT_INTERVAL) -> threading.Thread:
+    """Profile the process on a daemon thread and write the result when done."""
+
+    def run():
+        try:
+            path = write_profile(profile_for(seconds, interval), label)
+            print(f"🔥 Profile written to {path} (render with flamegraph.pl or speedscope)")
+        except RuntimeError as e:
+            print(f"⚠️  {e}")
+
+    thread = threading.Thread(target=run, name="profiler", daemon=True)
+    thread.start()
+    return thread
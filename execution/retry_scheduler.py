@@ -0,0 +1,178 @@
+"""
+Retry scheduler for transient failures (network errors, rate limits, upstream outages).
+
+Instead of retrying a failed execution the moment it is detected, the agentic healer schedules it
+here. Retries are jobs in the durable heal queue (queue `retry:<instance>`), so delays, attempt counts
+and dead-lettering come from HealQueue. On top of that, retries are grouped by destination: the host in
+the error message, or the workflow when there is none.
+
+- A destination that keeps failing backs off exponentially (with full jitter). New failures to that
+  destination wait for its backoff too, so an outage is probed, not hammered.
+- Due retries to one destination start with a single probe. Only if it passes do the rest follow, at most
+  `DESTINATION_CONCURRENCY` at a time; if it fails, the whole batch waits for the next backoff.
+- A 429 from n8n (or a "retry after N" hint in the error) stretches the delay to at least that long.
+"""
+
+import os
+import random
+import re
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+try:
+    from execution.heal_queue import HealQueue
+    from execution.metrics import RETRY_OUTCOMES
+    from execution.n8n_client import n8n_request, retry_after_seconds
+except ImportError:
+    from heal_queue import HealQueue
+    from metrics import RETRY_OUTCOMES
+    from n8n_client import n8n_request, retry_after_seconds
+
+RETRY_BASE_DELAY = float(os.getenv("HEAL_RETRY_BASE_DELAY", "30"))  # First retry after ~this many seconds
+RETRY_MAX_DELAY = float(os.getenv("HEAL_RETRY_MAX_DELAY", "3600"))
+DESTINATION_CONCURRENCY = int(os.getenv("HEAL_RETRY_CONCURRENCY", "2"))  # Parallel retries per destination
+
+_URL_RE = re.compile(r"https?://[^\s'\"<>()]+")
+_RETRY_HINT_RE = re.compile(r"retry[- ]after[:\s]+(\d+)", re.IGNORECASE)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS retry_destinations (
+    destination TEXT PRIMARY KEY, failures INTEGER NOT NULL, next_at REAL NOT NULL, updated_at REAL NOT NULL
+);
+"""
+
+
+def backoff(failures: int, retry_after: Optional[float] = None) -> float:
+    """Delay after `failures` consecutive failures: full-jitter exponential backoff, never below `retry_after`."""
+    ceiling = min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** max(0, failures - 1))
+    delay = random.uniform(ceiling / 2, ceiling)
+    return max(delay, min(retry_after, RETRY_MAX_DELAY)) if retry_after else delay
+
+
+def destination(error_msg: str, workflow_id: str) -> str:
+    """What a retry depends on: the host the error names, else the workflow itself."""
+    match = _URL_RE.search(error_msg or "")
+    host = urlparse(match.group(0)).netloc if match else None
+    return f"host:{host}" if host else f"workflow:{workflow_id}"
+
+
+def retry_hint(error_msg: str) -> Optional[float]:
+    match = _RETRY_HINT_RE.search(error_msg or "")
+    return float(match.group(1)) if match else None
+
+
+class RetryScheduler:
+    """Schedules and runs execution retries for one heal queue scope."""
+
+    def __init__(self, queue: HealQueue, scope: str = "default"):
+        self.queue = queue
+        self.queue_name = f"retry:{scope}"
+        self.db_path = queue.db_path
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=10, isolation_level=None)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            yield conn
+        finally:
+            conn.close()
+
+    # --- Destination backoff ---
+
+    def _wait(self, dest: str) -> float:
+        with self._connect() as conn:
+            row = conn.execute("SELECT next_at FROM retry_destinations WHERE destination = ?", (dest,)).fetchone()
+        return max(0.0, row[0] - time.time()) if row else 0.0
+
+    def _record(self, dest: str, success: bool, retry_after: Optional[float] = None) -> float:
+        """Update a destination after a probe; returns its backoff (0 after a success)."""
+        now = time.time()
+        with self._connect() as conn:
+            if success:
+                conn.execute("DELETE FROM retry_destinations WHERE destination = ?", (dest,))
+                return 0.0
+            row = conn.execute("SELECT failures FROM retry_destinations WHERE destination = ?", (dest,)).fetchone()
+            failures = (row[0] if row else 0) + 1
+            delay = backoff(failures, retry_after)
+            conn.execute("INSERT OR REPLACE INTO retry_destinations (destination, failures, next_at, updated_at) "
+                         "VALUES (?, ?, ?, ?)", (dest, failures, now + delay, now))
+            return delay
+
+    # --- Scheduling ---
+
+    def schedule(self, execution: Dict, error_msg: str) -> Tuple[bool, float]:
+        """Queue a retry of a failed execution. Returns (newly queued, delay in seconds)."""
+        workflow_id = execution.get("workflowId")
+        dest = destination(error_msg, workflow_id)
+        delay = max(backoff(1, retry_hint(error_msg)), self._wait(dest))
+        queued = self.queue.enqueue(f"{self.queue_name}:{execution.get('id')}",
+                                    {"execution_id": execution.get("id"), "workflow_id": workflow_id,
+                                     "destination": dest, "error": (error_msg or "")[:500]},
+                                    queue=self.queue_name, delay=delay)
+        return queued, delay
+
+    def is_scheduled(self, execution_id: str) -> bool:
+        """True while a retry of `execution_id` is queued here (waiting or running), not finished or given up."""
+        return self.queue.status(f"{self.queue_name}:{execution_id}") == "pending"
+
+    def _retry(self, n8n_url: str, n8n_key: str, execution_id: str) -> Tuple[str, Optional[float]]:
+        """POST the retry. Returns (outcome, retry-after hint) with outcome succeeded, failed or rate_limited."""
+        resp = n8n_request("POST", n8n_url, n8n_key, f"/executions/{execution_id}/retry")
+        if resp.status_code == 429:
+            return "rate_limited", retry_after_seconds(resp)
+        if resp.status_code not in (200, 201):
+            return "failed", retry_after_seconds(resp)
+        try:
+            status = resp.json().get("status")
+        except ValueError:
+            status = None
+        return ("failed" if status in ("error", "crashed") else "succeeded"), None
+
+    def run_due(self, worker_id: str, n8n_url: str, n8n_key: str, limit: int = 50) -> List[Tuple[Dict, str]]:
+        """Run the retries that are due. Returns (payload, outcome) for every retry that finished or gave up."""
+        jobs = self.queue.claim(worker_id, limit, queue=self.queue_name)
+        by_destination: Dict[str, List[Dict]] = {}
+        for job in jobs:
+            by_destination.setdefault(job["payload"]["destination"], []).append(job)
+
+        results = []
+
+        def attempt(job) -> Tuple[str, Optional[float]]:
+            try:
+                outcome, retry_after = self._retry(n8n_url, n8n_key, job["payload"]["execution_id"])
+            except Exception as e:
+                outcome, retry_after = "failed", getattr(e, "retry_after", None)
+            RETRY_OUTCOMES.inc(result=outcome)
+            return outcome, retry_after
+
+        def finish(job, outcome: str, delay: float):
+            if outcome == "succeeded":
+                self.queue.ack(job["id"], job["claim_token"])
+                results.append((job["payload"], outcome))
+            elif self.queue.nack(job["id"], job["claim_token"], f"retry {outcome}", delay=delay) == "dead":
+                RETRY_OUTCOMES.inc(result="gave_up")
+                results.append((job["payload"], "gave_up"))
+
+        for dest, group in by_destination.items():
+            probe, rest = group[0], group[1:]
+            outcome, retry_after = attempt(probe)
+            delay = self._record(dest, outcome == "succeeded", retry_after)
+            finish(probe, outcome, delay)
+            if outcome != "succeeded":
+                # Destination still down: the rest of the batch waits with it, without spending attempts
+                for job in rest:
+                    self.queue.release(job["id"], job["claim_token"], delay=delay)
+                    RETRY_OUTCOMES.inc(result="deferred")
+                continue
+            with ThreadPoolExecutor(max_workers=DESTINATION_CONCURRENCY) as pool:
+                outcomes = list(pool.map(attempt, rest))
+            for job, (outcome, retry_after) in zip(rest, outcomes):
+                finish(job, outcome, backoff(job["attempts"], retry_after))
+        return results
@@ -0,0 +1,187 @@
+"""
+Content-addressed store of workflow versions, so any heal can be undone with a single PUT.
+
+`save_workflow` snapshots the workflow right before it writes a fix ("pre_heal") and the version it
+wrote ("post_heal"). A snapshot is a small manifest (name, settings, connections and the hash of each
+node); nodes, settings and connections are stored once per distinct content (sha256 of canonical JSON,
+zlib-compressed), so healing one node of a 200-node workflow only adds that node's new blob.
+
+Snapshots are scoped by n8n URL: workflow ids are only unique per instance, and a snapshot is only ever
+restored to the instance it came from.
+
+Usage:
+    python -m execution.snapshots list [workflow_id]
+    python -m execution.snapshots show <snapshot_id>
+    python -m execution.snapshots rollback <snapshot_id>    # uses N8N_API_KEY
+    python -m execution.snapshots stats
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import time
+import zlib
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+SNAPSHOT_DB = os.getenv("SNAPSHOT_DB", ".tmp/snapshots.db")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (hash TEXT PRIMARY KEY, data BLOB NOT NULL);
+CREATE TABLE IF NOT EXISTS snapshots (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    n8n_url TEXT NOT NULL,
+    workflow_id TEXT NOT NULL,
+    label TEXT NOT NULL,
+    version_id TEXT,
+    manifest TEXT NOT NULL,
+    manifest_hash TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS snapshots_workflow ON snapshots (n8n_url, workflow_id, id);
+"""
+
+
+def _canonical(value) -> bytes:
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), default=str).encode()
+
+
+def _normalise_url(n8n_url: str) -> str:
+    return (n8n_url or "").rstrip("/")
+
+
+class SnapshotStore:
+    """Workflow snapshots in a single SQLite file, with per-node content deduplication."""
+
+    def __init__(self, db_path: str = SNAPSHOT_DB):
+        self.db_path = db_path
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=10, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _put_blob(conn, value) -> str:
+        data = _canonical(value)
+        digest = hashlib.sha256(data).hexdigest()
+        conn.execute("INSERT OR IGNORE INTO blobs (hash, data) VALUES (?, ?)", (digest, zlib.compress(data)))
+        return digest
+
+    @staticmethod
+    def _get_blob(conn, digest: str):
+        row = conn.execute("SELECT data FROM blobs WHERE hash = ?", (digest,)).fetchone()
+        if row is None:
+            raise KeyError(f"Missing snapshot blob {digest}")
+        return json.loads(zlib.decompress(row["data"]))
+
+    def save(self, n8n_url: str, workflow_id: str, workflow: Dict, label: str) -> int:
+        """Store a workflow version; returns its snapshot id (the previous one if nothing changed)."""
+        n8n_url = _normalise_url(n8n_url)
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                manifest = {
+                    "name": workflow.get("name"),
+                    "settings": self._put_blob(conn, workflow.get("settings", {})),
+                    "connections": self._put_blob(conn, workflow.get("connections", {})),
+                    "nodes": [self._put_blob(conn, node) for node in workflow.get("nodes", [])],
+                }
+                manifest_hash = hashlib.sha256(_canonical(manifest)).hexdigest()
+                latest = conn.execute(
+                    "SELECT id, manifest_hash, label FROM snapshots WHERE n8n_url = ? AND workflow_id = ? "
+                    "ORDER BY id DESC LIMIT 1", (n8n_url, str(workflow_id))).fetchone()
+                if latest and latest["manifest_hash"] == manifest_hash and latest["label"] == label:
+                    conn.execute("COMMIT")
+                    return latest["id"]
+                cursor = conn.execute(
+                    "INSERT INTO snapshots (n8n_url, workflow_id, label, version_id, manifest, manifest_hash, created_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (n8n_url, str(workflow_id), label, workflow.get("versionId"), json.dumps(manifest),
+                     manifest_hash, time.time()))
+                conn.execute("COMMIT")
+                return cursor.lastrowid
+            except sqlite3.Error:
+                conn.execute("ROLLBACK")
+                raise
+
+    def _meta(self, row: sqlite3.Row) -> Dict:
+        manifest = json.loads(row["manifest"])
+        return {"id": row["id"], "n8n_url": row["n8n_url"], "workflow_id": row["workflow_id"], "label": row["label"],
+                "version_id": row["version_id"], "name": manifest["name"], "nodes": len(manifest["nodes"]),
+                "created_at": row["created_at"]}
+
+    def get(self, snapshot_id: int) -> Optional[Dict]:
+        """A snapshot's metadata plus `workflow`: the PUT payload (name, nodes, connections, settings)."""
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM snapshots WHERE id = ?", (snapshot_id,)).fetchone()
+            if row is None:
+                return None
+            manifest = json.loads(row["manifest"])
+            workflow = {
+                "name": manifest["name"],
+                "nodes": [self._get_blob(conn, digest) for digest in manifest["nodes"]],
+                "connections": self._get_blob(conn, manifest["connections"]),
+                "settings": self._get_blob(conn, manifest["settings"]),
+            }
+        return {**self._meta(row), "workflow": workflow}
+
+    def list(self, n8n_url: Optional[str] = None, workflow_id: Optional[str] = None, limit: int = 50) -> List[Dict]:
+        """Snapshot metadata, newest first."""
+        query, params = "SELECT * FROM snapshots WHERE 1 = 1", []
+        if n8n_url:
+            query += " AND n8n_url = ?"
+            params.append(_normalise_url(n8n_url))
+        if workflow_id:
+            query += " AND workflow_id = ?"
+            params.append(str(workflow_id))
+        with self._connect() as conn:
+            rows = conn.execute(query + " ORDER BY id DESC LIMIT ?", params + [limit]).fetchall()
+        return [self._meta(row) for row in rows]
+
+    def stats(self) -> Dict[str, int]:
+        with self._connect() as conn:
+            snapshots = conn.execute("SELECT COUNT(*) FROM snapshots").fetchone()[0]
+            blobs, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(LENGTH(data)), 0) FROM blobs").fetchone()
+        return {"snapshots": snapshots, "blobs": blobs, "blob_bytes": size}
+
+
+_store: Optional[SnapshotStore] = None
+
+
+def get_store() -> SnapshotStore:
+    global _store
+    if _store is None or _store.db_path != SNAPSHOT_DB:
+        _store = SnapshotStore(SNAPSHOT_DB)
+    return _store
+
+
+if __name__ == "__main__":
+    import sys
+    from datetime import datetime
+    store = get_store()
+    command = sys.argv[1] if len(sys.argv) > 1 else "list"
+    if command == "show" and len(sys.argv) > 2:
+        snapshot = store.get(int(sys.argv[2]))
+        print(json.dumps(snapshot, indent=2) if snapshot else "❌ No snapshot with that id")
+    elif command == "rollback" and len(sys.argv) > 2:
+        from execution.core_healer import rollback_workflow
+        success, message = rollback_workflow(int(sys.argv[2]), n8n_key=os.getenv("N8N_API_KEY"))
+        print(f"✅ {message}" if success else f"❌ {message}")
+    elif command == "stats":
+        print(json.dumps(store.stats(), indent=2))
+    else:
+        for meta in store.list(workflow_id=sys.argv[2] if len(sys.argv) > 2 else None):
+            created = datetime.fromtimestamp(meta["created_at"]).isoformat(timespec="seconds")
+            print(f"{meta['id']}\t{created}\t{meta['label']:<9}\twf {meta['workflow_id']}\t{meta['nodes']} nodes\t{meta['n8n_url']}")
@@ -0,0 +1,182 @@
+"""
+Precompressed static file serving for the bundled Next.js dashboard.
+
+At startup every file under the static export is indexed in memory (size, type, ETag, cache policy),
+and compressible files get gzip (and brotli, if the optional `brotli` package is installed) variants
+computed once. Requests are then served straight from that index with `Accept-Encoding` negotiation:
+hashed build assets are cached as immutable for a year, HTML is revalidated on every load.
+"""
+
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+from email.utils import formatdate
+from typing import Dict, Optional
+
+from starlette.requests import Request
+from starlette.responses import FileResponse, PlainTextResponse, Response
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+MIN_COMPRESS_SIZE = 512  # Below this, compression overhead outweighs the savings
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/javascript",
+    "application/json",
+    "application/xml",
+    "application/manifest+json",
+    "image/svg+xml",
+)
+
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+HTML_CACHE = "public, max-age=0, must-revalidate"
+DEFAULT_CACHE = "public, max-age=3600"
+
+# Next.js puts content-hashed bundles under _next/static/; other bundlers use name.<hash>.ext
+HASHED_ASSET_RE = re.compile(r"(^|/)_next/static/|[.-][0-9a-f]{8,}\.[a-z0-9]+$", re.IGNORECASE)
+
+mimetypes.add_type("application/javascript", ".js")
+mimetypes.add_type("application/javascript", ".mjs")
+mimetypes.add_type("application/manifest+json", ".webmanifest")
+
+
+def cache_control_for(rel_path: str, content_type: str) -> str:
+    """Pick the Cache-Control policy for a file based on its path and type."""
+    if content_type.startswith("text/html"):
+        return HTML_CACHE
+    if HASHED_ASSET_RE.search(rel_path):
+        return IMMUTABLE_CACHE
+    return DEFAULT_CACHE
+
+
+def _is_compressible(content_type: str) -> bool:
+    return content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+def build_static_index(directory: str) -> Dict[str, Dict]:
+    """Walk the static export and return {url_path: entry} with metadata and precompressed bodies."""
+    index = {}
+    for root, _, files in os.walk(directory):
+        for filename in files:
+            full_path = os.path.join(root, filename)
+            rel_path = os.path.relpath(full_path, directory).replace(os.sep, "/")
+            stat = os.stat(full_path)
+            content_type = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+            if content_type.startswith("text/") or content_type == "application/javascript":
+                content_type += "; charset=utf-8"
+
+            entry = {
+                "path": full_path,
+                "size": stat.st_size,
+                "content_type": content_type,
+                "last_modified": formatdate(stat.st_mtime, usegmt=True),
+                "cache_control": cache_control_for(rel_path, content_type),
+                "body": None,
+                "variants": {},
+            }
+
+            if _is_compressible(content_type):
+                with open(full_path, "rb") as f:
+                    body = f.read()
+                entry["body"] = body
+                entry["etag"] = '"%s"' % hashlib.sha1(body).hexdigest()[:20]
+                if len(body) >= MIN_COMPRESS_SIZE:
+                    gz = gzip.compress(body, compresslevel=9, mtime=0)
+                    if len(gz) < len(body):
+                        entry["variants"]["gzip"] = gz
+                    if brotli is not None:
+                        br = brotli.compress(body, quality=11)
+                        if len(br) < len(body):
+                            entry["variants"]["br"] = br
+            else:
+                entry["etag"] = '"%x-%x"' % (int(stat.st_mtime), stat.st_size)
+
+            index[rel_path] = entry
+    return index
+
+
+def negotiate_encoding(accept_encoding: str, available) -> Optional[str]:
+    """Return the best available encoding the client accepts (brotli preferred), or None for identity."""
+    if not available or not accept_encoding:
+        return None
+    accepted = {}
+    for part in accept_encoding.split(","):
+        token, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[token.strip().lower()] = q
+
+    for encoding in ("br", "gzip"):
+        q = accepted.get(encoding, accepted.get("*", 0.0))
+        if encoding in available and q > 0:
+            return encoding
+    return None
+
+
+class PrecompressedStaticFiles:
+    """ASGI app serving a static export from an in-memory index (drop-in for StaticFiles(html=True))."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.index = build_static_index(directory)
+
+    def resolve(self, url_path: str) -> Optional[Dict]:
+        """Map a request path to an index entry the way StaticFiles' html mode does."""
+        rel_path = url_path.strip("/")
+        if not rel_path:
+            return self.index.get("index.html")
+        for candidate in (rel_path, f"{rel_path}/index.html", f"{rel_path}.html"):
+            if candidate in self.index:
+                return self.index[candidate]
+        return None
+
+    def build_response(self, request: Request) -> Response:
+        if request.method not in ("GET", "HEAD"):
+            return PlainTextResponse("Method Not Allowed", status_code=405)
+
+        status_code = 200
+        path, root_path = request.scope["path"], request.scope.get("root_path", "")
+        entry = self.resolve(path[len(root_path):] if path.startswith(root_path) else path)
+        if entry is None:
+            entry = self.index.get("404.html")
+            status_code = 404
+            if entry is None:
+                return PlainTextResponse("Not Found", status_code=404)
+
+        encoding = negotiate_encoding(request.headers.get("accept-encoding", ""), entry["variants"])
+        etag = entry["etag"] if encoding is None else f'{entry["etag"][:-1]}-{encoding}"'
+        headers = {
+            "cache-control": entry["cache_control"],
+            "etag": etag,
+            "last-modified": entry["last_modified"],
+        }
+        if entry["variants"]:
+            headers["vary"] = "Accept-Encoding"
+
+        if status_code == 200 and etag in request.headers.get("if-none-match", ""):
+            return Response(status_code=304, headers=headers)
+
+        if entry["body"] is None:
+            return FileResponse(entry["path"], status_code=status_code, headers=headers,
+                                media_type=entry["content_type"])
+
+        body = entry["body"]
+        if encoding is not None:
+            body = entry["variants"][encoding]
+            headers["content-encoding"] = encoding
+        return Response(body, status_code=status_code, headers=headers, media_type=entry["content_type"])
+
+    async def __call__(self, scope, receive, send):
+        assert scope["type"] == "http"
+        response = self.build_response(Request(scope, receive))
+        await response(scope, receive, send)
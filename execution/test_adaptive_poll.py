@@ -0,0 +1,45 @@
+"""
+Tests for the adaptive poll interval and the execution volume it follows.
+"""
+
+from execution import agentic_healer
+from execution.adaptive_poll import AdaptiveInterval
+from execution.fake_n8n import FakeN8n
+
+
+def test_idle_instance_backs_off_to_the_maximum():
+    schedule = AdaptiveInterval(30, min_interval=5, max_interval=120)
+    for _ in range(5):
+        delay = schedule.record_poll(0, 30, new_executions=0)
+
+    assert delay == 120
+
+
+def test_busy_instance_without_failures_stays_fast():
+    schedule = AdaptiveInterval(30, min_interval=5, max_interval=120)
+    for _ in range(5):
+        delay = schedule.record_poll(0, 30, new_executions=300)  # 10 executions/s
+
+    assert delay == 5
+
+
+def test_failures_shorten_the_interval_at_once():
+    schedule = AdaptiveInterval(120, min_interval=5, max_interval=120)
+
+    assert schedule.record_poll(12, 120, new_executions=12) == 10
+
+
+def test_count_new_executions_counts_since_the_previous_poll(monkeypatch):
+    monkeypatch.setattr(agentic_healer, "_newest_execution_ids", {})
+    fake = FakeN8n(executions=10, latency_ms=0).start()
+    try:
+        assert agentic_healer.count_new_executions(fake.base_url, fake.api_key, "volume") == 0  # First poll: baseline
+        newest = max(int(e["id"]) for e in fake.executions)
+        for i in (1, 2, 3):
+            execution = {**fake.executions[0], "id": str(newest + i)}
+            fake.executions.insert(0, execution)
+
+        assert agentic_healer.count_new_executions(fake.base_url, fake.api_key, "volume") == 3
+        assert agentic_healer.count_new_executions(fake.base_url, fake.api_key, "volume") == 0
+    finally:
+        fake.stop()
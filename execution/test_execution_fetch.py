@@ -0,0 +1,67 @@
+"""
+Tests for size-capped execution fetching: in-memory, spilled (mmap) and truncated bodies.
+"""
+
+import json
+
+import pytest
+
+from execution import execution_fetch
+from execution.execution_fetch import describe_missing_error, fetch_execution_failure, scan_failure
+from execution.fake_n8n import ERROR_TEMPLATES, FakeN8n
+
+
+@pytest.fixture(scope="module")
+def fake():
+    fake = FakeN8n(executions=1, failure_rate=1, error_mix={"data": 1.0}, workflows=1, nodes_per_workflow=5,
+                   payload_kb=64, latency_ms=0).start()
+    yield fake
+    fake.stop()
+
+
+def fetch(fake):
+    return fetch_execution_failure(fake.base_url, fake.api_key, "1")
+
+
+def test_small_body_is_parsed_in_memory(fake):
+    result = fetch(fake)
+
+    assert result["status"] == "complete" and not result["spilled"]
+    assert result["error"] == ERROR_TEMPLATES["data"] and result["failing_node"] == "Code 4"
+
+
+def test_body_over_the_spill_threshold_is_scanned_from_disk(fake, monkeypatch):
+    in_memory = fetch(fake)
+    monkeypatch.setattr(execution_fetch, "EXECUTION_SPILL_BYTES", 16 * 1024)
+    monkeypatch.setattr(execution_fetch, "CHUNK_SIZE", 4 * 1024)
+
+    result = fetch(fake)
+
+    assert result["spilled"] and result["bytes"] > 16 * 1024
+    assert (result["status"], result["error"], result["failing_node"]) == (
+        "complete", in_memory["error"], in_memory["failing_node"])
+
+
+def test_body_over_the_cap_is_truncated(fake, monkeypatch):
+    monkeypatch.setattr(execution_fetch, "EXECUTION_MAX_BYTES", 32 * 1024)
+    monkeypatch.setattr(execution_fetch, "CHUNK_SIZE", 4 * 1024)
+
+    result = fetch(fake)
+
+    assert result["status"] == "truncated" and result["bytes"] == 32 * 1024
+    assert result["error"] is None  # The error sits after the run data in this payload
+    assert "truncated at" in describe_missing_error(result)
+
+
+def test_missing_execution_is_a_failed_fetch(fake):
+    result = fetch_execution_failure(fake.base_url, fake.api_key, "404")
+
+    assert result["status"] == "failed" and result["status_code"] == 404
+
+
+def test_scan_falls_back_to_the_message_of_a_cut_off_error():
+    body = json.dumps({"data": {"resultData": {"lastNodeExecuted": "Code",
+                                               "error": {"message": "boom", "stack": "x" * 200_000}}}}).encode()
+
+    assert scan_failure(body) == ("boom", "Code")
+    assert scan_failure(body[:1000]) == ("boom", "Code")  # A truncated prefix still yields the message
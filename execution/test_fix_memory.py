@@ -0,0 +1,93 @@
+"""
+Tests for fix memory: pending patches, replay scoping and outcome accounting.
+"""
+
+import copy
+
+import pytest
+
+from execution import fix_memory
+from execution.fix_memory import record_replay_outcome, remember_fix, replay_fix
+
+URL = "http://n8n.example:5678"
+ERROR = "Cannot read properties of undefined (reading 'email')"
+
+
+@pytest.fixture(autouse=True)
+def memory_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(fix_memory, "FIX_MEMORY_FILE", str(tmp_path / "fix_memory.json"))
+    monkeypatch.setattr(fix_memory, "_cache", {"mtime": None, "data": None})
+
+
+def make_workflow(id="wf-1", code="const email = $json.user.email;\nreturn items;", method="GET"):
+    return {
+        "id": id,
+        "nodes": [
+            {"name": "Fetch", "type": "n8n-nodes-base.httpRequest", "parameters": {"method": method}},
+            {"name": "Code", "type": "n8n-nodes-base.code", "parameters": {"jsCode": code}},
+            {"name": "Other Code", "type": "n8n-nodes-base.code", "parameters": {"jsCode": code}},
+        ],
+        "connections": {"Fetch": {"main": [[{"node": "Code", "type": "main", "index": 0}]]}},
+    }
+
+
+def fixed(workflow):
+    after = copy.deepcopy(workflow)
+    after["nodes"][1]["parameters"]["jsCode"] = "const email = $json.user?.email;\nreturn items;"
+    return after
+
+
+def node(nodes, name):
+    return next(n for n in nodes if n["name"] == name)
+
+
+def test_new_patch_is_pending_until_verified():
+    before = make_workflow()
+    refs = remember_fix(URL, ERROR, before, fixed(before), "wf-1")
+
+    assert len(refs) == 1
+    assert replay_fix(URL, make_workflow(), ERROR, "Code")[0] is None
+
+    record_replay_outcome(URL, refs, True)
+    nodes, names, replay_refs = replay_fix(URL, make_workflow(), ERROR, "Code")
+
+    assert names == ["Code"] and replay_refs == refs
+    assert "?.email" in node(nodes, "Code")["parameters"]["jsCode"]
+
+
+def test_regressed_patch_stops_replaying():
+    before = make_workflow()
+    refs = remember_fix(URL, ERROR, before, fixed(before), "wf-1")
+    record_replay_outcome(URL, refs, True)
+    record_replay_outcome(URL, refs, False)
+
+    assert replay_fix(URL, make_workflow(), ERROR, "Code")[0] is None
+
+
+def test_memory_is_kept_per_instance():
+    before = make_workflow()
+    record_replay_outcome(URL, remember_fix(URL, ERROR, before, fixed(before), "wf-1"), True)
+
+    assert replay_fix("http://other.example:5678", make_workflow(), ERROR, "Code")[0] is None
+
+
+def test_replay_is_limited_to_the_failing_node_and_its_inputs():
+    before = make_workflow()
+    record_replay_outcome(URL, remember_fix(URL, ERROR, before, fixed(before), "wf-1"), True)
+
+    _, names, _ = replay_fix(URL, make_workflow(), ERROR, "Code")
+    assert names == ["Code"]  # "Other Code" has the same lines but doesn't feed the failure
+
+    _, names, _ = replay_fix(URL, make_workflow(), ERROR)
+    assert names == ["Code", "Other Code"]  # Unknown failing node: every clean match
+
+
+def test_value_patch_uses_the_learned_name_only_in_its_own_workflow():
+    before = make_workflow()
+    after = copy.deepcopy(before)
+    after["nodes"][0]["parameters"]["method"] = "POST"
+    record_replay_outcome(URL, remember_fix(URL, ERROR, before, after, "wf-1"), True)
+
+    assert replay_fix(URL, make_workflow(id="wf-1"), ERROR)[1] == ["Fetch"]
+    assert replay_fix(URL, make_workflow(id="wf-2"), ERROR)[0] is None
+    assert replay_fix(URL, make_workflow(id="wf-2"), ERROR, "Fetch")[1] == ["Fetch"]
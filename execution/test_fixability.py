@@ -0,0 +1,65 @@
+"""
+Tests for the fixability gate: when the naive Bayes model lets a heal escalate to Gemini.
+"""
+
+import pytest
+
+from execution import fixability
+from execution.fixability import evaluate, save_model, should_escalate, train
+
+FIXED = "Cannot read properties of undefined (reading 'email')"
+UNFIXED = "401 Unauthorized - invalid credentials for Google Sheets"
+
+
+def heal(error, fixed, minute):
+    return {"error": error, "heal_status": "resolved" if fixed else "explained",
+            "heal_message": "🤖 Gemini AI fixed it: guarded the lookup" if fixed else "🤖 AI could not fix: credentials",
+            "timings": {"heal.gemini": 900.0}, "timestamp": f"2026-01-01T00:{minute:02d}:00"}
+
+
+def history(count=30):
+    return [heal(FIXED, True, i) if i % 2 else heal(UNFIXED, False, i) for i in range(count)]
+
+
+@pytest.fixture(autouse=True)
+def model_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(fixability, "FIXABILITY_MODEL_FILE", str(tmp_path / "model.json"))
+    monkeypatch.setattr(fixability, "_cache", {"mtime": None, "model": None})
+
+
+def test_without_a_model_everything_escalates():
+    assert should_escalate(UNFIXED) == (True, None)
+
+
+def test_too_little_history_never_gates():
+    save_model(train(history(count=10)))
+
+    assert should_escalate(UNFIXED) == (True, None)
+
+
+def test_gate_skips_errors_gemini_never_fixes():
+    save_model(train(history()))
+
+    escalate_fixed, p_fixed = should_escalate(FIXED)
+    escalate_unfixed, p_unfixed = should_escalate(UNFIXED)
+
+    assert escalate_fixed and p_fixed > 0.9
+    assert not escalate_unfixed and p_unfixed < fixability.FIXABILITY_THRESHOLD
+
+
+def test_threshold_is_inclusive(monkeypatch):
+    save_model(train(history()))
+    _, p_unfixed = should_escalate(UNFIXED)
+
+    monkeypatch.setattr(fixability, "FIXABILITY_THRESHOLD", p_unfixed)
+    assert should_escalate(UNFIXED)[0]
+
+    monkeypatch.setattr(fixability, "FIXABILITY_THRESHOLD", p_unfixed * 1.01)
+    assert not should_escalate(UNFIXED)[0]
+
+
+def test_evaluate_reports_what_the_gate_would_skip():
+    report = evaluate(train(history()), history(count=10))
+
+    assert report["gate"] == {"threshold": fixability.FIXABILITY_THRESHOLD, "calls_skipped": 5, "fixes_lost": 0}
+    assert report["gemini"]["accuracy"] == 1.0
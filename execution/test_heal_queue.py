@@ -0,0 +1,113 @@
+"""
+Tests for HealQueue: claiming, retrying (nack) and dead-lettering jobs.
+"""
+
+import sqlite3
+import time
+
+from execution import heal_queue
+from execution.heal_queue import HealQueue
+
+
+def make_queue(tmp_path, **kwargs):
+    return HealQueue(str(tmp_path / "queue.db"), **kwargs)
+
+
+def test_enqueue_is_idempotent_per_key(tmp_path):
+    queue = make_queue(tmp_path)
+
+    assert queue.enqueue("default:1", {"n": 1})
+    assert not queue.enqueue("default:1", {"n": 2})
+    assert queue.existing_keys(["default:1", "default:2"]) == {"default:1"}
+
+
+def test_claimed_jobs_are_invisible_to_other_workers(tmp_path):
+    queue = make_queue(tmp_path)
+    queue.enqueue("a", {"n": 1})
+    queue.enqueue("b", {"n": 2})
+
+    first = queue.claim("worker-1", limit=1)
+    second = queue.claim("worker-2", limit=5)
+
+    assert [job["job_key"] for job in first] == ["a"]
+    assert [job["job_key"] for job in second] == ["b"]
+    assert first[0]["attempts"] == 1 and first[0]["payload"] == {"n": 1}
+    assert queue.claim("worker-3") == []
+
+
+def test_ack_marks_done(tmp_path):
+    queue = make_queue(tmp_path)
+    queue.enqueue("a", {})
+    job = queue.claim("worker")[0]
+
+    assert queue.ack(job["id"], job["claim_token"])
+
+    assert queue.status("a") == "done"
+    assert queue.claim("worker") == []
+
+
+def test_nack_retries_after_delay(tmp_path):
+    queue = make_queue(tmp_path, max_attempts=3)
+    queue.enqueue("a", {})
+    job = queue.claim("worker")[0]
+
+    assert queue.nack(job["id"], job["claim_token"], "boom", delay=0.05) == "pending"
+    assert queue.claim("worker") == []  # Not due yet
+
+    time.sleep(0.1)
+    retried = queue.claim("worker")
+    assert [j["job_key"] for j in retried] == ["a"]
+    assert retried[0]["attempts"] == 2 and retried[0]["last_error"] == "boom"
+
+
+def test_nack_dead_letters_when_attempts_run_out(tmp_path):
+    queue = make_queue(tmp_path, max_attempts=2)
+    queue.enqueue("a", {})
+    for expected in ("pending", "dead"):
+        job = queue.claim("worker")[0]
+        assert queue.nack(job["id"], job["claim_token"], "boom", delay=0) == expected
+
+    assert queue.status("a") == "dead"
+    assert queue.claim("worker") == []
+    assert [job["job_key"] for job in queue.dead_letters()] == ["a"]
+
+    assert queue.requeue_dead(queue.dead_letters()[0]["id"])
+    assert [job["job_key"] for job in queue.claim("worker")] == ["a"]
+
+
+def test_expired_claim_is_dead_lettered_without_attempts_left(tmp_path):
+    queue = make_queue(tmp_path, visibility_timeout=0.05, max_attempts=1)
+    queue.enqueue("a", {})
+    assert queue.claim("crashed-worker")
+
+    time.sleep(0.1)
+
+    assert queue.claim("worker") == []
+    assert queue.status("a") == "dead"
+
+
+def test_expired_claim_cannot_finish_a_reclaimed_job(tmp_path):
+    queue = make_queue(tmp_path, visibility_timeout=0.05)
+    queue.enqueue("a", {})
+    stale = queue.claim("worker-1")[0]
+    time.sleep(0.1)
+    current = queue.claim("worker-2")[0]
+
+    assert not queue.ack(stale["id"], stale["claim_token"])
+    assert queue.nack(stale["id"], stale["claim_token"], "late", delay=0) == "lost"
+    assert not queue.release(stale["id"], stale["claim_token"])
+    assert queue.stats()["in_flight"] == 1
+
+    assert queue.ack(current["id"], current["claim_token"])
+    assert queue.status("a") == "done"
+
+
+def test_claim_token_column_is_added_to_old_queue_files(tmp_path):
+    path = str(tmp_path / "queue.db")
+    with sqlite3.connect(path) as conn:
+        conn.executescript(heal_queue._SCHEMA.replace("    claim_token TEXT,\n", ""))
+    queue = HealQueue(path)
+    queue.enqueue("a", {})
+    job = queue.claim("worker")[0]
+
+    assert queue.ack(job["id"], job["claim_token"])
@@ -0,0 +1,73 @@
+"""
+Tests for the lint scan: `node --check` gating of findings and fixes.
+"""
+
+import importlib
+
+import pytest
+
+from execution import lint_scan
+from execution.core_healer import CODE_NODE_TYPE
+
+needs_node = pytest.mark.skipif(not lint_scan.NODE_BINARY, reason="node is not installed")
+
+VALID = "const value = items[index];\nreturn items;"
+FIXABLE = "const name = $json.user]name;\nreturn [{ json: { name } }];"
+UNFIXABLE = "const a = 'open;\nconst b = (;\nreturn items;"
+
+
+def test_import_does_not_run_node(monkeypatch):
+    def no_subprocess(*args, **kwargs):
+        raise AssertionError("subprocess run at import")
+
+    monkeypatch.setattr(lint_scan.subprocess, "run", no_subprocess)
+    module = importlib.reload(lint_scan)
+
+    assert module._versions == {}
+
+
+@needs_node
+def test_valid_code_is_never_flagged():
+    assert lint_scan.lint_code(VALID) == {"syntax_error": None, "issues": [], "fixable": False}
+
+
+@needs_node
+def test_fix_is_offered_only_when_it_parses():
+    fixable = lint_scan.lint_code(FIXABLE)
+    assert fixable["syntax_error"] and fixable["fixable"]
+    assert fixable["issues"][0]["after"].startswith("const name = $json.username;")
+
+    unfixable = lint_scan.lint_code(UNFIXABLE)
+    assert unfixable["syntax_error"] and not unfixable["fixable"] and unfixable["issues"] == []
+
+
+@needs_node
+def test_fix_workflow_only_touches_fixable_nodes(monkeypatch):
+    saved = {}
+
+    def save_workflow(workflow_id, workflow, update, url, key):
+        saved["update"] = update
+        return "updated", "ok", 7
+
+    monkeypatch.setattr(lint_scan, "save_workflow", save_workflow)
+    monkeypatch.setattr(lint_scan, "publish_workflow", lambda *args: None)
+    workflow = {"name": "Orders", "connections": {}, "settings": {}, "nodes": [
+        {"name": name, "type": CODE_NODE_TYPE, "parameters": {"jsCode": code}}
+        for name, code in (("Valid", VALID), ("Fixable", FIXABLE), ("Unfixable", UNFIXABLE))]}
+
+    fixed = lint_scan._fix_workflow("wf-1", workflow, "http://n8n.example", "key", [])
+
+    assert fixed == [{"workflow_id": "wf-1", "nodes": ["Fixable"], "status": "updated", "snapshot_id": 7}]
+    codes = {node["name"]: node["parameters"]["jsCode"] for node in saved["update"]["nodes"]}
+    assert codes["Valid"] == VALID and codes["Unfixable"] == UNFIXABLE
+    assert "$json.username" in codes["Fixable"]
+
+
+def test_scan_without_node_does_nothing(monkeypatch):
+    monkeypatch.setattr(lint_scan, "NODE_BINARY", None)
+    monkeypatch.setattr(lint_scan, "_versions", {})
+    monkeypatch.setattr(lint_scan, "list_workflows", lambda *args: pytest.fail("scanned without node"))
+
+    report = lint_scan.scan_workflows("http://n8n.example", "key")
+
+    assert report["parse_check"] == "unavailable" and report["findings"] == []
@@ -0,0 +1,50 @@
+"""
+Tests for the incremental events snapshot: running executions and their later refresh.
+"""
+
+import pytest
+
+from execution import monitor_and_heal
+from execution.fake_n8n import FakeN8n
+
+
+@pytest.fixture
+def fake(tmp_path, monkeypatch):
+    fake = FakeN8n(executions=5, failure_rate=0, workflows=1, latency_ms=0).start()
+    monkeypatch.setattr(monitor_and_heal, "N8N_URL", fake.base_url)
+    monkeypatch.setattr(monitor_and_heal, "N8N_KEY", fake.api_key)
+    monkeypatch.setattr(monitor_and_heal, "DATA_FILE", str(tmp_path / "events.json"))
+    monkeypatch.setattr(monitor_and_heal, "PAGE_SIZE", 2)
+    yield fake
+    fake.stop()
+
+
+def events_by_id():
+    return {event["id"]: event for event in monitor_and_heal.load_snapshot(monitor_and_heal.DATA_FILE)}
+
+
+def test_running_execution_is_not_a_failure(fake):
+    fake.executions_by_id["5"].update(finished=False, status="running", stoppedAt=None)
+
+    monitor_and_heal.fetch_n8n_executions()
+
+    event = events_by_id()["5"]
+    assert event["status"] == "Running" and not event["fixAttempted"]
+
+
+def test_running_execution_is_refreshed_once_it_finishes(fake):
+    fake.executions_by_id["3"].update(finished=False, status="running", stoppedAt=None)
+    monitor_and_heal.fetch_n8n_executions()
+    assert events_by_id()["3"]["status"] == "Running"
+
+    # Newer executions arrive, so paging stops before reaching execution 3 again
+    for i in (6, 7):
+        execution = {**fake.executions[0], "id": str(i)}
+        fake.executions.insert(0, execution)
+        fake.executions_by_id[str(i)] = execution
+    fake.executions_by_id["3"].update(finished=False, status="error", stoppedAt="2026-01-01T00:00:30Z")
+    monitor_and_heal.fetch_n8n_executions()
+
+    event = events_by_id()["3"]
+    assert event["status"] in ("Detected", "Resolved") and event["fixAttempted"]
+    assert {"6", "7"} <= set(events_by_id())
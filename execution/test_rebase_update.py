@@ -0,0 +1,76 @@
+"""
+Tests for rebase_update: re-applying a heal's changes onto a workflow edited in n8n meanwhile.
+"""
+
+import copy
+
+from execution.core_healer import rebase_update
+
+
+def make_workflow(code="const a = 1;\nreturn items;", url="https://api.example.com/1"):
+    return {
+        "name": "Orders",
+        "nodes": [
+            {"name": "Fetch", "type": "n8n-nodes-base.httpRequest", "parameters": {"url": url, "method": "GET"}},
+            {"name": "Code", "type": "n8n-nodes-base.code", "parameters": {"jsCode": code}},
+        ],
+        "connections": {"Fetch": {"main": [[{"node": "Code", "type": "main", "index": 0}]]}},
+        "settings": {"executionOrder": "v1"},
+    }
+
+
+def node(workflow, name):
+    return next(n for n in workflow["nodes"] if n["name"] == name)
+
+
+def test_unrelated_edit_keeps_both_changes():
+    base = make_workflow()
+    update = copy.deepcopy(base)
+    node(update, "Code")["parameters"]["jsCode"] = "const a = 2;\nreturn items;"
+    current = make_workflow(url="https://api.example.com/2")
+
+    rebased = rebase_update(base, update, current)
+
+    assert rebased is not None
+    assert node(rebased, "Code")["parameters"]["jsCode"] == "const a = 2;\nreturn items;"
+    assert node(rebased, "Fetch")["parameters"]["url"] == "https://api.example.com/2"
+
+
+def test_code_fix_survives_edit_elsewhere_in_the_same_script():
+    base = make_workflow(code="const a = 1;\nconst b = 2;\nreturn items;")
+    update = copy.deepcopy(base)
+    node(update, "Code")["parameters"]["jsCode"] = "const a = 10;\nconst b = 2;\nreturn items;"
+    current = make_workflow(code="const a = 1;\nconst b = 2;\nreturn items.slice(1);")
+
+    rebased = rebase_update(base, update, current)
+
+    assert rebased is not None
+    assert node(rebased, "Code")["parameters"]["jsCode"] == "const a = 10;\nconst b = 2;\nreturn items.slice(1);"
+
+
+def test_same_value_changed_differently_conflicts():
+    base = make_workflow()
+    update = copy.deepcopy(base)
+    node(update, "Fetch")["parameters"]["method"] = "POST"
+    current = copy.deepcopy(base)
+    node(current, "Fetch")["parameters"]["method"] = "PUT"
+
+    assert rebase_update(base, update, current) is None
+
+
+def test_node_we_changed_but_they_removed_conflicts():
+    base = make_workflow()
+    update = copy.deepcopy(base)
+    node(update, "Code")["parameters"]["jsCode"] = "return [];"
+    current = copy.deepcopy(base)
+    current["nodes"] = [n for n in current["nodes"] if n["name"] != "Code"]
+
+    assert rebase_update(base, update, current) is None
+
+
+def test_settings_changed_by_both_sides_conflicts():
+    base = make_workflow()
+    update = {**copy.deepcopy(base), "settings": {"executionOrder": "v0"}}
+    current = {**copy.deepcopy(base), "settings": {"executionOrder": "v2"}}
+
+    assert rebase_update(base, update, current) is None
@@ -0,0 +1,98 @@
+"""
+Tests for retry scheduling of transient failures and the retryOf short-circuit in heal_failure.
+"""
+
+import pytest
+
+from execution import agentic_healer
+from execution.fake_n8n import FakeN8n
+from execution.heal_queue import HealQueue
+from execution.retry_scheduler import RETRY_MAX_DELAY, RetryScheduler, backoff, destination
+from execution.verification import CircuitBreaker
+
+TRANSIENT = "Connection refused: https://api.example.com/orders"
+PERMANENT = "Cannot read properties of undefined (reading 'email')"
+
+
+@pytest.fixture
+def healer(tmp_path, monkeypatch):
+    """agentic_healer with its queue, breaker and heal log in tmp_path; heal_workflow records its calls."""
+    monkeypatch.setattr(agentic_healer, "_queue", HealQueue(str(tmp_path / "queue.db")))
+    monkeypatch.setattr(agentic_healer, "_breaker", CircuitBreaker(str(tmp_path / "queue.db")))
+    monkeypatch.setattr(agentic_healer, "_retry_schedulers", {})
+    monkeypatch.setattr(agentic_healer, "LEASE_DB", None)
+    monkeypatch.setattr(agentic_healer, "HEAL_LOG_FILE", str(tmp_path / "heal_log.json"))
+    monkeypatch.setattr(agentic_healer, "get_workflow_name", lambda *args: "Orders")
+    healed = []
+
+    def heal_workflow(workflow_id, execution_id, error_msg, *args, **kwargs):
+        healed.append(execution_id)
+        return {"status": "explained", "message": "healed"}
+
+    monkeypatch.setattr(agentic_healer, "heal_workflow", heal_workflow)
+    return healed
+
+
+def fail(execution_id, error, retry_of=None):
+    execution = {"id": execution_id, "workflowId": "wf-1", **({"retryOf": retry_of} if retry_of else {})}
+    return agentic_healer.heal_failure(execution, error, "http://n8n.example", "key", set())
+
+
+def test_transient_failure_is_scheduled_not_healed(healer):
+    result = fail("10", TRANSIENT)
+
+    assert result["status"] == "retrying" and healer == []
+    assert agentic_healer.get_retry_scheduler().is_scheduled("10")
+
+
+def test_failed_retry_of_a_scheduled_execution_is_left_to_the_scheduler(healer):
+    fail("10", TRANSIENT)
+
+    result = fail("11", TRANSIENT, retry_of="10")
+
+    assert result["status"] == "retrying" and "Retry of execution 10" in result["message"]
+    assert not agentic_healer.get_retry_scheduler().is_scheduled("11")  # No second retry chain
+    assert healer == []
+
+
+def test_failed_retry_with_a_new_permanent_error_is_healed(healer):
+    fail("10", TRANSIENT)
+
+    fail("11", PERMANENT, retry_of="10")
+
+    assert healer == ["11"]
+
+
+def test_retry_of_an_execution_we_did_not_schedule_is_handled_normally(healer):
+    result = fail("11", TRANSIENT, retry_of="99")
+
+    assert result["status"] == "retrying" and "Retry of execution 99" not in result["message"]
+    assert agentic_healer.get_retry_scheduler().is_scheduled("11")
+
+
+def test_destination_is_the_host_named_in_the_error():
+    assert destination(TRANSIENT, "wf-1") == "host:api.example.com"
+    assert destination("socket hang up", "wf-1") == "workflow:wf-1"
+
+
+def test_backoff_honours_retry_after():
+    assert backoff(1, retry_after=500) >= 500
+    assert backoff(20) <= RETRY_MAX_DELAY
+
+
+def test_due_retries_run_and_finish(tmp_path):
+    fake = FakeN8n(executions=3, latency_ms=0).start()
+    try:
+        scheduler = RetryScheduler(HealQueue(str(tmp_path / "queue.db")))
+        for execution_id in ("1", "2"):
+            scheduler.queue.enqueue(f"{scheduler.queue_name}:{execution_id}",
+                                    {"execution_id": execution_id, "workflow_id": "wf-1", "destination": "host:api.example.com"},
+                                    queue=scheduler.queue_name)
+
+        results = scheduler.run_due("worker", fake.base_url, fake.api_key)
+
+        assert sorted((payload["execution_id"], outcome) for payload, outcome in results) == [
+            ("1", "succeeded"), ("2", "succeeded")]
+        assert not scheduler.is_scheduled("1") and fake.calls["POST /executions/{id}/retry"] == 2
+    finally:
+        fake.stop()
@@ -0,0 +1,101 @@
+"""
+Tests for workflow snapshots: content deduplication, heal snapshots and rollback.
+"""
+
+import copy
+
+import pytest
+
+from execution import snapshots
+from execution.agentic_healer import rollback_if_unchanged
+from execution.core_healer import get_workflow, rollback_workflow, save_workflow
+from execution.fake_n8n import FakeN8n
+from execution.snapshots import SnapshotStore
+
+URL = "http://n8n.example:5678"
+
+
+def make_workflow(nodes=20):
+    return {"name": "Orders", "settings": {"executionOrder": "v1"}, "connections": {},
+            "nodes": [{"name": f"Node {i}", "type": "n8n-nodes-base.set", "parameters": {"value": i}}
+                      for i in range(nodes)]}
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(snapshots, "SNAPSHOT_DB", str(tmp_path / "snapshots.db"))
+    return snapshots.get_store()
+
+
+@pytest.fixture
+def fake():
+    fake = FakeN8n(executions=1, workflows=1, latency_ms=0).start()
+    yield fake
+    fake.stop()
+
+
+def test_unchanged_workflow_reuses_the_latest_snapshot(store):
+    workflow = make_workflow()
+    first = store.save(URL, "1", workflow, "pre_heal")
+
+    assert store.save(URL + "/", "1", copy.deepcopy(workflow), "pre_heal") == first
+    assert store.save(URL, "1", workflow, "post_heal") != first
+
+
+def test_changing_one_node_stores_one_new_blob(tmp_path):
+    store = SnapshotStore(str(tmp_path / "dedup.db"))
+    workflow = make_workflow()
+    store.save(URL, "1", workflow, "pre_heal")
+    blobs = store.stats()["blobs"]
+
+    healed = copy.deepcopy(workflow)
+    healed["nodes"][7]["parameters"]["value"] = "fixed"
+    snapshot_id = store.save(URL, "1", healed, "post_heal")
+
+    assert store.stats()["blobs"] == blobs + 1
+    assert store.get(snapshot_id)["workflow"] == healed
+
+
+def test_snapshots_are_scoped_by_instance(store):
+    store.save(URL, "1", make_workflow(), "pre_heal")
+    store.save("http://other.example:5678", "1", make_workflow(), "pre_heal")
+
+    assert [meta["n8n_url"] for meta in store.list(URL, "1")] == [URL]
+
+
+def test_heal_snapshots_and_rollback_restore_the_pre_heal_version(store, fake):
+    base = get_workflow("1", fake.base_url, fake.api_key)
+    update = {field: copy.deepcopy(base[field]) for field in ("name", "nodes", "connections", "settings")}
+    update["nodes"][-1]["parameters"]["jsCode"] = "return items;"
+
+    status, _, snapshot_id = save_workflow("1", base, update, fake.base_url, fake.api_key)
+    assert status == "updated"
+    assert [meta["label"] for meta in store.list(fake.base_url, "1")] == ["post_heal", "pre_heal"]
+
+    restored, message = rollback_workflow(snapshot_id, fake.base_url, fake.api_key)
+
+    assert restored, message
+    assert fake.workflows["1"]["nodes"] == base["nodes"]
+    assert store.list(fake.base_url, "1")[0]["label"] == "rollback"
+
+
+def test_rollback_is_refused_on_another_instance(store):
+    snapshot_id = store.save(URL, "1", make_workflow(), "pre_heal")
+
+    restored, message = rollback_workflow(snapshot_id, "http://other.example:5678", "key")
+
+    assert not restored and "different n8n instance" in message
+
+
+def test_rollback_skips_a_workflow_edited_after_the_heal(store, fake):
+    base = get_workflow("1", fake.base_url, fake.api_key)
+    update = {field: copy.deepcopy(base[field]) for field in ("name", "nodes", "connections", "settings")}
+    update["nodes"][-1]["parameters"]["jsCode"] = "return items;"
+    _, _, snapshot_id = save_workflow("1", base, update, fake.base_url, fake.api_key)
+    later = [meta for meta in store.list(fake.base_url, "1") if meta["id"] > snapshot_id]
+
+    fake.workflows["1"]["nodes"][0]["parameters"]["path"] = "edited-by-hand"
+    restored, message = rollback_if_unchanged("1", snapshot_id, later, fake.base_url, fake.api_key)
+
+    assert restored is None and "edited after the heal" in message
+    assert fake.workflows["1"]["nodes"][0]["parameters"]["path"] == "edited-by-hand"
@@ -0,0 +1,81 @@
+"""
+Tests for the per-tenant outbound budget: TenantLimiter, tenant_wait and the limiter LRU.
+"""
+
+import threading
+import time
+
+import pytest
+
+from execution import n8n_client
+from execution.n8n_client import TenantLimiter, TenantRateLimited, tenant_slot, tenant_wait
+
+
+def test_in_flight_cap_refuses_after_max_wait():
+    limiter = TenantLimiter("n8n.example:5678", max_in_flight=1, rate=0)
+    limiter.acquire(max_wait=0)
+
+    start = time.monotonic()
+    with pytest.raises(TenantRateLimited) as excinfo:
+        limiter.acquire(max_wait=0.05)
+
+    assert time.monotonic() - start < 1
+    assert excinfo.value.status_code == 429 and excinfo.value.retry_after >= 1
+
+
+def test_release_wakes_a_waiting_call():
+    limiter = TenantLimiter("n8n.example:5678", max_in_flight=1, rate=0)
+    limiter.acquire(max_wait=0)
+    threading.Timer(0.05, limiter.release).start()
+
+    waited = limiter.acquire(max_wait=2)
+
+    assert 0 < waited < 2
+    assert limiter.in_flight == 1
+
+
+def test_token_bucket_allows_burst_then_refuses():
+    limiter = TenantLimiter("n8n.example:5678", max_in_flight=0, rate=1, burst=3)
+    for _ in range(3):
+        limiter.acquire(max_wait=0)
+        limiter.release()
+
+    with pytest.raises(TenantRateLimited):
+        limiter.acquire(max_wait=0)
+
+
+def test_zero_limits_disable_the_budget():
+    limiter = TenantLimiter("n8n.example:5678", max_in_flight=0, rate=0)
+    for _ in range(1000):
+        limiter.acquire(max_wait=0)
+
+    assert limiter.in_flight == 1000
+
+
+def test_tenant_wait_caps_queue_time(monkeypatch):
+    monkeypatch.setattr(n8n_client, "_limiters", n8n_client.OrderedDict())
+    url = "http://busy.example:5678"
+    n8n_client.configure_limits(url, max_in_flight=1, rate=0)
+    n8n_client.get_limiter(url).acquire(max_wait=0)
+
+    start = time.monotonic()
+    with tenant_wait(0.05), pytest.raises(TenantRateLimited):
+        with tenant_slot(url):
+            pass
+
+    assert time.monotonic() - start < 1
+
+
+def test_idle_unpinned_limiters_are_evicted(monkeypatch):
+    monkeypatch.setattr(n8n_client, "_limiters", n8n_client.OrderedDict())
+    monkeypatch.setattr(n8n_client, "MAX_TENANTS", 2)
+    pinned = n8n_client.configure_limits("http://fleet.example", label="prod")
+    busy = n8n_client.get_limiter("http://busy.example")
+    busy.acquire(max_wait=0)
+
+    for i in range(5):
+        n8n_client.get_limiter(f"http://visitor{i}.example")
+
+    assert n8n_client._limiters["fleet.example"] is pinned and pinned.label == "prod"
+    assert n8n_client._limiters["busy.example"] is busy and busy.label == "visitor"
+    assert list(n8n_client._limiters) == ["fleet.example", "busy.example", "visitor4.example"]
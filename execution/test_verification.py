@@ -0,0 +1,92 @@
+"""
+Tests for post-heal verification: verdict and the related-failure filter.
+"""
+
+from datetime import datetime, timedelta, timezone
+
+from execution import agentic_healer
+from execution.fake_n8n import FakeN8n
+from execution.heal_queue import HealQueue
+from execution.verification import CircuitBreaker, is_related_failure, verdict
+
+HEALED_AT = datetime(2026, 1, 1, 12, 0, tzinfo=timezone.utc)
+
+
+def execution(id, minutes, status="success"):
+    started = HEALED_AT + timedelta(minutes=minutes)
+    return {"id": id, "status": status, "finished": status == "success",
+            "startedAt": started.isoformat().replace("+00:00", "Z"),
+            "stoppedAt": (started + timedelta(seconds=5)).isoformat().replace("+00:00", "Z")}
+
+
+def test_verified_after_enough_passing_runs():
+    runs = [execution("3", 3), execution("1", 1), execution("2", 2)]
+
+    assert verdict(runs, HEALED_AT, needed=3) == ("verified", None)
+
+
+def test_undecided_until_enough_runs():
+    assert verdict([execution("1", 1)], HEALED_AT, needed=3) == (None, None)
+
+
+def test_runs_before_the_heal_and_unfinished_runs_are_ignored():
+    runs = [execution("0", -5, "error"), {**execution("1", 1, "running"), "stoppedAt": None}, execution("2", 2)]
+
+    assert verdict(runs, HEALED_AT, needed=1) == ("verified", None)
+
+
+def test_first_failure_regresses_by_default():
+    runs = [execution("1", 1), execution("2", 2, "error"), execution("3", 3)]
+
+    outcome, failed = verdict(runs, HEALED_AT, needed=3)
+
+    assert outcome == "regressed" and failed["id"] == "2"
+
+
+def test_unrelated_failures_are_skipped():
+    runs = [execution("1", 1), execution("2", 2, "error"), execution("3", 3), execution("4", 4)]
+
+    assert verdict(runs, HEALED_AT, needed=3, is_related=lambda e: False) == ("verified", None)
+    assert verdict(runs, HEALED_AT, needed=3, is_related=lambda e: True)[0] == "regressed"
+
+
+def test_failure_in_the_healed_node_is_related():
+    assert is_related_failure("Something else broke", "Code", "x is not defined", "Code")
+
+
+def test_failure_with_the_same_signature_is_related():
+    assert is_related_failure("Cannot read properties of undefined (reading 'name')", "Other node",
+                              "Cannot read properties of undefined (reading 'email')", "Code")
+
+
+def test_failure_elsewhere_with_another_error_is_not_related():
+    assert not is_related_failure("401 Unauthorized", "Sheets", "x is not defined", "Code")
+
+
+def test_transient_failures_never_count():
+    assert not is_related_failure("connect ECONNRESET 10.0.0.12:443", "Code", "x is not defined", "Code")
+    assert not is_related_failure("429 Too Many Requests", "Code", None, None)
+
+
+def test_heal_without_details_counts_every_non_transient_failure():
+    assert is_related_failure("x is not defined", "Code", None, None)
+
+
+def test_verify_heals_lists_each_workflow_once(tmp_path, monkeypatch):
+    monkeypatch.setattr(agentic_healer, "_queue", HealQueue(str(tmp_path / "queue.db")))
+    monkeypatch.setattr(agentic_healer, "_breaker", CircuitBreaker(str(tmp_path / "queue.db")))
+    monkeypatch.setattr(agentic_healer, "LEASE_DB", None)
+    monkeypatch.setattr(agentic_healer, "HEAL_LOG_FILE", str(tmp_path / "heal_log.json"))
+    fake = FakeN8n(executions=60, failure_rate=0, workflows=2, latency_ms=0).start()
+    try:
+        for i, workflow_id in enumerate(["1", "1", "1", "2"]):
+            agentic_healer._queue.enqueue(f"verify:default:{i}", {
+                "workflow_id": workflow_id, "execution_id": str(i), "snapshot_id": 1,
+                "healed_at": "2025-12-31T00:00:00Z"}, queue="verify:default")
+
+        decided = agentic_healer.verify_heals(fake.base_url, fake.api_key)
+
+        assert decided == 4
+        assert fake.calls["GET /executions"] == 2
+    finally:
+        fake.stop()
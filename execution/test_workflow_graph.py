@@ -0,0 +1,79 @@
+"""
+Tests for the workflow graph index: topological order, upstream chains and suspect ordering.
+"""
+
+from execution import workflow_graph
+from execution.workflow_graph import WorkflowGraph, graph_for
+
+
+def link(*targets):
+    return {"main": [[{"node": target, "type": "main", "index": 0} for target in targets]]}
+
+
+def make_workflow(**extra):
+    # Trigger -> Fetch -> Merge -> Code, Trigger -> Lookup -> Merge; Notify hangs off Code; Orphan is unconnected
+    names = ["Code", "Notify", "Merge", "Lookup", "Fetch", "Trigger", "Orphan"]  # Deliberately not in flow order
+    types = {"Code": "n8n-nodes-base.code", "Notify": "n8n-nodes-base.slack"}
+    return {
+        "nodes": [{"name": name, "type": types.get(name, "n8n-nodes-base.set")} for name in names],
+        "connections": {"Trigger": link("Fetch", "Lookup"), "Fetch": link("Merge"), "Lookup": link("Merge"),
+                        "Merge": link("Code"), "Code": link("Notify")},
+        **extra,
+    }
+
+
+def test_topological_order_puts_inputs_first():
+    graph = WorkflowGraph(make_workflow())
+
+    for source, targets in graph.downstream.items():
+        for target in targets:
+            assert graph.rank[source] < graph.rank[target]
+    assert graph.order[0] == "Trigger"
+
+
+def test_upstream_chain_is_topological_and_excludes_downstream_nodes():
+    graph = WorkflowGraph(make_workflow())
+
+    chain = graph.upstream_chain("Code")
+
+    assert set(chain) == {"Trigger", "Fetch", "Lookup", "Merge"}
+    assert chain[0] == "Trigger" and chain[-1] == "Merge"
+    assert graph.upstream_chain("Trigger") == []
+
+
+def test_suspects_start_with_the_failing_node_then_nearest_inputs():
+    graph = WorkflowGraph(make_workflow())
+
+    suspects = graph.suspects("Code")
+
+    assert suspects[:2] == ["Code", "Merge"] and suspects[-1] == "Trigger"
+    assert "Notify" not in suspects and "Orphan" not in suspects
+    assert graph.suspects("Unknown") == [] and graph.suspects(None) == []
+
+
+def test_cycles_do_not_hang_and_keep_every_node():
+    workflow = make_workflow()
+    workflow["connections"]["Notify"] = link("Merge")  # Merge -> Code -> Notify -> Merge
+
+    graph = WorkflowGraph(workflow)
+
+    assert sorted(graph.order) == sorted(node["name"] for node in workflow["nodes"])
+    assert "Notify" in graph.upstream_chain("Code")
+
+
+def test_type_index_and_node_lookup():
+    workflow = make_workflow()
+    graph = WorkflowGraph(workflow)
+
+    assert graph.of_type("n8n-nodes-base.code") == ["Code"]
+    assert graph.node(workflow, "Lookup") is workflow["nodes"][3]
+    assert graph.node(workflow, "Missing") is None
+
+
+def test_graphs_are_cached_per_version(monkeypatch):
+    monkeypatch.setattr(workflow_graph, "_cache", workflow_graph.OrderedDict())
+    v1 = make_workflow(id="1", versionId="v1")
+
+    assert graph_for(v1, "http://n8n.example") is graph_for(dict(v1), "http://n8n.example/")
+    assert graph_for(make_workflow(id="1", versionId="v2"), "http://n8n.example") is not graph_for(v1, "http://n8n.example")
+    assert graph_for(v1, "http://other.example") is not graph_for(v1, "http://n8n.example")
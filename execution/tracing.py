@@ -0,0 +1,119 @@
+"""
+Lightweight tracing for the heal pipeline, exported to a local JSONL file (no collector needed).
+
+`span()` opens a timed span as a child of the current one (tracked with contextvars, so it follows
+threads started via asyncio.to_thread). Each finished span becomes one JSON line in TRACE_FILE with
+its trace id, parent, duration and attributes. The root span also aggregates a per-name timing
+breakdown, which `heal_workflow` returns so heal log entries can carry it next to their trace id.
+"""
+
+import contextvars
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "1") == "1"
+TRACE_FILE = os.getenv("TRACE_FILE", ".tmp/traces.jsonl")
+TRACE_MAX_BYTES = int(os.getenv("TRACE_MAX_BYTES", str(10 * 1024 * 1024)))  # Rotate to .1 beyond this
+FLUSH_EVERY = 100  # Spans buffered before a write (roots always flush)
+
+_current_span: contextvars.ContextVar = contextvars.ContextVar("current_span", default=None)
+_buffer: List[Dict] = []
+_lock = threading.Lock()
+
+
+def current_trace_id() -> Optional[str]:
+    """Trace id of the active span, if any."""
+    current = _current_span.get()
+    return current["trace_id"] if current else None
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """Time a block as a span. Yields the span record so callers can add attributes."""
+    parent = _current_span.get()
+    record = {
+        "trace_id": parent["trace_id"] if parent else uuid.uuid4().hex,
+        "span_id": uuid.uuid4().hex[:16],
+        "parent_id": parent["span_id"] if parent else None,
+        "name": name,
+        "start": time.time(),
+        "attributes": dict(attributes),
+        "status": "ok",
+    }
+    root = parent["_root"] if parent else record
+    record["_root"] = root
+    if parent is None:
+        record["breakdown"] = {}
+
+    token = _current_span.set(record)
+    start = time.perf_counter()
+    try:
+        yield record
+    except BaseException as e:
+        record["status"] = "error"
+        record["error"] = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        record["duration_ms"] = round((time.perf_counter() - start) * 1000, 3)
+        _current_span.reset(token)
+        if parent is not None:
+            breakdown = root["breakdown"]
+            breakdown[name] = round(breakdown.get(name, 0) + record["duration_ms"], 3)
+        _export(record, flush=parent is None)
+
+
+def _export(record: Dict, flush: bool):
+    if not TRACING_ENABLED:
+        return
+    line = {k: v for k, v in record.items() if k != "_root"}
+    with _lock:
+        _buffer.append(line)
+        if flush or len(_buffer) >= FLUSH_EVERY:
+            _flush_locked()
+
+
+def _flush_locked():
+    if not _buffer:
+        return
+    try:
+        directory = os.path.dirname(TRACE_FILE)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if os.path.exists(TRACE_FILE) and os.path.getsize(TRACE_FILE) > TRACE_MAX_BYTES:
+            os.replace(TRACE_FILE, TRACE_FILE + ".1")
+        with open(TRACE_FILE, "a") as f:
+            for line in _buffer:
+                f.write(json.dumps(line, default=str) + "\n")
+    except OSError as e:
+        print(f"⚠️ Warning: Failed to write traces to {TRACE_FILE}: {e}")
+    _buffer.clear()
+
+
+def flush():
+    """Write any buffered spans to TRACE_FILE."""
+    with _lock:
+        _flush_locked()
+
+
+def load_trace(trace_id: str) -> List[Dict]:
+    """Return all exported spans of one trace, ordered by start time."""
+    flush()
+    spans = []
+    for path in (TRACE_FILE + ".1", TRACE_FILE):
+        if not os.path.exists(path):
+            continue
+        with open(path, "r") as f:
+            for line in f:
+                if trace_id in line:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    if record.get("trace_id") == trace_id:
+                        spans.append(record)
+    return sorted(spans, key=lambda s: s.get("start", 0))
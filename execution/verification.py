@@ -0,0 +1,161 @@
+"""
+Post-heal verification and a per-workflow circuit breaker.
+
+A heal is only "resolved" once n8n accepted the update; whether it worked shows in the workflow's next
+executions. After each heal that changed a workflow, the agentic healer watches the next
+`VERIFY_EXECUTIONS` finished executions of that workflow: all passing marks the heal verified, a
+related failure marks it regressed, and a regressed heal is rolled back to its pre-heal snapshot (unless
+the workflow was edited after the heal). A failure is related when it is in the healed node or has the
+healed error's signature; transient network and rate-limit failures never count against a heal.
+
+Each regression is recorded per workflow. A workflow that regressed `BREAKER_THRESHOLD` times within
+`BREAKER_WINDOW` trips its breaker and isn't healed again until the oldest regression ages out (or the
+breaker is reset by hand), so a fix that keeps breaking stops burning API calls.
+
+Usage:
+    python -m execution.verification status            # open breakers
+    python -m execution.verification reset <instance:workflow_id>
+"""
+
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+
+try:
+    from execution.core_healer import error_classes, is_failed_execution
+    from execution.fix_memory import error_signature
+except ImportError:
+    from core_healer import error_classes, is_failed_execution
+    from fix_memory import error_signature
+
+VERIFY_EXECUTIONS = int(os.getenv("HEAL_VERIFY_EXECUTIONS", "3"))  # Passing executions needed to verify a heal
+VERIFY_TIMEOUT = float(os.getenv("HEAL_VERIFY_TIMEOUT", str(24 * 3600)))  # Give up (unverified) after this
+AUTO_ROLLBACK = os.getenv("HEAL_AUTO_ROLLBACK", "1") == "1"  # Restore the pre-heal snapshot on regression
+BREAKER_THRESHOLD = int(os.getenv("HEAL_BREAKER_THRESHOLD", "3"))  # Regressions that stop healing a workflow...
+BREAKER_WINDOW = float(os.getenv("HEAL_BREAKER_WINDOW", str(24 * 3600)))  # ...within this many seconds
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS regressions (id INTEGER PRIMARY KEY AUTOINCREMENT, workflow_key TEXT NOT NULL, at REAL NOT NULL);
+CREATE INDEX IF NOT EXISTS regressions_workflow ON regressions (workflow_key, at);
+"""
+
+
+def _parse_timestamp(value: Optional[str]) -> Optional[datetime]:
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except (AttributeError, ValueError):
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def is_transient(error_msg: str) -> bool:
+    """Network and rate-limit failures that a later retry can fix without changing the workflow."""
+    classes = error_classes(error_msg or "")
+    return "syntax" not in classes and ("network" in classes or "rate_limit" in classes)
+
+
+def is_related_failure(error_msg: Optional[str], failing_node: Optional[str],
+                       healed_error: Optional[str], healed_node: Optional[str]) -> bool:
+    """Whether a failure after a heal reflects on it: same failing node or same error signature, not transient.
+
+    A heal recorded without its error or node (older verify jobs) counts every non-transient failure.
+    """
+    if is_transient(error_msg):
+        return False
+    if not healed_error and not healed_node:
+        return True
+    if healed_node and failing_node == healed_node:
+        return True
+    return bool(healed_error) and error_signature(error_msg or "") == error_signature(healed_error)
+
+
+def verdict(executions: List[Dict], healed_at: datetime, needed: int = VERIFY_EXECUTIONS,
+            is_related: Optional[Callable[[Dict], bool]] = None) -> Tuple[Optional[str], Optional[Dict]]:
+    """Judge a heal from the workflow's executions: ("verified", None), ("regressed", failed execution) or (None, None).
+
+    Only finished executions that started after the heal count, oldest first; unfinished ones are ignored,
+    and so are failures `is_related` rejects (by default every failure counts).
+    """
+    after = []
+    for execution in executions:
+        started = _parse_timestamp(execution.get("startedAt"))
+        finished = execution.get("status") not in ("running", "waiting", "new") and (
+            execution.get("stoppedAt") or execution.get("finished"))
+        if started and started > healed_at and finished:
+            after.append((started, execution))
+    after.sort(key=lambda item: item[0])
+    passed = 0
+    for _, execution in after:
+        if passed >= needed:
+            break
+        if is_failed_execution(execution):
+            if is_related is None or is_related(execution):
+                return "regressed", execution
+            continue
+        passed += 1
+    return ("verified", None) if passed >= needed else (None, None)
+
+
+class CircuitBreaker:
+    """Regression history per workflow, shared by replicas through one SQLite file."""
+
+    def __init__(self, db_path: str, threshold: int = BREAKER_THRESHOLD, window: float = BREAKER_WINDOW):
+        self.db_path = db_path
+        self.threshold = threshold
+        self.window = window
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=10, isolation_level=None)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            yield conn
+        finally:
+            conn.close()
+
+    def record_regression(self, workflow_key: str) -> int:
+        """Record a regression; returns the workflow's regressions within the window."""
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("DELETE FROM regressions WHERE at < ?", (now - self.window,))
+            conn.execute("INSERT INTO regressions (workflow_key, at) VALUES (?, ?)", (workflow_key, now))
+            return conn.execute("SELECT COUNT(*) FROM regressions WHERE workflow_key = ?", (workflow_key,)).fetchone()[0]
+
+    def regressions(self, workflow_key: str) -> int:
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM regressions WHERE workflow_key = ? AND at >= ?",
+                                (workflow_key, time.time() - self.window)).fetchone()[0]
+
+    def is_open(self, workflow_key: str) -> bool:
+        """True while the workflow has too many recent regressions to be healed automatically."""
+        return self.regressions(workflow_key) >= self.threshold
+
+    def open_breakers(self) -> Dict[str, int]:
+        with self._connect() as conn:
+            rows = conn.execute("SELECT workflow_key, COUNT(*) FROM regressions WHERE at >= ? GROUP BY workflow_key "
+                                "HAVING COUNT(*) >= ?", (time.time() - self.window, self.threshold)).fetchall()
+        return dict(rows)
+
+    def reset(self, workflow_key: str) -> int:
+        with self._connect() as conn:
+            return conn.execute("DELETE FROM regressions WHERE workflow_key = ?", (workflow_key,)).rowcount
+
+
+if __name__ == "__main__":
+    import json
+    import sys
+    from execution.heal_queue import HEAL_QUEUE_DB
+    breaker = CircuitBreaker(HEAL_QUEUE_DB)
+    if len(sys.argv) > 2 and sys.argv[1] == "reset":
+        cleared = breaker.reset(sys.argv[2])
+        print(f"✅ Cleared {cleared} regressions" if cleared else "❌ No regressions recorded for that workflow")
+    else:
+        print(json.dumps(breaker.open_breakers(), indent=2))
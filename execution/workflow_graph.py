@@ -0,0 +1,126 @@
+"""
+Graph index of a workflow: which node feeds which, so a failure can be localised instead of scanning
+the flat `nodes` list.
+
+A `WorkflowGraph` is built once per workflow version from `nodes` and `connections` and answers in O(1):
+the position of a node by name, its direct inputs and outputs, every node of a type, and (computed once
+per node, then memoised) the upstream chain that fed it, in topological order.
+
+The index only holds structure (names, types, positions, edges), never node dicts, so it stays valid for
+any copy of the same version, including one a fixer is editing in place. Graphs are kept in an LRU keyed
+by (instance, workflow id, versionId/updatedAt): the healer, the fixers and the MCP tools share one build
+per version.
+"""
+
+import os
+import threading
+from collections import OrderedDict, deque
+from typing import Dict, List, Optional
+
+try:
+    from execution.metrics import record_cache
+except ImportError:
+    from metrics import record_cache
+
+GRAPH_CACHE_SIZE = int(os.getenv("WORKFLOW_GRAPH_CACHE_SIZE", "256"))  # Workflow versions kept indexed
+
+_cache: "OrderedDict[tuple, WorkflowGraph]" = OrderedDict()
+_lock = threading.Lock()
+
+
+class WorkflowGraph:
+    """Adjacency, reverse adjacency, topological order and type index of one workflow version."""
+
+    def __init__(self, workflow: Dict):
+        nodes = workflow.get("nodes") or []
+        self.index: Dict[str, int] = {}
+        self.types: Dict[str, str] = {}
+        self.by_type: Dict[str, List[str]] = {}
+        for position, node in enumerate(nodes):
+            name = node.get("name")
+            if name is None:
+                continue
+            self.index[name] = position
+            self.types[name] = node.get("type")
+            self.by_type.setdefault(node.get("type"), []).append(name)
+
+        # Every output type counts as an edge (main, and ai_* links of agent sub-nodes)
+        self.downstream: Dict[str, List[str]] = {name: [] for name in self.index}
+        self.upstream: Dict[str, List[str]] = {name: [] for name in self.index}
+        for source, outputs in (workflow.get("connections") or {}).items():
+            if source not in self.index:
+                continue
+            for branches in (outputs or {}).values():
+                for branch in branches or []:
+                    for link in branch or []:
+                        target = (link or {}).get("node")
+                        if target in self.index and target not in self.downstream[source]:
+                            self.downstream[source].append(target)
+                            self.upstream[target].append(source)
+
+        # Kahn's algorithm, ties broken by position; nodes on a cycle go last in position order
+        pending = {name: len(sources) for name, sources in self.upstream.items()}
+        ready = deque(name for name in self.index if not pending[name])
+        self.order: List[str] = []
+        while ready:
+            name = ready.popleft()
+            self.order.append(name)
+            for target in self.downstream[name]:
+                pending[target] -= 1
+                if not pending[target]:
+                    ready.append(target)
+        placed = set(self.order)
+        self.order.extend(name for name in self.index if name not in placed)
+        self.rank = {name: i for i, name in enumerate(self.order)}
+        self._chains: Dict[str, List[str]] = {}
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.index
+
+    def node(self, workflow: Dict, name: str) -> Optional[Dict]:
+        """The node called `name` in `workflow` (any copy of the version this graph was built from)."""
+        position = self.index.get(name)
+        return workflow["nodes"][position] if position is not None else None
+
+    def of_type(self, node_type: str) -> List[str]:
+        return self.by_type.get(node_type, [])
+
+    def upstream_chain(self, name: str) -> List[str]:
+        """Every node whose output can reach `name`, in topological order (so the direct inputs come last)."""
+        if name not in self.index:
+            return []
+        if name not in self._chains:
+            seen, stack = set(), list(self.upstream[name])
+            while stack:
+                current = stack.pop()
+                if current not in seen and current != name:
+                    seen.add(current)
+                    stack.extend(self.upstream[current])
+            self._chains[name] = sorted(seen, key=self.rank.get)
+        return self._chains[name]
+
+    def suspects(self, name: Optional[str]) -> List[str]:
+        """Where a failure in `name` can come from: the node itself, then its inputs, nearest first."""
+        if not name or name not in self.index:
+            return []
+        return [name] + self.upstream_chain(name)[::-1]
+
+
+def graph_for(workflow: Dict, instance: Optional[str] = None) -> WorkflowGraph:
+    """The (cached) graph of a fetched workflow. Workflows without an id or version are indexed uncached."""
+    version = workflow.get("versionId") or workflow.get("updatedAt")
+    if workflow.get("id") is None or version is None:
+        return WorkflowGraph(workflow)
+    key = ((instance or "").rstrip("/"), str(workflow["id"]), version)
+    with _lock:
+        graph = _cache.get(key)
+        if graph is not None:
+            _cache.move_to_end(key)
+    record_cache("workflow_graph", hit=graph is not None)
+    if graph is None:
+        graph = WorkflowGraph(workflow)
+        with _lock:
+            _cache[key] = graph
+            while len(_cache) > GRAPH_CACHE_SIZE:
+                _cache.popitem(last=False)
+    return graph
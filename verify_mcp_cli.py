@@ -62,7 +62,7 @@ def test_mcp_server():
                 tools = [tool["name"] for tool in data.get("result", {}).get("tools", [])]
                 print(f"\n✅ Tools found: {tools}")
                 
-                expected = ['list_n8n_workflows', 'get_failed_n8n_executions', 'fix_n8n_workflow', 'get_workflow_details']
+                expected = ['list_n8n_workflows', 'get_failed_n8n_executions', 'fix_n8n_workflow', 'get_workflow_details', 'get_workflow_node']
                 missing = [t for t in expected if t not in tools]
                 
                 if not missing: